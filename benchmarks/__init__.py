@@ -0,0 +1,5 @@
+"""Benchmarks of stoat, runnable with the standard library only
+
+Run the suite with `python -m benchmarks` from the project directory.
+"""
+from .suite import CASES, compare, run
@@ -0,0 +1,44 @@
+import argparse
+import sys
+
+from .suite import compare, load, run, save
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Run the stoat benchmarks and compare them with a baseline',
+    )
+    parser.add_argument('cases', nargs='*', help='run the cases starting with these names')
+    parser.add_argument('-o', '--output', help='write the results as JSON to this file')
+    parser.add_argument('-b', '--baseline', help='compare the results with this JSON file')
+    parser.add_argument('-n', '--number', type=int, help='calls per timing run')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='timing runs per case')
+    parser.add_argument(
+        '-t', '--threshold', type=float, default=0.1,
+        help='relative growth reported as a regression (default 0.1)',
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.cases, args.number, args.repeat)
+    if args.output:
+        save(results, args.output)
+
+    if not args.baseline:
+        for name, result in results['results'].items():
+            rate = result.get('per_second')
+            rate = f' ({rate:,.0f}/s)' if rate else ''
+            print(f'{name:28} {result["value"]:12.2f} {result["unit"]}{rate}')
+        return 0
+
+    regressed = False
+    for name, before, after, ratio, regression in compare(
+            results, load(args.baseline), args.threshold):
+        regressed |= regression
+        mark = '  REGRESSION' if regression else ''
+        print(f'{name:28} {before:12.2f} {after:12.2f} {ratio:8.2f}x{mark}')
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
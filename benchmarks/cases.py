@@ -0,0 +1,327 @@
+from collections import OrderedDict
+
+from stoat.core.structure import Structure
+from stoat.core.structure.meta import Meta
+from stoat.core.structure.ref import This
+from stoat.core.structure.transcoder import Transcoder
+from stoat.core.structure.union import Union
+from stoat.core.utils import params
+from stoat.types import Bits
+from stoat.types.ctypes import Char, Int8, Int16, Int32, Int64
+from stoat.types.ctypes.params import Endianness
+
+
+# The benchmark cases by name. Every case is a function that prepares the
+# case and returns the function to time. A case whose function performs
+# count operations is reported per operation, along with the operations
+# per second.
+CASES = OrderedDict()
+
+
+def case(name, count=1):
+    def register(setup):
+        setup.count = count
+        CASES[name] = setup
+        return setup
+    return register
+
+
+class Flat(Structure):
+    f0: Int32
+    f1: Int32
+    f2: Int32
+    f3: Int32
+    f4: Int32
+    f5: Int16
+    f6: Int16
+    f7: Int8
+    f8: Int64
+    f9: Char
+
+
+class Leaf(Structure):
+    a: Int16
+    b: Char
+
+
+class Level1(Structure):
+    left: Leaf
+    right: Leaf
+    value: Int32
+
+
+class Level2(Structure):
+    left: Level1
+    right: Level1
+    value: Int32
+
+
+class Deep(Structure):
+    left: Level2
+    right: Level2
+    value: Int32
+
+
+class StaticArrays(Structure):
+    name: Char[16]
+    samples: Int32[64]
+
+
+class DynamicArray(Structure):
+    size: Int16
+    data: Char[this.size]
+    count: Int16
+    values: Int32[this.count]
+
+
+class Flags(Structure):
+    version: Int8
+    ready: Bits = params(bits=1)
+    mode: Bits = params(bits=3, skip=1)
+    channel: Bits = params(bits=11)
+    priority: Bits = params(bits=4)
+    checksum: Int16
+    levels: Bits[16] = params(bits=3)
+
+
+def _flags():
+    record = Flags()
+    record.ready = 1
+    record.mode = 5
+    record.channel = 1000
+    record.priority = 9
+    record.levels = [i % 8 for i in range(16)]
+    return record
+
+
+# A header in front of one of many message types, the last one selected
+MESSAGES = {
+    kind: Meta.dynamic(f'Message{kind}', (Structure,), {}, {
+        'sequence': Int32,
+        'value': Int16 if kind % 2 else Int64,
+    })
+    for kind in range(120)
+}
+
+
+class Envelope(Structure):
+    kind: Int8
+    body: Union.of(this.kind, MESSAGES)
+    checksum: Int16
+
+
+def _envelope():
+    record = Envelope()
+    record.body = MESSAGES[119]()
+    return record
+
+
+def _dynamic_array():
+    record = DynamicArray()
+    record.size = 100
+    record.data = b'x' * 100
+    record.count = 16
+    record.values = list(range(16))
+    return record
+
+
+def _pack_case(cls, make=None):
+    def setup():
+        record = make() if make else cls()
+        return record.pack
+    return setup
+
+
+def _unpack_case(cls, make=None):
+    def setup():
+        data = (make() if make else cls()).pack()
+        return lambda: cls.unpack(data)
+    return setup
+
+
+def _calcsize_case(cls, make=None):
+    def setup():
+        record = make() if make else cls()
+        return record.calcsize
+    return setup
+
+
+for name, cls, make in [
+    ('flat', Flat, None),
+    ('nested', Deep, None),
+    ('static_array', StaticArrays, None),
+    ('dynamic_array', DynamicArray, _dynamic_array),
+    ('bits', Flags, _flags),
+    ('union', Envelope, _envelope),
+]:
+    case(f'{name}.pack')(_pack_case(cls, make))
+    case(f'{name}.unpack')(_unpack_case(cls, make))
+    case(f'{name}.calcsize')(_calcsize_case(cls, make))
+
+
+@case('dynamic_array.unpack.projection')
+def dynamic_array_unpack_projection():
+    data = _dynamic_array().pack()
+    return lambda: DynamicArray.unpack(data, fields=['count'])
+
+
+@case('flat.field_access')
+def flat_field_access():
+    record = Flat()
+
+    def access():
+        record.f3 = record.f3 + 1
+    return access
+
+
+@case('flat.field_access.trusted')
+def flat_field_access_trusted():
+    record = Flat.configure(trusted=True)()
+
+    def access():
+        record.f3 = record.f3 + 1
+    return access
+
+
+@case('class_creation')
+def class_creation():
+    fields = OrderedDict((f'f{i}', Int32) for i in range(10))
+    return lambda: Meta.dynamic('Created', (Structure,), {}, dict(fields))
+
+
+@case('class_creation.first_use')
+def class_creation_first_use():
+    fields = OrderedDict((f'f{i}', Int32) for i in range(10))
+
+    def create():
+        Meta.dynamic('Created', (Structure,), {}, dict(fields))().pack()
+    return create
+
+
+# The number of classes of a generated schema
+SCHEMA_SIZE = 100
+
+
+@case('class_creation.schema', count=SCHEMA_SIZE)
+def class_creation_schema():
+    # Message classes generated from a protocol spec, each nesting the
+    # previous one, of which only a few are used
+    size = This().size
+
+    def create():
+        previous = Leaf
+        for i in range(SCHEMA_SIZE):
+            previous = Meta.dynamic(f'Message{i}', (Structure,), {}, {
+                'kind': Int8,
+                'size': Int16,
+                'payload': Char[size],
+                'inner': previous if i % 10 else Leaf,
+                'checksum': Int32,
+            })
+    return create
+
+
+# The number of records transcoded at once
+BATCH_SIZE = 1000
+
+
+class WireRecord(Structure):
+    sequence: Int32 = params(endianness=param.order)
+    timestamp: Int64 = params(endianness=param.order)
+    kind: Int8
+    ready: Bits = params(bits=1)
+    mode: Bits = params(bits=7)
+    value: Int32 = params(endianness=param.order)
+    checksum: Int16 = params(endianness=param.order)
+
+
+class WireMessage(Structure):
+    sequence: Int32
+    size: Int16
+    data: Char[this.size]
+    count: Int16
+    values: Int32[this.count]
+
+
+class StoredMessage(Structure):
+    sequence: Int32
+    version: Int8
+    size: Int16
+    data: Char[this.size]
+    count: Int16
+    values: Int32[this.count] = params(endianness=Endianness.Little)
+
+
+@case('transcode.byte_order', count=BATCH_SIZE)
+def transcode_byte_order():
+    transcoder = Transcoder(
+        WireRecord, WireRecord.configure(order=Endianness.Little)
+    )
+    data = WireRecord().pack() * BATCH_SIZE
+    return lambda: transcoder.transcode_many(data)
+
+
+@case('transcode.schema', count=BATCH_SIZE)
+def transcode_schema():
+    record = WireMessage()
+    record.size = 100
+    record.data = b'x' * 100
+    record.count = 16
+    record.values = list(range(16))
+    transcoder = Transcoder(WireMessage, StoredMessage)
+    data = record.pack() * BATCH_SIZE
+    return lambda: transcoder.transcode_many(data)
+
+
+@case('scan.fixed', count=BATCH_SIZE)
+def scan_fixed():
+    data = WireRecord().pack() * BATCH_SIZE
+    return lambda: list(WireRecord.scan(data, {'kind': 7}))
+
+
+@case('scan.dynamic', count=BATCH_SIZE)
+def scan_dynamic():
+    record = WireMessage()
+    record.size = 100
+    record.data = b'x' * 100
+    record.count = 16
+    record.values = list(range(16))
+    data = record.pack() * BATCH_SIZE
+    return lambda: list(WireMessage.scan(data, {'sequence': 7}))
+
+
+@case('pack_many.fixed', count=BATCH_SIZE)
+def pack_many_fixed():
+    records = [WireRecord() for _ in range(BATCH_SIZE)]
+    out = bytearray()
+    return lambda: WireRecord.pack_many(records, out)
+
+
+@case('pack_many.join', count=BATCH_SIZE)
+def pack_many_join():
+    records = [WireRecord() for _ in range(BATCH_SIZE)]
+    return lambda: b''.join([record.pack() for record in records])
+
+
+# The memory cases by name. Every case returns a function creating one
+# instance, whose allocated size is measured.
+MEMORY_CASES = OrderedDict()
+
+
+def memory_case(name):
+    def register(setup):
+        MEMORY_CASES[name] = setup
+        return setup
+    return register
+
+
+@memory_case('flat.memory')
+def flat_memory():
+    data = Flat().pack()
+    return lambda: Flat.unpack(data)
+
+
+@memory_case('nested.memory')
+def nested_memory():
+    data = Deep().pack()
+    return lambda: Deep.unpack(data)
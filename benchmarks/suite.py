@@ -0,0 +1,78 @@
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+
+from .cases import CASES, MEMORY_CASES
+
+
+def run(names=None, number=None, repeat=5):
+    """Run the benchmark cases and return their results
+
+    The time of a case is the best of repeat runs, in microseconds per
+    operation, along with the operations per second of the cases that
+    perform several. When number is None it is chosen so that a run takes
+    about 0.2 seconds. The memory of a case is the number of bytes allocated per
+    instance, averaged over 1000 instances.
+    """
+    results = {}
+    for name, setup in CASES.items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        timer = timeit.Timer(setup())
+        count = number or timer.autorange()[0]
+        best = min(timer.repeat(repeat, count)) / count / setup.count
+        results[name] = {'value': best * 1e6, 'unit': 'us'}
+        if setup.count > 1:
+            results[name]['per_second'] = 1 / best
+
+    for name, setup in MEMORY_CASES.items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        create = setup()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            instances = [create() for _ in range(1000)]
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        del instances
+        results[name] = {'value': (after - before) / 1000, 'unit': 'bytes'}
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': sys.platform,
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold=0.1):
+    """Compare results with a baseline
+
+    Return the comparison of every case found in both as a list of
+    (name, baseline value, value, ratio, regressed), where a case regressed
+    when its value grew by more than threshold.
+    """
+    comparison = []
+    for name, result in results['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['value']
+        ratio = result['value'] / before if before else float('inf')
+        comparison.append(
+            (name, before, result['value'], ratio, ratio > 1 + threshold)
+        )
+    return comparison
+
+
+def save(results, path):
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)
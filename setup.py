@@ -18,6 +18,9 @@ setup(
         "Operating System :: OS Independent",
     ],
     python_requires='>=3.6',
+    extras_require={
+        'numpy': ['numpy'],
+    },
 
     package_dir={"": "src"},
     packages=find_packages(where="src"),
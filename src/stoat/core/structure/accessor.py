@@ -1,11 +1,84 @@
+import sys
+
+from .codec import is_value
+from .ref import This
+from .tracking import TrackedValues, track_field
+
+
+# Whether trusted classes check their assigned values anyway. Debug mode is
+# on when Python runs in development mode (-X dev, from Python 3.7 on),
+# and is read when the accessors of a class are created.
+debug = getattr(sys.flags, 'dev_mode', False)
+
+
 class Accessor(property):
     """Accessor is a property factory for structure fields
 
     The Accessor is used by the Meta metaclass to generate accessors for the
-    structure fields inside a new strcuture class.
+    structure fields inside a new strcuture class. Fields stored as plain
+    values are decoded and encoded by the field class, while other fields are
+    accessed through the getter and setter of the stored instance. Arrays
+    whose length refers to another field are resized to that length first,
+    which is read by the getter precompiled in the dependency graph. Union
+    fields hold an instance of a variant, and assigning one sets the tag.
+
+    The accessors of a trusted class store assigned values as they are, so
+    they must already be the values packed by the field (such as ints in
+    range, or bytes of a single character), unless in debug mode.
     """
-    def __init__(self, item, key):
-        super().__init__(
-            lambda s: item.getter(s.__instance__.data[key]),
-            lambda s, v: item.setter(s.__instance__.data[key], v),
-        )
+    def __init__(self, item, index, length=None, trusted=False):
+        # Only the fields that refer to other fields have a length getter
+        if length is not None and isinstance(
+                getattr(item, '__length__', None), This):
+            def getter(s):
+                value = s.__instance__[index]
+                value.resize(length(s))
+                return value
+
+            def setter(s, v):
+                value = s.__instance__[index]
+                value.resize(length(s))
+                item.setter(value, v)
+        elif length is not None and isinstance(
+                getattr(item, '__tag__', None), This):
+            *path, key = item.__tag__._path
+            tags = item.__tags__
+
+            def getter(s):
+                return s.__instance__[index]
+
+            def setter(s, v):
+                if v.__class__ not in item.__choices__:
+                    raise TypeError(
+                        f'a variant of {item.__name__} is required (got type'
+                        f' {type(v).__name__})'
+                    )
+                if v.__class__ in tags:
+                    owner = s
+                    for name in path:
+                        owner = getattr(owner, name)
+                    setattr(owner, key, tags[v.__class__])
+                values = s.__instance__
+                values[index] = v
+                if isinstance(values, TrackedValues):
+                    track_field(values, index)
+        elif is_value(item):
+            decode, encode = item.decode, item.encode
+
+            def getter(s):
+                return decode(s.__instance__[index])
+
+            if trusted and not debug:
+                def setter(s, v):
+                    s.__instance__[index] = v
+            else:
+                def setter(s, v):
+                    s.__instance__[index] = encode(v)
+        else:
+            def getter(s):
+                return item.getter(s.__instance__[index])
+
+            def setter(s, v):
+                item.setter(s.__instance__[index], v)
+
+        super().__init__(getter, setter)
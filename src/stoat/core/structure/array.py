@@ -0,0 +1,310 @@
+import array
+import copyreg
+from operator import attrgetter
+import struct
+import sys
+
+from .base import Base
+from .codec import split_fmt, truncated, value_fmt
+from .meta import Layout, Meta
+from .ref import This
+from .registry import Registry
+
+
+# Array typecodes by the kind of struct format code
+INTEGER_CODES = 'bhilq'
+FLOAT_CODES = 'fd'
+
+
+def typecode(order, code):
+    """Return the array typecode matching a struct format code"""
+    size = struct.calcsize(order + code)
+    if code.lower() in INTEGER_CODES:
+        candidates = INTEGER_CODES.upper() if code.isupper() else INTEGER_CODES
+    elif code in FLOAT_CODES:
+        candidates = FLOAT_CODES
+    else:
+        raise TypeError(f'unsupported array element format {code!r}')
+    for candidate in candidates:
+        if array.array(candidate).itemsize == size:
+            return candidate
+    raise TypeError(f'unsupported array element format {code!r}')
+
+
+def needs_swap(order, size):
+    """Return whether values of size bytes in a byte order are swapped"""
+    return (
+        size > 1 and order in '<>!' and
+        (order == '<') != (sys.byteorder == 'little')
+    )
+
+
+class ArrayMeta(Meta):
+    """ArrayMeta is the metaclass of the array classes
+
+    The layout of an array is derived from its element and its length
+    instead of a blueprint, and arrays pack themselves rather than being
+    compiled into a codec.
+    """
+    def __new__(mcs, name, bases, constructor):
+        element = constructor.fields.get('__element__')
+        if element is not None and value_fmt(element) is not None:
+            order, code = split_fmt(value_fmt(element))
+            size = struct.calcsize(order + code)
+            code = None if code == 'c' else typecode(order, code)
+            constructor.fields['__element_size__'] = size
+            constructor.fields['__typecode__'] = code
+            constructor.fields['__swap__'] = (
+                code is not None and needs_swap(order, size)
+            )
+        if element is not None:
+            constructor.fields['__parameters__'] = element.__parameters__
+        return super().__new__(mcs, name, bases, constructor)
+
+    def _layout(cls):
+        if cls.__element__ is None or isinstance(cls.__length__, This):
+            return Layout(fixed=False, size=None, offsets={}, bits={})
+        return Layout(
+            fixed=True,
+            size=cls.size_of(cls.__length__),
+            offsets={},
+            bits={},
+        )
+
+    def _compile(cls):
+        return None
+
+    def _configure(cls, configuration):
+        # Arrays are configured through their element
+        element = Registry().configure(cls.__element__, configuration)
+        return element.array(cls.__length__)
+
+
+def array_of(element, length):
+    """Return the array class of an element class and a length"""
+    return element.array(length)
+
+
+def _reduce_array(cls):
+    # Array classes are pickled as their element and length
+    if cls.__element__ is None:
+        return cls.__qualname__
+    return array_of, (cls.__element__, cls.__length__)
+
+
+copyreg.pickle(ArrayMeta, _reduce_array)
+
+
+class Array(Base, metaclass=ArrayMeta):
+    """Array is a sequence of primitive data sources of the same type
+
+    Array classes are created by subscripting a primitive data source class
+    with a length, such as `Char[5]` or `Int16[this.size]`. The length is
+    either static or a reference to a preceding field of the containing
+    structure, in which case the array follows the value of that field.
+
+    The elements are stored in a single contiguous buffer, a bytearray for
+    Char and an array.array in native byte order otherwise. Packing and
+    unpacking is a single copy of the buffer, with a byteswap only when the
+    byte order of the element differs from the native one. Elements are
+    accessed as the plain values packed by the element format.
+
+    An array held by a tracked instance (see `Structure.track`) marks its
+    field when it is assigned, resized or changed in place.
+    """
+    __slots__ = ('_mark',)
+    __element__ = None
+    __length__ = None
+    __length_of__ = None
+    __element_size__ = None
+    __typecode__ = None
+    __swap__ = False
+
+    def __init__(self):
+        length = self.__length__
+        self.__instance__ = self._storage(
+            0 if isinstance(length, This) else length
+        )
+
+    @classmethod
+    def of(cls, element, length):
+        if not cls._supports(element):
+            raise TypeError(
+                f'arrays of {element.__name__} are not supported, the element'
+                f' must be a primitive data source'
+            )
+        if isinstance(length, This):
+            if not length._path:
+                raise TypeError('an array length can not refer to this')
+            name = f'{element.__name__}[this.{".".join(length._path)}]'
+        elif isinstance(length, int) and length >= 0:
+            name = f'{element.__name__}[{length}]'
+        else:
+            raise TypeError(
+                f'an array length must be a non negative int or a reference'
+                f' (got {length!r})'
+            )
+        dictionary = {'__element__': element, '__length__': length}
+        if isinstance(length, This):
+            dictionary['__length_of__'] = attrgetter('.'.join(length._path))
+        return Registry().array(
+            element, length,
+            lambda: ArrayMeta.dynamic(name, (cls,), dictionary, {}),
+        )
+
+    @classmethod
+    def _supports(cls, element):
+        """Return whether the arrays of cls can hold elements of a class"""
+        return value_fmt(element) is not None
+
+    @classmethod
+    def size_of(cls, length):
+        """Return the packed size of length elements"""
+        return length * cls.__element_size__
+
+    @classmethod
+    def array(cls, size):
+        raise NotImplementedError(
+            f'multidimensional arrays are not supported (got'
+            f' {cls.__name__}[{size!r}])'
+        )
+
+    @classmethod
+    def length_of(cls, owner):
+        """Return the length of the array within owner
+
+        The owner is the instance (or view) of the structure containing the
+        array, from which a referenced length is resolved.
+        """
+        if isinstance(cls.__length__, This):
+            return cls.__length_of__(owner)
+        return cls.__length__
+
+    @classmethod
+    def _storage(cls, length):
+        if cls.__typecode__ is None:
+            return bytearray(length)
+        return array.array(cls.__typecode__, bytes(length * cls.__element_size__))
+
+    def resize(self, length):
+        """Truncate the array or pad it with zeros to the given length"""
+        data = self.__instance__
+        if length < len(data):
+            del data[length:]
+        elif length > len(data):
+            data.extend(self._storage(length - len(data)))
+        else:
+            return
+        self._changed()
+
+    def _changed(self):
+        """Mark the field holding the array in a tracked instance"""
+        mark = getattr(self, '_mark', None)
+        if mark is not None:
+            mark()
+
+    def calcsize(self):
+        return self.size_of(len(self.__instance__))
+
+    def pack(self):
+        return bytes(self._raw(len(self.__instance__)))
+
+    def pack_into(self, buffer, offset, length=None):
+        raw = self._raw(len(self.__instance__) if length is None else length)
+        size = len(raw)
+        if offset + size > len(buffer):
+            truncated('pack_into', buffer, offset, offset + size)
+        buffer[offset:offset + size] = raw
+        return offset + size
+
+    def _raw(self, length):
+        """Return the packed bytes of the first length elements"""
+        data = self.__instance__
+        if length != len(data):
+            data = data[:length]
+            data.extend(self._storage(length - len(data)))
+        if self.__swap__:
+            data = data if data is not self.__instance__ else data[:]
+            data.byteswap()
+        return memoryview(data).cast('B')
+
+    @classmethod
+    def unpack_from(cls, buffer, offset, length=None):
+        if length is None:
+            length = cls.__length__
+            if isinstance(length, This):
+                raise TypeError(
+                    f'the length of {cls.__name__} is required to unpack it'
+                )
+        size = cls.size_of(length)
+        if offset + size > len(buffer):
+            truncated('unpack_from', buffer, offset, offset + size)
+        with memoryview(buffer) as view:
+            if cls.__typecode__ is None:
+                data = bytearray(view[offset:offset + size])
+            else:
+                data = array.array(cls.__typecode__)
+                data.frombytes(view[offset:offset + size])
+                if cls.__swap__:
+                    data.byteswap()
+        result = object.__new__(cls)
+        result.__instance__ = data
+        return result, offset + size
+
+    def getter(self):
+        return self
+
+    def setter(self, value):
+        if isinstance(value, Array):
+            value = value.__instance__
+        if isinstance(value, str) or not hasattr(value, '__len__'):
+            raise TypeError(
+                f'a sequence is required for {self.__class__.__name__} (got'
+                f' type {type(value).__name__})'
+            )
+        if len(value) != len(self.__instance__):
+            raise TypeError(
+                f'{self.__class__.__name__} requires {len(self.__instance__)}'
+                f' elements (got {len(value)})'
+            )
+        self.__instance__ = self._encode(value)
+        self._changed()
+
+    def _encode(self, values):
+        """Return the storage of a sequence of assigned elements"""
+        if self.__typecode__ is None:
+            if isinstance(values, (bytes, bytearray)):
+                return bytearray(values)
+            return bytearray(self.__element__.encode(v)[0] for v in values)
+        return array.array(self.__typecode__, values)
+
+    def __len__(self):
+        return len(self.__instance__)
+
+    def __getitem__(self, index):
+        value = self.__instance__[index]
+        if self.__typecode__ is None:
+            return bytes((value,))
+        return value
+
+    def __setitem__(self, index, value):
+        value = self.__element__.encode(value)
+        if self.__typecode__ is None:
+            value = value[0]
+        self.__instance__[index] = value
+        self._changed()
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __eq__(self, other):
+        if isinstance(other, Array):
+            return list(self) == list(other)
+        if self.__typecode__ is None and isinstance(other, (bytes, bytearray)):
+            return self.__instance__ == other
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return False
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({list(self)!r})'
@@ -1,15 +1,10 @@
 from abc import abstractmethod
-from collections import OrderedDict, namedtuple
 
 from .meta import Meta
-
-
-Instance = namedtuple(
-    'Instance',
-    [
-        'data',
-    ]
-)
+from . import batches, parallel, scanning, streams
+from .projection import Projection
+from .tracking import BoundValues, bind
+from .view import View
 
 
 class Base(metaclass=Meta):
@@ -17,43 +12,170 @@ class Base(metaclass=Meta):
 
     This class is required to prevent circular import between Structure
     and Array.
+
+    The values of an instance are kept in the `__instance__` slot as laid out
+    by the codec of the class. Structure classes are slotted, a class that
+    does not define `__slots__` gets an empty one from the Meta metaclass,
+    and one that needs arbitrary attributes declares
+    `__slots__ = ('__dict__',)`.
     """
-    def __init__(self):
-        self.__instance__ = Instance(data=OrderedDict())
+    __slots__ = ('__instance__',)
 
-        for key, struct in self.__blueprint__.shape.items():
-            self.__instance__.data[key] = struct[0]()
+    def __init__(self):
+        self.__codec__.init(self)
 
     def calcsize(self):
-        size = 0
-        for field in self.__instance__.data.values():
-            size += field.calcsize()
-        return size
+        layout = self.__blueprint__.layout
+        if layout.fixed:
+            return layout.size
+        return self.__codec__.calcsize(self)
 
     def pack(self):
+        values = self.__instance__
+        if values.__class__ is BoundValues:
+            values.binding.patch(self)
+            return bytes(values.binding.buffer)
         size = self.calcsize()
         bin_state = bytearray(size)
         self.pack_into(bin_state, 0)
         return bytes(bin_state)
 
     def pack_into(self, buffer, offset):
-        for field in self.__instance__.data.values():
-            offset = field.pack_into(buffer, offset)
-        return offset
+        values = self.__instance__
+        if values.__class__ is BoundValues:
+            values.binding.patch(self)
+            size = len(values.binding.buffer)
+            buffer[offset:offset + size] = values.binding.buffer
+            return offset + size
+        return self.__codec__.pack_into(self, buffer, offset)
+
+    @classmethod
+    def pack_many(cls, records, out=None):
+        """Pack structures one after the other into a single bytearray
+
+        out is a bytearray to reuse, which is resized to the size of the
+        batch, see `batches.pack_many`. Return the bytearray.
+        """
+        return batches.pack_many(cls, records, out)
+
+    @classmethod
+    def write_many(cls, records, target, out=None):
+        """Write structures to a socket, file or file descriptor
+
+        The batch is packed into out and written with vectored writes, see
+        `batches.write_many`. Return the number of bytes written.
+        """
+        return batches.write_many(cls, records, target, out)
+
+    def track(self):
+        """Bind the instance to a buffer of its packed bytes and track changes
+
+        Packing a tracked instance only packs the fields that changed since
+        it was last packed into the buffer, and packs the whole instance
+        only when the size of a field changed. Return the instance.
+        """
+        if self.__instance__.__class__ is not BoundValues:
+            buffer = bytearray(self.calcsize())
+            self.__codec__.pack_into(self, buffer, 0)
+            bind(self, buffer)
+        return self
+
+    def packed(self):
+        """Return the packed bytes of a tracked instance without copying
+
+        The changed fields are packed into the buffer of the instance (see
+        `track`), which is returned as a read-only memoryview (writable
+        before Python 3.8, and not to be written to). The view
+        follows later changes of fields of the same size, while a change of
+        size packs the instance into a new buffer.
+        """
+        self.track()
+        binding = self.__instance__.binding
+        binding.patch(self)
+        view = memoryview(binding.buffer)
+        # Views can only be made read-only from Python 3.8 on
+        return view.toreadonly() if hasattr(view, 'toreadonly') else view
 
     @classmethod
-    def unpack(cls, buffer):
+    def _configuration(cls, configuration):
+        """Return the class attributes of the variant for a configuration
+
+        Data sources override this to apply the parameters they accept in
+        `__parameters__`.
+        """
+        return {}
+
+    @classmethod
+    def unpack(cls, buffer, fields=None):
+        """Unpack an instance, or a dict of the field paths in fields
+
+        Unpacking a list of field paths, such as `['header.id', 'size']`,
+        only decodes these fields and the lengths and tags they depend on,
+        and stops after the last of them, see `Projection`.
+        """
+        if fields is not None:
+            return Projection.of(cls, fields).unpack(buffer, 0)
         result, _ = cls.unpack_from(buffer, 0)
         return result
 
     @classmethod
-    def unpack_from(cls, buffer, offset):
-        result = cls()
-        for key, struct in result.__blueprint__.shape.items():
-            result.__instance__.data[key], offset = (
-                struct[0].unpack_from(buffer, offset)
-            )
-        return result, offset
+    def unpack_from(cls, buffer, offset, fields=None):
+        if fields is not None:
+            return Projection.of(cls, fields).unpack_from(buffer, offset)
+        return cls.__codec__.unpack_from(buffer, offset)
+
+    @classmethod
+    def unpack_tracked(cls, buffer, offset=0):
+        """Unpack a structure tracking its changes, see `track`
+
+        The packed bytes are copied from buffer so that packing the instance
+        only packs the fields that changed.
+        """
+        result, end = cls.unpack_from(buffer, offset)
+        return bind(result, bytearray(buffer[offset:end]))
+
+    @classmethod
+    def iter_unpack(cls, stream, chunk_size=streams.DEFAULT_CHUNK_SIZE):
+        """Yield the structures packed one after the other in a stream"""
+        return streams.iter_unpack(cls, stream, chunk_size)
+
+    @classmethod
+    def unpack_file(cls, path, workers=None, ordered=True,
+                    chunk_size=parallel.DEFAULT_CHUNK_SIZE):
+        """Yield the structures packed one after the other in a file
+
+        The file is decoded in chunks by a pool of worker processes, see
+        `parallel.unpack_file`.
+        """
+        return parallel.unpack_file(cls, path, workers, ordered, chunk_size)
+
+    @classmethod
+    def scan(cls, source, where, offset=0):
+        """Yield the structures in a buffer or file for which where holds
+
+        Records are tested on their raw bytes, and only the records that
+        match are unpacked, see `scanning.scan`.
+        """
+        return scanning.scan(cls, source, where, offset)
+
+    @classmethod
+    async def read(cls, reader):
+        """Read a structure from an asyncio StreamReader"""
+        return await streams.read(cls, reader)
+
+    @classmethod
+    def iter_read(cls, reader):
+        """Asynchronously iterate the structures read from a StreamReader"""
+        return streams.iter_read(cls, reader)
+
+    async def write(self, writer):
+        """Write the packed structure to an asyncio StreamWriter"""
+        await streams.write(self, writer)
+
+    @classmethod
+    def view(cls, buffer, offset=0):
+        """Return a lazy view of the structure packed in buffer at offset"""
+        return View.of(cls)(buffer, offset)
 
     def getter(self):
         return self
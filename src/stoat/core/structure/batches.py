@@ -0,0 +1,170 @@
+"""Packing batches of structures into reusable buffers and writing them
+
+    pool = BufferPool()
+    out = pool.acquire()
+    Message.write_many(records, sock, out=out)
+    pool.release(out)
+
+`pack_many` packs every record of a batch into a single buffer, sized once
+for the whole batch, so no bytes are allocated or copied per record. The
+buffer can be reused for the next batch, which only grows it when the
+batch is larger. `write_many` writes a batch with vectored writes
+(`socket.sendmsg` or `os.writev`), in which the records that are bound to
+a buffer of their own (see `Structure.track`) are written from it rather
+than copied.
+"""
+import os
+from threading import Lock
+
+from .tracking import BoundValues
+
+
+# The maximum number of buffers in a single vectored write
+IOV_MAX = 1024
+
+
+class BufferPool:
+    """BufferPool keeps the buffers of batches for reuse
+
+    Buffers are acquired for a batch and released when it was written, so
+    that repeated batches reuse the allocated memory. At most count
+    released buffers are kept.
+    """
+    def __init__(self, count=4):
+        self.count = count
+        self._free = []
+        self._lock = Lock()
+
+    def acquire(self):
+        """Return a released buffer, or a new one"""
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return bytearray()
+
+    def release(self, buffer):
+        """Keep a buffer for reuse"""
+        with self._lock:
+            if len(self._free) < self.count:
+                self._free.append(buffer)
+
+
+def pack_many(cls, records, out=None):
+    """Pack the structures of cls one after the other into out
+
+    out is a bytearray resized to the size of the batch, or a new one when
+    it is None. Return out. Records that are not instances of cls raise
+    TypeError, and instances of subclasses are packed as their own class.
+    """
+    layout = cls.__blueprint__.layout
+    if not isinstance(records, (list, tuple)):
+        records = list(records)
+    subclassed = False
+    for record in records:
+        if record.__class__ is not cls:
+            if not isinstance(record, cls):
+                raise TypeError(
+                    f'a {cls.__name__} type is required (got type'
+                    f' {type(record).__name__})'
+                )
+            subclassed = True
+    if layout.fixed and not subclassed:
+        size = len(records) * layout.size
+    else:
+        size = sum(record.calcsize() for record in records)
+    out = _resize(out, size)
+    pack_into = cls.finalize().pack_into
+    offset = 0
+    for record in records:
+        if (record.__class__ is not cls
+                or record.__instance__.__class__ is BoundValues):
+            offset = record.pack_into(out, offset)
+        else:
+            offset = pack_into(record, out, offset)
+    return out
+
+
+def write_many(cls, records, target, out=None):
+    """Write the structures of cls to a socket, file or file descriptor
+
+    The records are packed into out (see `pack_many`), except for the
+    records bound to a buffer, and the buffers are written with vectored
+    writes until all of them were written, so target must be blocking.
+    Return the number of bytes written.
+    """
+    if not isinstance(records, (list, tuple)):
+        records = list(records)
+    # Bound records are written from their own buffer
+    bound = [
+        record.__instance__.__class__ is BoundValues for record in records
+    ]
+    if any(bound):
+        out = pack_many(
+            cls, [r for r, b in zip(records, bound) if not b], out
+        )
+    else:
+        out = pack_many(cls, records, out)
+
+    view = memoryview(out)
+    segments = []
+    try:
+        start = offset = 0
+        for record, is_bound in zip(records, bound if any(bound) else ()):
+            if not is_bound:
+                offset += record.calcsize()
+                continue
+            if offset > start:
+                segments.append(view[start:offset])
+                start = offset
+            values = record.__instance__
+            values.binding.patch(record)
+            segments.append(memoryview(values.binding.buffer))
+        if len(out) > start:
+            segments.append(view[start:])
+        return _write(target, segments)
+    finally:
+        for segment in segments:
+            segment.release()
+        view.release()
+
+
+def _resize(out, size):
+    """Return out resized to size bytes, or a new buffer of size bytes"""
+    if out is None:
+        return bytearray(size)
+    if len(out) > size:
+        del out[size:]
+    elif len(out) < size:
+        out += bytes(size - len(out))
+    return out
+
+
+def _write(target, segments):
+    """Write all the segments to target, and return the number of bytes"""
+    if hasattr(target, 'sendmsg'):
+        write = target.sendmsg
+    else:
+        if hasattr(target, 'flush'):
+            target.flush()
+        fd = target if isinstance(target, int) else target.fileno()
+        if hasattr(os, 'writev'):
+            def write(buffers):
+                return os.writev(fd, buffers)
+        else:
+            def write(buffers):
+                return os.write(fd, buffers[0])
+
+    total = sum(segment.nbytes for segment in segments)
+    pending = [segment.cast('B') for segment in segments if segment.nbytes]
+    try:
+        while pending:
+            written = write(pending[:IOV_MAX])
+            # Drop the written segments and the written part of the next
+            while pending and written >= pending[0].nbytes:
+                written -= pending.pop(0).nbytes
+            if written:
+                pending[0] = pending[0][written:]
+    finally:
+        for segment in pending:
+            segment.release()
+    return total
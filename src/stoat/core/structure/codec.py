@@ -0,0 +1,508 @@
+import struct
+from time import perf_counter
+
+from .ref import This
+
+
+BYTE_ORDERS = '@=<>!'
+
+
+def source_fmt(cls):
+    """Return the struct format of a data source class or None"""
+    fmt = getattr(cls, 'fmt', None)
+    return fmt if isinstance(fmt, str) else None
+
+
+def value_fmt(cls):
+    """Return the struct format of a class stored as a plain value or None
+
+    Fields of data source classes that do not contain other structures are
+    stored as the plain value packed by their format instead of an instance.
+    """
+    blueprint = getattr(cls, '__blueprint__', None)
+    if blueprint is None or blueprint.shape:
+        return None
+    return source_fmt(cls)
+
+
+def value_bits(cls):
+    """Return the (skip, bits) of a bit field class or None
+
+    Bit fields are stored as plain integers, and adjacent bit fields are
+    packed together into the bytes of a single word (see `Meta._layout`).
+    """
+    blueprint = getattr(cls, '__blueprint__', None)
+    if blueprint is None or blueprint.shape:
+        return None
+    bits = getattr(cls, '__bits__', None)
+    return None if bits is None else (cls.__skip__, bits)
+
+
+def is_value(cls):
+    """Return whether the fields of cls are stored as plain values"""
+    return value_fmt(cls) is not None or value_bits(cls) is not None
+
+
+def truncated(operation, buffer, offset, end):
+    """Raise struct.error for a buffer ending before the end of a record"""
+    raise struct.error(
+        f'{operation} requires a buffer of at least {end} bytes for'
+        f' {end - offset} bytes at offset {offset} (actual buffer size is'
+        f' {len(buffer)})'
+    )
+
+
+def word_code(size):
+    """Return the struct format code of a big endian word of size bytes
+
+    Words that do not match an integer code are unpacked as bytes.
+    """
+    return {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}.get(size, f'{size}s')
+
+
+def split_fmt(fmt):
+    """Split a struct format string into its byte order and its codes"""
+    if fmt and fmt[0] in BYTE_ORDERS:
+        return fmt[0], fmt[1:]
+    return '@', fmt
+
+
+def default_value(fmt):
+    """Return the value unpacked by fmt from zero bytes"""
+    return struct.unpack(fmt, bytes(struct.calcsize(fmt)))[0]
+
+
+def initializer(cls, initial):
+    """Return a function creating an instance of cls set to initial"""
+    def init():
+        instance = cls()
+        instance.setter(initial)
+        return instance
+    return init
+
+
+def _check_ref(cls, position, ref):
+    """Verify that a length reference resolves to a preceding value"""
+    fields = list(cls.__blueprint__.shape.keys())
+    if ref._path[0] not in fields[:position]:
+        raise TypeError(
+            f'the length {ref!r} of {cls.__name__}.{fields[position]}'
+            f' must refer to a preceding field'
+        )
+    for i, key in enumerate(ref._path):
+        shape = cls.__blueprint__.shape
+        if key not in shape:
+            raise TypeError(f'{cls.__name__} has no field {key!r} ({ref!r})')
+        cls = shape[key][0]
+        if is_value(cls) and i == len(ref._path) - 1:
+            return
+        if is_value(cls) or cls.__codec__ is None:
+            break
+    raise TypeError(f'the length {ref!r} must refer to a primitive field')
+
+
+def check_refs(cls):
+    """Verify the length and tag references of the fields of cls
+
+    The codec of a class is compiled on first use, so the references it
+    relies on are verified when the class is defined instead.
+    """
+    shape = cls.__blueprint__.shape
+    for field in cls.__blueprint__.graph.refs:
+        position = list(shape).index(field)
+        struct_, initial = shape[field]
+        tag = getattr(struct_, '__tag__', None)
+        if isinstance(tag, This):
+            _check_ref(cls, position, tag)
+            if initial is not None:
+                raise TypeError('union fields can not have a default')
+        length = getattr(struct_, '__length__', None)
+        if isinstance(length, This):
+            _check_ref(cls, position, length)
+
+
+class PendingCodec:
+    """PendingCodec stands for the codec of a class until it is first used
+
+    Compiling the codec is most of the cost of defining a class, so it is
+    deferred until a function of the codec is looked up, which finalizes
+    the class (see `Meta.finalize`) and replaces this placeholder.
+    """
+    __slots__ = ('cls',)
+
+    def __init__(self, cls):
+        self.cls = cls
+
+    def __getattr__(self, name):
+        return getattr(self.cls.finalize(), name)
+
+
+class Codec:
+    """Codec holds the compiled functions of a structure class
+
+    The Codec is compiled by the Meta metaclass for every structure class,
+    when the class is first used.
+
+    The values of an instance are stored in a flat list in `__instance__`,
+    one item per field, followed by the value of the instance itself when
+    the class is a data source (a class that defines a struct format string
+    in `fmt`). Fields of data sources that do not contain other structures
+    are stored as the plain value packed by their format, and other fields
+    are stored as instances.
+
+    The blueprint of the class is flattened down to its data sources, and
+    every run of adjacent data sources that share a byte order is packed and
+    unpacked by a single precompiled `struct.Struct`. Native ('@') formats
+    are never merged since merging them would introduce alignment padding.
+    A group of adjacent bit fields is a single big endian word in its run,
+    from which every field is extracted with the shift and mask precomputed
+    in the layout.
+    Fields of dynamic size are delegated to their own `pack_into` and
+    `unpack_from`. The instance of a union field is unpacked by the function
+    its tag selects in the dispatch table of the union.
+
+    Note that the compiled `unpack_from` creates the instances without
+    calling `__init__`.
+
+    A codec compiled with a profile records every field on its own. Runs
+    are not merged, and every step is timed and reported to
+    `profile.record` with the path of its field (see `profiling`).
+    """
+    def __init__(self, cls, profile=None):
+        self.cls = cls
+        self.profile = profile
+        self._nodes = []
+        self._paths = []
+        self._steps = []
+        self._namespace = {'_new': object.__new__, '_from_bytes': int.from_bytes}
+        if profile is not None:
+            self._namespace.update(_clock=perf_counter, _record=profile.record)
+        self._flatten(cls, None, None)
+
+        self.source = '\n'.join(
+            self._init_source() + [''] +
+            self._calcsize_source() + [''] +
+            self._pack_source() + [''] +
+            self._unpack_source()
+        )
+        exec(
+            compile(self.source, f'<codec {cls.__qualname__}>', 'exec'),
+            self._namespace
+        )
+        self.init = self._namespace['init']
+        self.calcsize = self._namespace['calcsize']
+        self.pack_into = self._namespace['pack_into']
+        self.unpack_from = self._namespace['unpack_from']
+
+    def _flatten(self, cls, parent, position):
+        """Add the nodes and the steps of a fixed size instance of cls
+
+        Every node is an instance within the flattened structure, given as
+        (index, class, number of values, parent index, position in parent).
+        """
+        index = len(self._nodes)
+        shape = cls.__blueprint__.shape
+        bits = cls.__blueprint__.layout.bits
+        fmt = source_fmt(cls)
+        own = fmt is not None or value_bits(cls) is not None
+        self._nodes.append(
+            (index, cls, len(shape) + own, parent, position)
+        )
+        self._paths.append(
+            cls.__name__ if parent is None else
+            f'{self._paths[parent]}.'
+            f'{list(self._nodes[parent][1].__blueprint__.shape)[position]}'
+        )
+        self._namespace[f'_c{index}'] = cls
+
+        for position, (field, (struct_, _)) in enumerate(shape.items()):
+            blueprint = getattr(struct_, '__blueprint__', None)
+            if value_fmt(struct_) is not None:
+                self._add_source(index, position, value_fmt(struct_))
+            elif value_bits(struct_) is not None:
+                self._add_bits(index, position, bits[field])
+            elif (blueprint is not None and blueprint.layout.fixed
+                    and struct_.__codec__ is not None):
+                self._flatten(struct_, index, position)
+            else:
+                name = f'_f{len(self._steps)}'
+                self._namespace[name] = struct_
+                length = getattr(struct_, '__length__', None)
+                tag = getattr(struct_, '__tag__', None)
+                # The references were verified when the class was defined
+                if isinstance(tag, This):
+                    self._steps.append(('union', index, position, name, tag))
+                    continue
+                if not isinstance(length, This):
+                    length = None
+                self._steps.append(('call', index, position, name, length))
+
+        if fmt is not None:
+            self._add_source(index, len(shape), fmt)
+        elif value_bits(cls) is not None:
+            self._add_bits(index, len(shape), bits[None])
+
+    def _ref_source(self, index, ref, values=None):
+        """Return the source of the value of ref within the node index
+
+        The value is read from the instances (when packing) or from the
+        values unpacked so far (when unpacking).
+        """
+        cls = self._nodes[index][1]
+        source = None
+        for key in ref._path:
+            position = list(cls.__blueprint__.shape.keys()).index(key)
+            cls = cls.__blueprint__.shape[key][0]
+            if source is not None:
+                source = f'{source}.__instance__[{position}]'
+            elif values is None:
+                source = f'd{index}[{position}]'
+            elif (index, position) in values:
+                source = values[index, position]
+            else:
+                index = next(
+                    node[0] for node in self._nodes
+                    if node[3] == index and node[4] == position
+                )
+        return source
+
+    def _add_source(self, index, position, fmt, members=None):
+        """Add a value to the runs, as (index, position, code, members)
+
+        The members of a word are the (position, shift, mask) of its bit
+        fields, and are None for other values.
+        """
+        order, code = split_fmt(fmt)
+        entry = (index, position, code, members)
+        if (self._steps and self._steps[-1][0] == 'run' and order != '@'
+                and self._steps[-1][1] == order and self.profile is None):
+            self._steps[-1][2].append(entry)
+        else:
+            self._steps.append(('run', order, [entry]))
+
+    def _add_bits(self, index, position, field):
+        """Add a bit field to the word of its group"""
+        if field.first:
+            self._add_source(index, position, '>' + word_code(field.size), [])
+        self._steps[-1][2][-1][3].append((position, field.shift, field.mask))
+
+    def _path(self, index, position):
+        """Return the path of a field, or of a data source's own value"""
+        fields = list(self._nodes[index][1].__blueprint__.shape)
+        if position == len(fields):
+            return f'{self._paths[index]}.value'
+        return f'{self._paths[index]}.{fields[position]}'
+
+    def _timed(self, operation, lines, path, size):
+        """Wrap the lines of a step with the profiling of its field"""
+        if self.profile is None:
+            return lines
+        start = ['    _t = _clock()']
+        if size == 'offset - _o':
+            # The size of a call is the distance it moved the offset
+            start.append('    _o = offset')
+        return start + lines + [
+            f'    _record({operation!r}, {path!r}, _clock() - _t, {size})'
+        ]
+
+    def _runs(self):
+        """Yield the steps along with the precompiled struct of every run"""
+        for i, step in enumerate(self._steps):
+            if step[0] == 'run':
+                name = f'_s{i}'
+                if name not in self._namespace:
+                    self._namespace[name] = struct.Struct(
+                        step[1] + ''.join(code for _, _, code, _ in step[2])
+                    )
+                yield i, step, name, self._namespace[name].size
+            else:
+                yield i, step, None, None
+
+    def _fetch_source(self):
+        lines = ['    d0 = o0.__instance__']
+        for index, _, _, parent, position in self._nodes[1:]:
+            lines.append(f'    d{index} = d{parent}[{position}].__instance__')
+        return lines
+
+    def _init_source(self):
+        values = []
+        for position, (struct_, initial) in enumerate(
+                self.cls.__blueprint__.shape.values()):
+            name = f'_i{position}'
+            if value_fmt(struct_) is not None:
+                values.append(name)
+                self._namespace[name] = (
+                    default_value(value_fmt(struct_)) if initial is None
+                    else struct_.encode(initial)
+                )
+            elif value_bits(struct_) is not None:
+                values.append(name)
+                self._namespace[name] = (
+                    0 if initial is None else struct_.encode(initial)
+                )
+            elif isinstance(getattr(struct_, '__tag__', None), This):
+                # A union starts as the variant of the initial value of its
+                # tag, or as its first variant with the tag set to match
+                values.append(f'{name}()')
+                path = struct_.__tag__._path
+                tag = f'_i{list(self.cls.__blueprint__.shape).index(path[0])}'
+                variant = struct_.__choices__[0]
+                if len(path) == 1 and struct_.select(
+                        self._namespace.get(tag)) is not None:
+                    variant = struct_.select(self._namespace[tag])
+                elif (len(path) == 1 and variant in struct_.__tags__
+                        and self.cls.__blueprint__.shape[path[0]][1] is None):
+                    self._namespace[tag] = struct_.__tags__[variant]
+                self._namespace[name] = variant
+            elif initial is not None:
+                values.append(f'{name}()')
+                self._namespace[name] = initializer(struct_, initial)
+            else:
+                values.append(f'{name}()')
+                self._namespace[name] = struct_
+        if source_fmt(self.cls) is not None:
+            values.append('_i')
+            self._namespace['_i'] = default_value(source_fmt(self.cls))
+        elif value_bits(self.cls) is not None:
+            values.append('0')
+        return [
+            'def init(o0):',
+            f'    o0.__instance__ = [{", ".join(values)}]',
+        ]
+
+    def _calcsize_source(self):
+        lines = ['def calcsize(o0):']
+        size = 0
+        calls = []
+        for _, step, _, run_size in self._runs():
+            if step[0] == 'run':
+                size += run_size
+            elif step[0] == 'call' and step[4] is not None:
+                _, index, position, name, ref = step
+                calls.append((
+                    f'{name}.size_of({self._ref_source(index, ref)})',
+                    self._path(index, position),
+                ))
+            else:
+                _, index, position, _, _ = step
+                calls.append((
+                    f'd{index}[{position}].calcsize()',
+                    self._path(index, position),
+                ))
+        if calls:
+            lines += self._fetch_source()
+        if self.profile is None:
+            sizes = [str(size)] + [call for call, _ in calls]
+            lines.append(f'    return {" + ".join(sizes)}')
+            return lines
+        # The size of every field of dynamic size is recorded on its own
+        lines.append(f'    size = {size}')
+        for call, path in calls:
+            lines += self._timed('calcsize', [
+                f'    _n = {call}',
+            ], path, '_n')
+            lines.append('    size += _n')
+        lines.append('    return size')
+        return lines
+
+    def _pack_source(self):
+        lines = ['def pack_into(o0, buffer, offset):']
+        lines += self._fetch_source()
+        flat = [f'd0[{i}]' for i in range(self._nodes[0][2])]
+        for _, step, name, size in self._runs():
+            if step[0] == 'run':
+                values = [
+                    f'd{index}[{position}]' if members is None
+                    else self._word_source(index, code, members)
+                    for index, position, code, members in step[2]
+                ]
+                if values == flat:
+                    values = ['*d0']
+                lines += self._timed('pack', [
+                    f'    {name}.pack_into(buffer, offset, {", ".join(values)})',
+                    f'    offset += {size}',
+                ], self._path(*step[2][0][:2]), size)
+            elif step[0] == 'union':
+                _, index, position, name, tag = step
+                value = f'd{index}[{position}]'
+                tag = self._ref_source(index, tag)
+                lines += self._timed('pack', [
+                    f'    if {name}.select({tag}) is not {value}.__class__:',
+                    f'        {name}.mismatch({tag}, {value})',
+                    f'    offset = {value}.pack_into(buffer, offset)',
+                ], self._path(index, position), 'offset - _o')
+            else:
+                _, index, position, _, ref = step
+                args = 'buffer, offset'
+                if ref is not None:
+                    args += f', {self._ref_source(index, ref)}'
+                lines += self._timed('pack', [
+                    f'    offset = d{index}[{position}].pack_into({args})',
+                ], self._path(index, position), 'offset - _o')
+        lines.append('    return offset')
+        return lines
+
+    @staticmethod
+    def _word_source(index, code, members):
+        """Return the source of the word packing the bit fields of members"""
+        word = ' | '.join(
+            f'd{index}[{position}] << {shift}' if shift else f'd{index}[{position}]'
+            for position, shift, _ in members
+        )
+        if code.endswith('s'):
+            return f"({word}).to_bytes({code[:-1]}, 'big')"
+        return word
+
+    def _unpack_source(self):
+        lines = ['def unpack_from(buffer, offset):']
+        values = {}
+        for i, step, name, size in self._runs():
+            if step[0] == 'run':
+                lines += self._timed('unpack', [
+                    f'    v{i} = {name}.unpack_from(buffer, offset)',
+                    f'    offset += {size}',
+                ], self._path(*step[2][0][:2]), size)
+                for j, (index, position, code, members) in enumerate(step[2]):
+                    if members is None:
+                        values[index, position] = f'v{i}[{j}]'
+                        continue
+                    word = f'v{i}[{j}]'
+                    if code.endswith('s'):
+                        word = f'w{i}_{j}'
+                        lines.append(f"    {word} = _from_bytes(v{i}[{j}], 'big')")
+                    for member, shift, mask in members:
+                        values[index, member] = f'{word} >> {shift} & {mask}'
+            elif step[0] == 'union':
+                _, index, position, name, tag = step
+                self._namespace[f'_t{i}'] = self._namespace[name].__dispatch__
+                self._namespace[f'_x{i}'] = self._namespace[name].__fallback__
+                tag = self._ref_source(index, tag, values)
+                lines += self._timed('unpack', [
+                    f'    v{i}, offset = _t{i}.get({tag}, _x{i})(buffer, offset)',
+                ], self._path(index, position), 'offset - _o')
+                values[index, position] = f'v{i}'
+            else:
+                _, index, position, name, ref = step
+                args = 'buffer, offset'
+                if ref is not None:
+                    args += f', {self._ref_source(index, ref, values)}'
+                lines += self._timed('unpack', [
+                    f'    v{i}, offset = {name}.unpack_from({args})',
+                ], self._path(index, position), 'offset - _o')
+                values[index, position] = f'v{i}'
+
+        for index, _, _, parent, position in self._nodes[1:]:
+            values[parent, position] = f'o{index}'
+
+        # Build the instances bottom up so that every list is created whole
+        for index, _, count, _, _ in reversed(self._nodes):
+            items = [values[index, position] for position in range(count)]
+            if (len(self._steps) == 1 and self._steps[0][0] == 'run'
+                    and items == [f'v0[{j}]' for j in range(len(self._steps[0][2]))]):
+                items = 'list(v0)'
+            else:
+                items = f'[{", ".join(items)}]'
+            lines.append(f'    o{index} = _new(_c{index})')
+            lines.append(f'    o{index}.__instance__ = {items}')
+        lines.append('    return o0, offset')
+        return lines
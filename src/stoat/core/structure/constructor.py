@@ -1,12 +1,18 @@
 from collections import OrderedDict
 
-from .ref import This
+from ..utils import default, params
+from .ref import Param, This
 
 
 class Constructor:
     def __init__(self, name):
-        self.special = {'this': This()}
-        self.fields = OrderedDict({'__name__': name})
+        self.special = {
+            'this': This(),
+            'param': Param(),
+            'params': params,
+            'default': default,
+        }
+        self.fields = OrderedDict()
 
     def __getitem__(self, item):
         if item in self.special:
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from operator import attrgetter
+
+from .ref import This
+
+
+class Graph:
+    """Graph is the dependency graph of the fields of a structure class
+
+    The graph is computed once by the Meta metaclass when the class is
+    defined. A field depends on another field when its class is a reference
+    to that field (`b: this.a`), or when it is an array whose length refers
+    to that field (`data: Char[this.size]`), or when it is a union whose tag
+    is that field (`body: Union.of(this.kind, {...})`).
+
+    The graph holds the fields in topological order, in which the classes
+    referred to by fields are resolved, and a precompiled getter for the
+    reference of every field, so that the length of an array is found with
+    a single lookup instead of walking its path. References to missing
+    fields and loops of references raise TypeError.
+    """
+    def __init__(self, name, shape):
+        self.name = name
+        self.refs = OrderedDict()
+        self.edges = OrderedDict()
+        for field, (struct_, _) in shape.items():
+            ref = struct_ if isinstance(struct_, This) \
+                else getattr(struct_, '__length__', None) \
+                or getattr(struct_, '__tag__', None)
+            if not isinstance(ref, This):
+                self.edges[field] = ()
+                continue
+            if not ref._path:
+                raise TypeError(f'{name}.{field} can not refer to this')
+            if ref._path[0] not in shape:
+                raise TypeError(f'{name} has no field {ref._path[0]!r} ({ref!r})')
+            self.refs[field] = ref
+            self.edges[field] = (ref._path[0],)
+        # Without references the fields are already in topological order
+        self.order = self._sort() if self.refs else list(self.edges)
+        self.getters = {
+            field: attrgetter('.'.join(ref._path))
+            for field, ref in self.refs.items()
+        }
+
+    def _sort(self):
+        """Return the fields in topological order, dependencies first"""
+        order = []
+        done = set()
+        for field in self.edges:
+            if field in done:
+                continue
+            path = [field]
+            pending = [iter(self.edges[field])]
+            while pending:
+                dependency = next(pending[-1], None)
+                if dependency is None:
+                    pending.pop()
+                    done.add(path[-1])
+                    order.append(path.pop())
+                elif dependency in path:
+                    loop = path[path.index(dependency):] + [dependency]
+                    raise TypeError(
+                        f'the fields of {self.name} refer to each other in a'
+                        f' loop: {" -> ".join(loop)}'
+                    )
+                elif dependency not in done:
+                    path.append(dependency)
+                    pending.append(iter(self.edges[dependency]))
+        return order
+
+    def resolve(self, field, shape):
+        """Return the class referred to by a field whose class is a reference
+
+        The fields it refers to must have been resolved, which holds when the
+        fields are resolved in topological order.
+        """
+        ref = self.refs[field]
+        struct_ = shape[ref._path[0]][0]
+        for key in ref._path[1:]:
+            blueprint = getattr(struct_, '__blueprint__', None)
+            if blueprint is None or key not in blueprint.shape:
+                raise TypeError(
+                    f'{self.name}.{field} refers to a missing field ({ref!r})'
+                )
+            struct_ = blueprint.shape[key][0]
+        return struct_
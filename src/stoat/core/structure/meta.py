@@ -1,17 +1,88 @@
 from abc import ABCMeta
 from collections import OrderedDict, namedtuple
+import copyreg
+import struct
+import sys
 
+from ..utils import Default, field_options
 from .constructor import Constructor
 from .accessor import Accessor
-from .ref import This
+from .codec import Codec, PendingCodec, check_refs, source_fmt, value_bits
+from .graph import Graph
+from . import profiling
+from .ref import Param, This
+from .registry import Registry
 
-Blueprint = namedtuple(
-    'Blueprint',
+# The static layout of a structure class. Offsets are relative to the start
+# of the structure and are None for the fields that follow a field of
+# dynamic size. Adjacent bit fields are packed together into a group of
+# bytes and share its offset; bits holds the BitField of every bit field,
+# and of the value of the structure itself (key None) for a bit field class.
+Layout = namedtuple(
+    'Layout',
     [
-        'shape',
+        'fixed',
+        'size',
+        'offsets',
+        'bits',
     ]
 )
 
+# The bits of a field within its group, read from the group as a big endian
+# word by `(word >> shift) & mask`. The group spans size bytes and starts at
+# the first field of the group.
+BitField = namedtuple(
+    'BitField',
+    [
+        'first',
+        'last',
+        'size',
+        'shift',
+        'mask',
+    ]
+)
+
+
+class Blueprint:
+    """Blueprint is the definition of a structure class
+
+    The shape holds the fields as field -> [class, default]. The params of a
+    field are kept as (class of the field before it was configured, params)
+    so that variants of the structure can reconfigure it. The graph holds
+    the dependencies between the fields. The layout of the class is
+    computed on first access.
+    """
+    def __init__(self, shape, params, graph, cls=None):
+        self.shape = shape
+        self.params = params
+        self.graph = graph
+        self.cls = cls
+
+    def __getattr__(self, name):
+        if name != 'layout' or self.cls is None:
+            raise AttributeError(name)
+        self.layout = self.cls._layout()
+        return self.layout
+
+
+def _add_group(bits, group, offset):
+    """Add the BitField of every (key, skip, bits) of a group to bits
+
+    Return the offset following the group, and empty the group.
+    """
+    if not group:
+        return offset
+    size = (sum(skip + width for _, skip, width in group) + 7) // 8
+    shift = size * 8
+    for i, (key, skip, width) in enumerate(group):
+        shift -= skip + width
+        bits[key] = BitField(
+            first=i == 0, last=i == len(group) - 1, size=size, shift=shift,
+            mask=(1 << width) - 1,
+        )
+    group.clear()
+    return None if offset is None else offset + size
+
 
 class Meta(ABCMeta):
     @classmethod
@@ -20,62 +91,197 @@ class Meta(ABCMeta):
 
     def __new__(mcs, name, bases, constructor):
         shape = OrderedDict()
+        field_params = OrderedDict()
         dictionary = constructor.fields
         annotations = dictionary.pop('__annotations__', {})
 
+        # The fields of the bases come first, and keep their position when
+        # the class annotates them again
+        for base in bases:
+            blueprint = getattr(base, '__blueprint__', None)
+            if blueprint is None:
+                continue
+            for field, (struct_, initial) in blueprint.shape.items():
+                if field not in shape:
+                    shape[field] = [struct_, initial]
+                    if field in blueprint.params:
+                        field_params[field] = blueprint.params[field]
+
         for field, struct in annotations.items():
             if isinstance(struct, (Meta, This)):
                 shape[field] = [struct, None]
 
-        ref_fields = []
-        for field in shape.keys():
-            if isinstance(shape[field], This):
-                ref_fields.append(field)
-            shape[field][1] = dictionary.get(field, None)
+        configuration = dictionary.pop('__configuration__', {})
+        parameters = set(dictionary.get('__parameters__', ()))
+        for base in bases:
+            parameters.update(getattr(base, '__parameters__', ()))
+
+        graph = Graph(name, shape)
+        for field in graph.order:
+            if field not in annotations:
+                continue
+            field_params.pop(field, None)
+            options, shape[field][1] = field_options(dictionary.get(field))
             annotations.pop(field)
+            if field in graph.refs and isinstance(shape[field][0], This):
+                shape[field][0] = graph.resolve(field, shape)
+                if options:
+                    field_params[field] = (graph.refs[field], options)
+            elif options:
+                field_params[field] = (shape[field][0], options)
+            if options:
+                parameters.update(mcs._parameters_of(options))
+                shape[field][0] = mcs._configure_field(
+                    shape[field][0], options, configuration
+                )
 
-        for field in ref_fields:
-            shape[field] = mcs.query_ref(shape, field)
+        # Set the fields of the structure to properties
+        trusted = dictionary.setdefault('__trusted__', any(
+            getattr(base, '__trusted__', False) for base in bases
+        ))
+        for index, field in enumerate(shape.keys()):
+            dictionary[field] = Accessor(
+                shape[field][0], index, graph.getters.get(field), trusted
+            )
 
-        # TODO: Construct the dependency graph of the structure
+        dictionary.setdefault('__slots__', ())
 
-        # TODO: Some relatively complicated logic to verify that there are no loops in the structure
+        dictionary['__annotations__'] = annotations
+        dictionary['__parameters__'] = frozenset(parameters)
+        dictionary['__blueprint__'] = blueprint = Blueprint(
+            shape=shape, params=field_params, graph=graph
+        )
+        cls = super().__new__(mcs, name, bases, dictionary)
+        blueprint.cls = cls
+        check_refs(cls)
+        cls.__codec__ = cls._compile()
+        Registry().register(cls)
+        if profiling.current is not None:
+            profiling.instrument(cls, profiling.current)
+        return cls
 
-        # Set the fields of the structure to properties
-        for field, struct in shape.items():
-            dictionary[field] = Accessor(shape[field][0], field)
+    def __call__(cls, **configuration):
+        if configuration:
+            cls = cls.configure(**configuration)
+        return super().__call__()
 
-        dictionary['__annotations__'] = annotations
-        dictionary['__blueprint__'] = Blueprint(shape=shape)
-        return super().__new__(mcs, name, bases, dictionary)
+    @staticmethod
+    def _parameters_of(options):
+        """Return the names of the parameters referred to by params"""
+        names = set()
+        for value in options.values():
+            if isinstance(value, Param):
+                if len(value._path) != 1:
+                    raise TypeError(f'{value!r} must name a single parameter')
+                names.add(value._path[0])
+        return names
 
-    @classmethod
-    def query_ref(mcs, shape, field, prev=None):
-        ref = shape[field]
-        if not isinstance(ref, This):
-            return ref
-        if not ref._path:
-            raise Exception('Self reference.')
-        item = shape[ref._path[0]][0]
-        if item in prev:
-            raise Exception('Loop!')
-        else:
-            item = mcs.query_ref(shape, item, prev + [ref])
-            shape[ref._path[0]][0] = item
-        return item._query_ref(ref.__class__(ref._path[1:]))
-
-    def _query_ref(cls, ref, prev=None):
-        if not ref._path:
-            return cls
-        item = cls.__blueprint__.shape[ref._path[0]][0]
-        if isinstance(item, This):
-            prev = prev if prev else []
-            if item in prev:
-                raise Exception('Loop!')
+    @staticmethod
+    def _configure_field(struct_, options, configuration):
+        """Configure the class of a field with its params
+
+        Params that refer to a parameter of the structure take the value of
+        the parameter, and are left out while it is not configured.
+        """
+        resolved = {}
+        for key, value in options.items():
+            if not isinstance(value, Param):
+                resolved[key] = value
+            elif value._path[0] in configuration:
+                resolved[key] = configuration[value._path[0]]
+        if not resolved:
+            return struct_
+        if isinstance(struct_, This):
+            raise TypeError(f'the reference {struct_!r} can not be configured')
+        # Field params may hold metadata the class does not use as parameters
+        return Registry().configure(struct_, resolved)
+
+    def configure(cls, **configuration):
+        """Return the variant of the class for a configuration
+
+        Variants are cached by the registry, so an identical configuration
+        returns the same class. Parameters other than the ones of the class
+        and `trusted` raise TypeError.
+        """
+        unknown = set(configuration) - cls.__parameters__ - {'trusted'}
+        if unknown:
+            raise TypeError(
+                f'{cls.__name__} got unexpected parameters'
+                f' {", ".join(sorted(unknown))}'
+            )
+        return Registry().configure(cls, configuration)
+
+    def _configure(cls, configuration):
+        """Define the variant of the class for a configuration
+
+        Parameters the class does not use (the metadata of field params)
+        are kept in its configuration, except for `trusted`, which defines a
+        trusted variant whose setters store assigned values unchecked (see
+        `Accessor`).
+        """
+        annotations = OrderedDict()
+        fields = cls._configuration(configuration)
+        for field, (struct_, initial) in cls.__blueprint__.shape.items():
+            options = ()
+            if field in cls.__blueprint__.params:
+                struct_, params = cls.__blueprint__.params[field]
+                options += (params,)
+            if initial is not None:
+                options += (Default(initial),)
+            annotations[field] = struct_
+            fields[field] = options
+        if 'trusted' in configuration:
+            fields['__trusted__'] = bool(configuration['trusted'])
+        fields['__configuration__'] = configuration
+        return type(cls).dynamic(cls.__name__, (cls,), fields, annotations)
+
+    def _layout(cls):
+        offset = 0
+        offsets = OrderedDict()
+        bits = OrderedDict()
+        group = []
+        for field, (struct_, _) in cls.__blueprint__.shape.items():
+            if value_bits(struct_) is not None:
+                offsets[field] = offset
+                group.append((field,) + value_bits(struct_))
+                continue
+            offset = _add_group(bits, group, offset)
+            offsets[field] = offset
+            if (offset is None or not isinstance(struct_, Meta)
+                    or not struct_.__blueprint__.layout.fixed):
+                offset = None
             else:
-                item = cls._query_ref(item, prev + [ref])
-                cls.__blueprint__.shape[ref._path[0]][0] = item
-        return item._query_ref(ref.__class__(ref._path[1:]))
+                offset += struct_.__blueprint__.layout.size
+
+        if value_bits(cls) is not None:
+            group.append((None,) + value_bits(cls))
+        offset = _add_group(bits, group, offset)
+
+        fmt = source_fmt(cls)
+        if offset is not None and fmt is not None:
+            offset += struct.calcsize(fmt)
+        return Layout(
+            fixed=offset is not None, size=offset, offsets=offsets, bits=bits
+        )
+
+    def _compile(cls):
+        # The codec is compiled when the class is first used
+        return PendingCodec(cls)
+
+    def finalize(cls):
+        """Compile the codec of the class if it was not compiled yet
+
+        Classes are finalized on first use, so that defining many classes
+        only compiles the codecs of the classes that are used. Return the
+        codec.
+        """
+        codec = vars(cls).get('__codec__')
+        if isinstance(codec, PendingCodec):
+            codec = cls.__codec__ = Codec(cls)
+        return codec
+
+    def __getitem__(cls, size):
+        return cls.array(size)
 
     def array(cls, size):
         raise NotImplementedError(
@@ -83,7 +289,23 @@ class Meta(ABCMeta):
 
     @classmethod
     def dynamic(mcs, name, bases, dictionary, fields):
+        dictionary.setdefault('__module__', sys._getframe(1).f_globals['__name__'])
         constructor = mcs.__prepare__(name, bases)
         constructor.fields = dictionary
         constructor.fields['__annotations__'] = fields
         return mcs.__new__(mcs, name, bases, constructor)
+
+
+def configured(origin, configuration):
+    """Return the variant of a class for a configuration"""
+    return Registry().configure(origin, configuration)
+
+
+def _reduce_class(cls):
+    # Variants are pickled as their original class and configuration
+    if cls.__origin__ is not cls:
+        return configured, (cls.__origin__, cls.__configuration__)
+    return cls.__qualname__
+
+
+copyreg.pickle(Meta, _reduce_class)
@@ -0,0 +1,111 @@
+from collections import deque
+import mmap
+import os
+
+from .view import record_ends
+
+
+# The number of bytes of records decoded by a worker at once
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def unpack_file(cls, path, workers=None, ordered=True,
+                chunk_size=DEFAULT_CHUNK_SIZE):
+    """Unpack the structures of cls packed one after the other in a file
+
+    The file is split into chunks of whole structures which are decoded by
+    a pool of worker processes. The chunks of a fixed size class are found
+    from its size, while the chunks of a dynamic size class are found by a
+    scan of the file that decodes only the fields that sizes refer to. The
+    chunks are handed to the workers as the scan goes, and at most two
+    chunks per worker are pending at once.
+
+    The structures are yielded in the order of the file, or in the order in
+    which the chunks are decoded if ordered is false. Since the structures
+    are sent back from the workers, cls must be importable by the workers.
+    A file that ends within a structure raises EOFError.
+    """
+    workers = workers or os.cpu_count() or 1
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            chunks = iter_chunks(cls, data, chunk_size)
+            if workers == 1:
+                for start, end in chunks:
+                    yield from unpack_range(cls, path, start, end)
+                return
+
+            # Imported here since it is slow to import and rarely needed
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(workers)
+            pending = deque()
+            try:
+                for start, end in chunks:
+                    pending.append(
+                        executor.submit(unpack_range, cls, path, start, end)
+                    )
+                    while len(pending) >= 2 * workers:
+                        yield from _next_done(pending, ordered)
+                while pending:
+                    yield from _next_done(pending, ordered)
+            finally:
+                # Pending chunks are cancelled by hand, since shutdown only
+                # cancels them from Python 3.9 on
+                for future in pending:
+                    future.cancel()
+                executor.shutdown()
+
+
+def _next_done(pending, ordered):
+    """Return the structures of the next chunk and remove it from pending"""
+    if ordered:
+        return pending.popleft().result()
+    from concurrent.futures import FIRST_COMPLETED, wait
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    future = done.pop()
+    pending.remove(future)
+    return future.result()
+
+
+def iter_chunks(cls, buffer, chunk_size):
+    """Yield the (start, end) of chunks of whole structures in buffer"""
+    layout = cls.__blueprint__.layout
+    if layout.fixed:
+        if not layout.size:
+            raise ValueError(f'{cls.__name__} has no size to unpack')
+        if len(buffer) % layout.size:
+            raise EOFError(
+                f'file ended within a {cls.__name__} structure'
+                f' ({len(buffer) % layout.size} bytes left)'
+            )
+        step = max(1, chunk_size // layout.size) * layout.size
+        for start in range(0, len(buffer), step):
+            yield start, min(start + step, len(buffer))
+        return
+
+    start = offset = 0
+    for offset in record_ends(cls, buffer):
+        if offset - start >= chunk_size:
+            yield start, offset
+            start = offset
+    if offset < len(buffer):
+        raise EOFError(
+            f'file ended within a {cls.__name__} structure'
+            f' ({len(buffer) - offset} bytes left)'
+        )
+    if start < offset:
+        yield start, offset
+
+
+def unpack_range(cls, path, start, end):
+    """Return the structures of cls packed in a file from start to end"""
+    with open(path, 'rb') as file:
+        file.seek(start)
+        buffer = file.read(end - start)
+    results = []
+    offset = 0
+    while offset < len(buffer):
+        result, offset = cls.unpack_from(buffer, offset)
+        results.append(result)
+    return results
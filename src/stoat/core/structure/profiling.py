@@ -0,0 +1,166 @@
+"""Opt-in profiling of the pack, unpack and calcsize of structure classes
+
+Profiling a class replaces its codec by one compiled with a profile, which
+records the calls, bytes and time of every field by its path (such as
+`Chat.header.size`) along with the totals of the class (`Chat`). Classes
+that are not profiled run their regular codec and pay nothing.
+
+    profile = profiling.enable(Chat)    # or enable() for every class
+    ...
+    profiling.disable(Chat)
+    print(profile.report())
+
+Fields of dynamic size are recorded as a whole, and the fields within them
+are recorded under their own class when it is profiled as well. The
+calcsize of a class is recorded for every field of dynamic size, whose
+size is computed on its own. The calcsize of a fixed size class, and of
+the fixed fields of any class, is a constant and is not recorded.
+"""
+from contextlib import contextmanager
+from time import perf_counter
+from weakref import WeakKeyDictionary
+
+from .codec import Codec
+from .registry import Registry
+
+
+# The profile of the classes defined while every class is profiled
+current = None
+
+# The regular codecs of the profiled classes
+_originals = WeakKeyDictionary()
+
+
+class Stat:
+    """The totals of an operation on a field"""
+    __slots__ = ('calls', 'bytes', 'seconds')
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return (
+            f'Stat(calls={self.calls}, bytes={self.bytes},'
+            f' seconds={self.seconds:.6f})'
+        )
+
+
+class Profile:
+    """Profile accumulates the operations recorded by profiled codecs
+
+    The totals are kept in `stats` by (operation, path), where the
+    operation is 'pack', 'unpack' or 'calcsize'. When a callback is given,
+    it is also called with (operation, path, seconds, size) for every
+    recorded operation.
+    """
+    def __init__(self, callback=None):
+        self.stats = {}
+        self.callback = callback
+
+    def record(self, operation, path, seconds, size):
+        stat = self.stats.get((operation, path))
+        if stat is None:
+            stat = self.stats[operation, path] = Stat()
+        stat.calls += 1
+        stat.bytes += size
+        stat.seconds += seconds
+        if self.callback is not None:
+            self.callback(operation, path, seconds, size)
+
+    def clear(self):
+        self.stats.clear()
+
+    def report(self, limit=None):
+        """Return a table of the recorded operations, slowest first"""
+        rows = sorted(
+            self.stats.items(), key=lambda item: item[1].seconds, reverse=True
+        )[:limit]
+        width = max([len(path) for (_, path), _ in rows] + [4])
+        lines = [
+            f'{"operation":9}  {"path":{width}}  {"calls":>10}  {"bytes":>12}'
+            f'  {"seconds":>10}  {"us/call":>8}'
+        ]
+        for (operation, path), stat in rows:
+            lines.append(
+                f'{operation:9}  {path:{width}}  {stat.calls:10}'
+                f'  {stat.bytes:12}  {stat.seconds:10.6f}'
+                f'  {stat.seconds / stat.calls * 1e6:8.2f}'
+            )
+        return '\n'.join(lines)
+
+
+def instrument(cls, profile):
+    """Replace the codec of cls by one compiled with profile"""
+    if cls.__codec__ is None:
+        return
+    codec = Codec(cls, profile)
+    name = cls.__name__
+    record = profile.record
+    pack_into, unpack_from, calcsize = (
+        codec.pack_into, codec.unpack_from, codec.calcsize
+    )
+
+    def profiled_pack_into(o, buffer, offset):
+        start = perf_counter()
+        end = pack_into(o, buffer, offset)
+        record('pack', name, perf_counter() - start, end - offset)
+        return end
+
+    def profiled_unpack_from(buffer, offset):
+        start = perf_counter()
+        result, end = unpack_from(buffer, offset)
+        record('unpack', name, perf_counter() - start, end - offset)
+        return result, end
+
+    def profiled_calcsize(o):
+        start = perf_counter()
+        size = calcsize(o)
+        record('calcsize', name, perf_counter() - start, size)
+        return size
+
+    codec.pack_into = profiled_pack_into
+    codec.unpack_from = profiled_unpack_from
+    codec.calcsize = profiled_calcsize
+    if cls not in _originals:
+        _originals[cls] = cls.__codec__
+    cls.__codec__ = codec
+
+
+def enable(*classes, profile=None):
+    """Profile the given classes, or every class when none are given
+
+    When every class is profiled, classes defined later are profiled as
+    well. Return the profile, a new one unless given.
+    """
+    global current
+    profile = Profile() if profile is None else profile
+    if not classes:
+        current = profile
+        classes = Registry().classes()
+    for cls in classes:
+        instrument(cls, profile)
+    return profile
+
+
+def disable(*classes):
+    """Stop profiling the given classes, or every class when none are given"""
+    global current
+    if not classes:
+        current = None
+        classes = list(_originals.keys())
+    for cls in classes:
+        codec = _originals.pop(cls, None)
+        if codec is not None:
+            cls.__codec__ = codec
+
+
+@contextmanager
+def profiled(*classes, profile=None):
+    """Profile the given classes, or every class, within a with block"""
+    profile = enable(*classes, profile=profile)
+    try:
+        yield profile
+    finally:
+        disable(*classes)
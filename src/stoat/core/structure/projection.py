@@ -0,0 +1,277 @@
+from functools import partial
+import struct
+
+from .codec import truncated
+from .view import structure_end
+
+
+class Projection:
+    """Projection holds the compiled partial unpack functions of a class
+
+    Projections are created by `Structure.unpack(buffer, fields=[...])` and
+    `Structure.unpack_from(buffer, offset, fields=[...])`, and are cached by
+    the class for every list of fields. They return a dict of the requested
+    field paths (such as 'header.id') and their values, as read from the
+    fields of an unpacked instance.
+
+    The projection is compiled from the codec of the class. Only the values
+    that are requested, or that the lengths and tags of the fields before
+    them refer to, are unpacked: every run of fixed values is read by a
+    single `struct.Struct` that skips the other values as padding. Fields
+    of dynamic size are skipped by the lengths they refer to, and paths
+    within them are read by projections of their own. `unpack` stops after
+    the last requested field, while `unpack_from` goes on to the end of the
+    structure, which it returns along with the values.
+    """
+    def __init__(self, cls, fields):
+        self.cls = cls
+        self.fields = tuple(dict.fromkeys(fields))
+        self._codec = cls.finalize()
+        self._namespace = {
+            '_end': structure_end, '_len': len,
+            '_truncated': partial(truncated, 'unpack_from'),
+        }
+        self._locate()
+
+        self._requested = {}
+        self._nested = {}
+        for path in self.fields:
+            location, rest = self._find(path)
+            if rest is None:
+                self._requested.setdefault(location, []).append(path)
+            else:
+                self._nested.setdefault(location[1], []).append((path, rest))
+        last = max(
+            [self._starts.get(location[1], (-1,))[0] if location[0] == 'node'
+             else location[1] for location in self._requested] +
+            list(self._nested),
+            default=-1,
+        )
+        self.source = '\n'.join(
+            self._source('unpack', last) + [''] +
+            self._source('unpack_from', len(self._codec._steps) - 1)
+        )
+        exec(
+            compile(self.source, f'<projection {cls.__qualname__}>', 'exec'),
+            self._namespace
+        )
+        self.unpack = self._namespace['unpack']
+        self.unpack_from = self._namespace['unpack_from']
+
+    @classmethod
+    def of(cls, structure, fields):
+        """Return the projection of a structure class for a list of fields"""
+        if isinstance(fields, str):
+            raise TypeError(f'fields must be a list of paths (got {fields!r})')
+        fields = tuple(fields)
+        projections = vars(structure).get('__projections__')
+        if projections is None:
+            projections = structure.__projections__ = {}
+        projection = projections.get(fields)
+        if projection is None:
+            projection = projections[fields] = cls(structure, fields)
+        return projection
+
+    def _locate(self):
+        """Locate the fields of the flattened class
+
+        Fields are kept by path as ('value', step, entry, member), where the
+        member is the position of a bit field in its word (None otherwise),
+        ('node', index) for the nested structures of fixed size, or
+        ('field', step) for the fields of dynamic size. The values are also
+        kept by (node index, position) to resolve references, and starts
+        holds the (step, entry) of the first value of every node.
+        """
+        codec = self._codec
+        self._paths = {}
+        self._values = {}
+        self._children = {}
+        self._starts = {}
+        prefixes = ['']
+        for index, _, _, parent, position in codec._nodes[1:]:
+            fields = list(codec._nodes[parent][1].__blueprint__.shape)
+            prefixes.append(f'{prefixes[parent]}{fields[position]}.')
+            self._paths[prefixes[-1][:-1]] = ('node', index)
+            self._children[parent, position] = index
+
+        def add(location, index, position, start):
+            fields = list(codec._nodes[index][1].__blueprint__.shape)
+            if position < len(fields):
+                self._paths[prefixes[index] + fields[position]] = location
+            while index is not None and index not in self._starts:
+                self._starts[index] = start
+                index = codec._nodes[index][3]
+
+        for i, step in enumerate(codec._steps):
+            if step[0] != 'run':
+                add(('field', i), step[1], step[2], (i, None))
+                continue
+            for j, (index, position, _, members) in enumerate(step[2]):
+                if members is None:
+                    self._values[index, position] = ('value', i, j, None)
+                    add(self._values[index, position], index, position, (i, j))
+                for k, (member, _, _) in enumerate(members or ()):
+                    self._values[index, member] = ('value', i, j, k)
+                    add(self._values[index, member], index, member, (i, j))
+
+    def _find(self, path):
+        """Return the location of a path, and the path within its field"""
+        if path in self._paths:
+            return self._paths[path], None
+        for key, location in self._paths.items():
+            if location[0] == 'field' and path.startswith(key + '.'):
+                struct_ = self._codec._namespace[
+                    self._codec._steps[location[1]][3]
+                ]
+                if self._codec._steps[location[1]][0] != 'call' or (
+                        struct_.__codec__ is None):
+                    raise TypeError(
+                        f'the field {key!r} of {self.cls.__name__} can only'
+                        f' be unpacked whole (got {path!r})'
+                    )
+                return location, path[len(key) + 1:]
+        raise TypeError(f'{self.cls.__name__} has no field {path!r}')
+
+    def _ref(self, index, ref):
+        """Return the location of the value a length or tag refers to"""
+        fields = list(self._codec._nodes[index][1].__blueprint__.shape)
+        for key in ref._path[:-1]:
+            index = self._children[index, fields.index(key)]
+            fields = list(self._codec._nodes[index][1].__blueprint__.shape)
+        return self._values[index, fields.index(ref._path[-1])]
+
+    def _source(self, name, last):
+        """Return the source of a function unpacking the steps up to last"""
+        codec = self._codec
+        refs = {
+            i: self._ref(step[1], step[4])
+            for i, step in enumerate(codec._steps[:last + 1])
+            if step[0] != 'run' and step[4] is not None
+        }
+        needed = set(refs.values()) | {
+            location for location in self._requested if location[0] == 'value'
+        }
+
+        lines = [f'def {name}(buffer, offset):']
+        values = {}
+        starts = {}
+        base, start = 'offset', 0
+        for i, step in enumerate(codec._steps[:last + 1]):
+            begin = base if not start else f'{base} + {start}'
+            starts[i, None] = begin
+            if step[0] == 'run':
+                for j, (_, _, code, _) in enumerate(step[2]):
+                    starts[i, j] = base if not start else f'{base} + {start}'
+                    start += struct.calcsize(step[1] + code)
+                self._run(lines, values, needed, i, step, starts)
+                continue
+
+            struct_ = codec._namespace[step[3]]
+            argument = None if i not in refs else values[refs[i]]
+            end = None
+            if i in self._nested:
+                projection = Projection.of(
+                    struct_, [rest for _, rest in self._nested[i]]
+                )
+                self._namespace[f'_p{i}'] = projection.unpack_from
+                lines.append(f'    p{i}, e{i} = _p{i}(buffer, {begin})')
+                for path, rest in self._nested[i]:
+                    values[path] = f'p{i}[{rest!r}]'
+                end = f'e{i}'
+            if ('field', i) in self._requested:
+                self._namespace[step[3]] = struct_
+                if argument is not None:
+                    call = f'{step[3]}.unpack_from(buffer, {begin}, {argument})'
+                else:
+                    call = f'{step[3]}.unpack_from(buffer, {begin})'
+                lines.append(f'    f{i}, e{i} = {call}')
+                for path in self._requested['field', i]:
+                    values[path] = f'f{i}'
+                end = f'e{i}'
+            if end is None and (i < last or name == 'unpack_from'):
+                end = f'e{i}'
+                lines.append(f'    {end} = {self._end(step, begin, argument)}')
+            base, start = end, 0
+
+        for location, paths in self._requested.items():
+            if location[0] != 'node':
+                continue
+            index = location[1]
+            self._namespace[f'_c{index}'] = codec._nodes[index][1]
+            # A node without values has no size and is unpacked anywhere
+            begin = starts.get(self._starts.get(index), 'offset')
+            lines.append(
+                f'    n{index} = _c{index}.unpack_from(buffer, {begin})[0]'
+            )
+            for path in paths:
+                values[path] = f'n{index}'
+
+        result = ', '.join(f'{path!r}: {values[path]}' for path in self.fields)
+        if name == 'unpack':
+            return lines + [f'    return {{{result}}}']
+        end = base if not start else f'{base} + {start}'
+        return lines + [
+            f'    if {end} > _len(buffer):',
+            f'        _truncated(buffer, offset, {end})',
+            f'    return {{{result}}}, {end}',
+        ]
+
+    def _run(self, lines, values, needed, i, step, starts):
+        """Add the lines unpacking the needed values of a run
+
+        The values of the run between the needed ones are skipped as
+        padding.
+        """
+        order, entries = step[1], step[2]
+        used = [
+            j for j in range(len(entries))
+            if any(location[1:3] == (i, j) for location in needed)
+        ]
+        if not used:
+            return
+        fmt = order
+        for j in range(used[0], used[-1] + 1):
+            code = entries[j][2]
+            fmt += code if j in used else f'{struct.calcsize(order + code)}x'
+        name = f'_s{i}'
+        self._namespace[name] = struct.Struct(fmt)
+        lines.append(
+            f'    r{i} = {name}.unpack_from(buffer, {starts[i, used[0]]})'
+        )
+
+        for n, j in enumerate(used):
+            index, position, code, members = entries[j]
+            word = f'r{i}[{n}]'
+            if members is not None and code.endswith('s'):
+                word = f'w{i}_{j}'
+                lines.append(f"    {word} = _from_bytes(r{i}[{n}], 'big')")
+                self._namespace['_from_bytes'] = int.from_bytes
+            if members is None:
+                self._value(values, ('value', i, j, None), index, position, word)
+                continue
+            for k, (member, shift, mask) in enumerate(members):
+                value = f'({word} >> {shift} & {mask})' if shift else (
+                    f'({word} & {mask})'
+                )
+                self._value(values, ('value', i, j, k), index, member, value)
+
+    def _value(self, values, location, index, position, value):
+        """Keep the source of a value, decoded when it was requested"""
+        values[location] = value
+        shape = self._codec._nodes[index][1].__blueprint__.shape
+        name = '_d{}_{}_{}'.format(*location[1:])
+        for path in self._requested.get(location, ()):
+            self._namespace[name] = list(shape.values())[position][0].decode
+            values[path] = f'{name}({value})'
+
+    def _end(self, step, begin, argument):
+        """Return the source of the end of a field of dynamic size"""
+        struct_ = self._codec._namespace[step[3]]
+        self._namespace[step[3]] = struct_
+        if step[0] == 'union':
+            return f'_end({step[3]}.variant({argument}), buffer, {begin})'
+        if argument is not None:
+            return f'{begin} + {step[3]}.size_of({argument})'
+        if struct_.__blueprint__.layout.fixed:
+            return f'{begin} + {struct_.__blueprint__.layout.size}'
+        return f'_end({step[3]}, buffer, {begin})'
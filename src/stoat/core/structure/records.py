@@ -0,0 +1,275 @@
+import array
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from .view import record_ends
+
+
+INDEX_MAGIC = b'STOATIDX'
+
+# The number of bytes at the start and at the end of the indexed records
+# that the index is checked against
+FINGERPRINT_SIZE = 4096
+
+# The size of the header of a saved index: the magic and the fingerprint
+INDEX_HEADER_SIZE = len(INDEX_MAGIC) + 8
+
+
+class RecordFileMeta(type):
+    def __getitem__(cls, structure):
+        records = vars(structure).get('__record_file__')
+        if records is None:
+            records = type(cls)(f'RecordFile[{structure.__name__}]', (cls,), {
+                '__structure__': structure,
+            })
+            structure.__record_file__ = records
+        return records
+
+
+class RecordFile(metaclass=RecordFileMeta):
+    """RecordFile gives random access to the structures packed in a file
+
+    RecordFile classes are created by subscripting RecordFile with a
+    structure class, such as `RecordFile[Message]`. The records of a fixed
+    size class are located from its size. The records of a dynamic size
+    class are located through an index of their offsets, built by a single
+    scan of the file that decodes only the fields that sizes refer to.
+
+    The index is saved next to the file (in `path + '.idx'` by default) as
+    a magic header followed by the little endian uint64 offsets of the
+    records and of the end of the last one, and is memory mapped when it is
+    opened again. The header holds a fingerprint of the indexed bytes (the
+    CRC32 of the first and of the last `FINGERPRINT_SIZE` bytes of the
+    records), so that an index of a file that was rewritten since is built
+    anew, as is an index of more bytes than the file holds. Records
+    appended to the file are indexed by `refresh`, which appends their
+    offsets to the index. A record that was not completely written yet is
+    left out until the next refresh.
+    """
+    __structure__ = None
+
+    def __init__(self, path, index_path=None):
+        if self.__structure__ is None:
+            raise TypeError(
+                'a structure class is required, use RecordFile[cls]'
+            )
+        self.path = path
+        self.index_path = index_path or f'{path}.idx'
+        self._file = open(path, 'rb')
+        self._data = b''
+        self._index = None
+        self._offsets = array.array('Q', [0])
+        self._length = 0
+        self.refresh()
+
+    def close(self):
+        self._release_index()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('record index out of range')
+        return self.__structure__.unpack_from(self._data, self.offset(index))[0]
+
+    def __iter__(self):
+        offset = 0
+        for _ in range(self._length):
+            result, offset = self.__structure__.unpack_from(self._data, offset)
+            yield result
+
+    def offset(self, index):
+        """Return the offset of a record in the file"""
+        layout = self.__structure__.__blueprint__.layout
+        if layout.fixed:
+            return index * layout.size
+        return self._offsets[index]
+
+    def refresh(self):
+        """Index the records written to the file since it was last indexed"""
+        size = os.fstat(self._file.fileno()).st_size
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b'' if size == 0 else mmap.mmap(
+            self._file.fileno(), 0, access=mmap.ACCESS_READ
+        )
+
+        layout = self.__structure__.__blueprint__.layout
+        if layout.fixed:
+            if not layout.size:
+                raise ValueError(f'{self.__structure__.__name__} has no size')
+            self._length = size // layout.size
+            return
+
+        if self._index is None:
+            self._map_index()
+            if self._offsets[-1] > size or self._fingerprint != (
+                    _fingerprint(self._data, self._offsets[-1])):
+                self._write_index(array.array('Q', [0]))
+        appended = self._scan(self._offsets[-1], size)
+        if appended:
+            self._append_index(appended)
+        self._length = len(self._offsets) - 1
+
+    def _scan(self, offset, size):
+        """Return the offsets of the ends of the records after offset"""
+        return array.array(
+            'Q', record_ends(self.__structure__, self._data, offset, size)
+        )
+
+    def _map_index(self):
+        """Map the saved index, or start a new one when it is missing"""
+        try:
+            file = open(self.index_path, 'rb')
+        except FileNotFoundError:
+            self._write_index(array.array('Q', [0]))
+            return
+        with file:
+            if file.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                raise ValueError(f'{self.index_path} is not a record index')
+            self._fingerprint = file.read(INDEX_HEADER_SIZE - len(INDEX_MAGIC))
+            if sys.byteorder != 'little':
+                self._offsets = array.array('Q', file.read())
+                self._offsets.byteswap()
+                return
+            self._index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        # An offset that was not completely written is left out
+        end = len(self._index) - (len(self._index) - INDEX_HEADER_SIZE) % 8
+        self._offsets = memoryview(self._index)[INDEX_HEADER_SIZE:end].cast('Q')
+
+    def _release_index(self):
+        if self._index is not None:
+            self._offsets.release()
+            self._offsets = array.array('Q', [0])
+            self._index.close()
+            self._index = None
+
+    def _write_index(self, offsets):
+        self._release_index()
+        self._fingerprint = _fingerprint(self._data, offsets[-1])
+        temporary = f'{self.index_path}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(INDEX_MAGIC)
+            file.write(self._fingerprint)
+            file.write(_little_endian(offsets))
+        os.replace(temporary, self.index_path)
+        self._offsets = offsets
+
+    def _append_index(self, ends):
+        with open(self.index_path, 'r+b') as file:
+            file.seek(0, os.SEEK_END)
+            file.write(_little_endian(ends))
+            # The fingerprint is updated last, so an interrupted update
+            # leaves an index that is built anew
+            file.seek(len(INDEX_MAGIC))
+            file.write(_fingerprint(self._data, ends[-1]))
+        self._release_index()
+        self._map_index()
+
+
+def _fingerprint(data, end):
+    """Return the fingerprint of the records indexed up to end"""
+    return struct.pack(
+        '<II', zlib.crc32(data[:min(end, FINGERPRINT_SIZE)]),
+        zlib.crc32(data[max(0, end - FINGERPRINT_SIZE):end]),
+    )
+
+
+def _little_endian(offsets):
+    if sys.byteorder != 'little':
+        offsets = array.array('Q', offsets)
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+class MappedRecords:
+    """MappedRecords maps a file of fixed size structures into memory
+
+    Records are accessed as views over the mapped file, so reading a field
+    decodes only that field and, when the file is opened with mode 'r+',
+    assigning a field packs it directly into the mapped pages, such as
+    `records[i].counter += 1`. Assigning a whole record packs it in place.
+    Changes are written to the file by the operating system, or explicitly
+    by `flush`.
+    """
+    MODES = {'r': mmap.ACCESS_READ, 'r+': mmap.ACCESS_WRITE}
+
+    def __init__(self, path, cls, mode='r+'):
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be 'r' or 'r+' (got {mode!r})")
+        layout = cls.__blueprint__.layout
+        if not layout.fixed or not layout.size:
+            raise TypeError(
+                f'{cls.__name__} must have a fixed size to be mapped'
+            )
+        self.path = path
+        self.structure = cls
+        self._size = layout.size
+        with open(path, 'rb' if mode == 'r' else 'r+b') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size % layout.size:
+                raise ValueError(
+                    f'the size of {path} ({size}) is not a multiple of the'
+                    f' size of {cls.__name__} ({layout.size})'
+                )
+            self._data = b'' if size == 0 else mmap.mmap(
+                file.fileno(), 0, access=self.MODES[mode]
+            )
+        self._length = size // layout.size
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def flush(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._length
+
+    def _offset(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('record index out of range')
+        return index * self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        return self.structure.view(self._data, self._offset(index))
+
+    def __setitem__(self, index, record):
+        if not isinstance(record, self.structure):
+            raise TypeError(
+                f'a {self.structure.__name__} type is required (got type'
+                f' {type(record).__name__})'
+            )
+        record.pack_into(self._data, self._offset(index))
+
+    def __iter__(self):
+        return (self[i] for i in range(self._length))
@@ -1,2 +1,3 @@
 from .ref import Ref
-from .this import This
\ No newline at end of file
+from .this import This
+from .param import Param
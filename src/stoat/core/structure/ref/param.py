@@ -0,0 +1,6 @@
+from .ref import Ref
+
+
+class Param(Ref):
+    def __repr__(self):
+        return f'Param({", ".join(self._path)})'
@@ -1,14 +1,11 @@
-import re
-
-
-item_pattern = re.compile('[_a-zA-Z][_a-zA-Z0-9]*')
-
-
 class Ref:
     def __init__(self, initial_path=None):
         self._path = initial_path if initial_path else []
 
     def __getattr__(self, item):
+        if item.startswith('__') and item.endswith('__'):
+            # Special attributes are looked up by protocols such as abc
+            raise AttributeError(item)
         if item.startswith('_'):
             raise Exception('Access to private members is only allowed through the _private accessor.')
         return self.getattr(item)
@@ -17,8 +14,8 @@ class Ref:
         return self.getattr('_' + item)
 
     def getattr(self, item):
-        assert item_pattern.fullmatch(item), 'An item must be a valid python attribute name'
-        return Ref(initial_path=self._path + [item])
+        assert item.isidentifier(), 'An item must be a valid python attribute name'
+        return self.__class__(initial_path=self._path + [item])
 
     def __repr__(self):
         return f'Ref({", ".join(self._path)})'
@@ -0,0 +1,90 @@
+from itertools import count
+from threading import RLock
+from weakref import WeakValueDictionary
+
+
+class Registry:
+    """Registry holds the structure classes by id and configuration
+
+    Registry is a singleton. Every structure class is registered with a new
+    id when it is defined. Configuring a class returns a variant of the class
+    registered with the same id and the given configuration, so that the
+    same configuration always returns the same class and every variant is
+    defined and compiled only once.
+
+    The classes are held through weak references, so a variant is released
+    once no instances, subclasses or containing structures refer to it and
+    configuring it again will define it anew.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._ids = count()
+            cls._instance._classes = WeakValueDictionary()
+            cls._instance._arrays = WeakValueDictionary()
+            cls._instance._lock = RLock()
+        return cls._instance
+
+    def __len__(self):
+        return len(self._classes)
+
+    @staticmethod
+    def key(configuration):
+        """Return the registry key of a configuration"""
+        return tuple(sorted(configuration.items(), key=lambda item: item[0]))
+
+    def register(self, cls):
+        """Assign a new id to a class defined from scratch"""
+        cls.__id__ = next(self._ids)
+        cls.__origin__ = cls
+        cls.__configuration__ = {}
+        self._classes[cls.__id__, ()] = cls
+
+    def configure(self, cls, configuration):
+        """Return the variant of a class for a configuration
+
+        The configuration is applied on top of the configuration of cls, and
+        the variant is defined by the `_configure` method of the original
+        class the first time the configuration is used.
+        """
+        origin = cls.__origin__
+        configuration = {**cls.__configuration__, **configuration}
+        if not configuration:
+            return origin
+        key = (origin.__id__, self.key(configuration))
+        with self._lock:
+            variant = self._classes.get(key)
+            if variant is None:
+                variant = origin._configure(configuration)
+                # The variant was registered on its own when it was defined
+                self._classes.pop((variant.__id__, ()), None)
+                variant.__id__ = origin.__id__
+                variant.__origin__ = origin
+                variant.__configuration__ = configuration
+                self._classes[key] = variant
+        return variant
+
+    def array(self, element, length, define):
+        """Return the array class of an element and a length
+
+        The class is defined by calling define the first time the element and
+        length are used. A length that refers to a field is keyed by its path.
+        """
+        key = (element, tuple(getattr(length, '_path', (length,))))
+        with self._lock:
+            array = self._arrays.get(key)
+            if array is None:
+                array = define()
+                self._arrays[key] = array
+        return array
+
+    def classes(self):
+        """Return the registered classes, including the array classes"""
+        with self._lock:
+            return list(self._classes.values()) + list(self._arrays.values())
+
+    def get(self, id_, configuration=None):
+        """Return the registered class of an id and configuration or None"""
+        return self._classes.get((id_, self.key(configuration or {})))
@@ -0,0 +1,91 @@
+import mmap
+import os
+
+from .projection import Projection
+from .view import View, record_ends
+
+
+def scan(cls, source, where, offset=0):
+    """Yield the structures of cls in source for which where holds
+
+    source is a buffer of structures packed one after the other, or the
+    path of a file of them, which is memory mapped. where is either a dict
+    of field paths and the values they must be equal to, or functions of
+    the value they must hold for, such as `{'header.kind': 7,
+    'size': lambda size: size > 100}`, or a function of a view of the
+    structure.
+
+    The records are tested on their raw bytes and only the structures that
+    match are unpacked. The fields of a dict are read by a projection (see
+    `Projection`), and a view decodes only the fields the function reads.
+    Records are located as in `record_ends`, from the size of a fixed size
+    class. A buffer that ends within a structure raises EOFError.
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        yield from scan_buffer(cls, source, where, offset)
+        return
+    with open(source, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from scan_buffer(cls, data, where, offset)
+
+
+def scan_buffer(cls, buffer, where, offset=0):
+    """Yield the structures of cls in buffer for which where holds"""
+    layout = cls.__blueprint__.layout
+    if layout.fixed:
+        if not layout.size:
+            raise ValueError(f'{cls.__name__} has no size to scan')
+        if (len(buffer) - offset) % layout.size:
+            raise EOFError(
+                f'buffer ended within a {cls.__name__} structure'
+                f' ({(len(buffer) - offset) % layout.size} bytes left)'
+            )
+    match = matcher(cls, where)
+    for end in record_ends(cls, buffer, offset):
+        if match(buffer, offset):
+            yield cls.unpack_from(buffer, offset)[0]
+        offset = end
+    if offset < len(buffer):
+        raise EOFError(
+            f'buffer ended within a {cls.__name__} structure'
+            f' ({len(buffer) - offset} bytes left)'
+        )
+
+
+def matcher(cls, where):
+    """Return a function testing the record at an offset of a buffer"""
+    layout = cls.__blueprint__.layout
+    if callable(where):
+        view = View.of(cls)
+        return lambda buffer, offset: where(view(buffer, offset))
+
+    if isinstance(where, str) or not hasattr(where, 'items'):
+        raise TypeError(
+            f'where must be a dict of field paths or a function (got'
+            f' {where!r})'
+        )
+    projection = Projection.of(cls, list(where))
+    tests = [(path, test) for path, test in where.items() if callable(test)]
+    values = {path: value for path, value in where.items() if not callable(value)}
+    if layout.fixed:
+        unpack = projection.unpack
+    else:
+        def unpack(buffer, offset):
+            return projection.unpack_from(buffer, offset)[0]
+    if not tests:
+        return lambda buffer, offset: unpack(buffer, offset) == values
+    return lambda buffer, offset: (
+        _matches(unpack(buffer, offset), values, tests)
+    )
+
+
+def _matches(result, values, tests):
+    for path, value in values.items():
+        if result[path] != value:
+            return False
+    for path, test in tests:
+        if not test(result[path]):
+            return False
+    return True
@@ -0,0 +1,118 @@
+import struct
+
+from .codec import source_fmt
+from .ref import This
+from .view import View, variant_of
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def iter_unpack(cls, stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Unpack consecutive structures of cls from a binary stream
+
+    The stream is read in chunks into a buffer which only holds the bytes
+    that were not unpacked yet, so memory is bounded by the chunk size and
+    the size of the largest structure. A structure that crosses a chunk
+    boundary is unpacked again once the next chunk is read.
+    """
+    buffer = bytearray()
+    offset = 0
+    eof = False
+    while True:
+        try:
+            result, end = cls.unpack_from(buffer, offset)
+        except struct.error:
+            if eof:
+                if offset == len(buffer):
+                    return
+                raise EOFError(
+                    f'stream ended within a {cls.__name__} structure'
+                    f' ({len(buffer) - offset} bytes left)'
+                )
+            del buffer[:offset]
+            offset = 0
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer += chunk
+            continue
+
+        if end == offset:
+            raise ValueError(f'{cls.__name__} has no size to stream')
+        offset = end
+        yield result
+
+
+async def read(cls, reader):
+    """Read exactly one structure of cls from an asyncio StreamReader"""
+    buffer = bytearray()
+    await _read_into(cls, reader, buffer)
+    return cls.unpack_from(buffer, 0)[0]
+
+
+async def iter_read(cls, reader):
+    """Read structures of cls from an asyncio StreamReader until EOF"""
+    while True:
+        buffer = bytearray()
+        try:
+            await _read_into(cls, reader, buffer)
+        except EOFError as e:
+            # asyncio.IncompleteReadError, EOF between two structures ends
+            # the iteration
+            if not buffer and not getattr(e, 'partial', None):
+                return
+            raise
+        yield cls.unpack_from(buffer, 0)[0]
+
+
+async def write(structure, writer):
+    """Pack a structure into an asyncio StreamWriter and drain it"""
+    buffer = bytearray(structure.calcsize())
+    structure.pack_into(buffer, 0)
+    writer.write(buffer)
+    await writer.drain()
+
+
+async def _read_into(cls, reader, buffer):
+    """Read the bytes of a structure of cls into buffer
+
+    Consecutive fields of fixed size are read at once, and fields of
+    dynamic size are read field by field so no byte beyond the end of the
+    structure is ever read. The length of an array referring to another
+    field is resolved from the bytes read so far.
+    """
+    layout = cls.__blueprint__.layout
+    if layout.fixed:
+        if layout.size:
+            buffer += await reader.readexactly(layout.size)
+        return
+
+    start = len(buffer)
+    size = 0
+    for field, (struct_, _) in cls.__blueprint__.shape.items():
+        if field in layout.bits:
+            # A group of bit fields is read with its last field
+            size += layout.bits[field].size if layout.bits[field].last else 0
+            continue
+        if struct_.__blueprint__.layout.fixed:
+            size += struct_.__blueprint__.layout.size
+            continue
+        if size:
+            buffer += await reader.readexactly(size)
+            size = 0
+        if isinstance(getattr(struct_, '__length__', None), This):
+            # The fields preceding the array are already in the buffer, so
+            # its length is resolved through a view of the partial structure
+            length = struct_.length_of(View.of(cls)(buffer, start))
+            size = struct_.size_of(length)
+            continue
+        if isinstance(getattr(struct_, '__tag__', None), This):
+            struct_ = variant_of(struct_, View.of(cls)(buffer, start))
+        await _read_into(struct_, reader, buffer)
+
+    fmt = source_fmt(cls)
+    if fmt is not None:
+        size += struct.calcsize(fmt)
+    if size:
+        buffer += await reader.readexactly(size)
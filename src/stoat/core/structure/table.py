@@ -0,0 +1,272 @@
+import array
+from collections import namedtuple
+import struct
+
+from .array import needs_swap, typecode
+from .codec import source_fmt, split_fmt, value_fmt
+
+
+# A column of a table. The name is the dotted path of the field, the path is
+# the positions of the field within the nested instances and the offset is
+# relative to the start of the record.
+Column = namedtuple(
+    'Column',
+    [
+        'name',
+        'path',
+        'struct',
+        'offset',
+        'size',
+        'typecode',
+        'swap',
+    ]
+)
+
+
+def columns_of(structure, prefix='', path=(), offset=0):
+    """Yield the columns of a structure class in the order of the fields
+
+    Every primitive field is a column, and the fields of nested structures
+    are flattened into the columns of their own primitive fields.
+    """
+    if source_fmt(structure) is not None:
+        raise TypeError(
+            f'tables of {structure.__name__} are not supported, data sources'
+            f' have no columns'
+        )
+    if structure.__codec__ is None:
+        raise TypeError(
+            f'tables of {structure.__name__} are not supported, arrays have'
+            f' no columns'
+        )
+    if structure.__blueprint__.layout.bits:
+        raise TypeError(
+            f'tables of {structure.__name__} are not supported, bit fields'
+            f' share their bytes'
+        )
+    layout = structure.__blueprint__.layout
+    if not layout.fixed:
+        raise TypeError(
+            f'tables of {structure.__name__} are not supported, the records'
+            f' must be of fixed size'
+        )
+    for position, (key, (struct_, _)) in enumerate(
+            structure.__blueprint__.shape.items()):
+        name = prefix + key
+        start = offset + layout.offsets[key]
+        if value_fmt(struct_) is None:
+            yield from columns_of(
+                struct_, f'{name}.', path + (position,), start
+            )
+            continue
+        order, code = split_fmt(value_fmt(struct_))
+        size = struct.calcsize(order + code)
+        code = None if code == 'c' else typecode(order, code)
+        yield Column(
+            name=name,
+            path=path + (position,),
+            struct=struct_,
+            offset=start,
+            size=size,
+            typecode=code,
+            swap=code is not None and needs_swap(order, size),
+        )
+
+
+class RowValues:
+    """RowValues stands in for the values of a record within a table
+
+    A row of a table is an instance of the structure class whose
+    `__instance__` is a RowValues rather than a list, so the fields of a row
+    are read and assigned through the same accessors as regular instances,
+    straight from the columns of the table.
+    """
+    __slots__ = ('_table', '_structure', '_base', '_index')
+
+    def __init__(self, table, structure, base, index):
+        self._table = table
+        self._structure = structure
+        self._base = base
+        self._index = index
+
+    def __len__(self):
+        return len(self._structure.__blueprint__.shape)
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self)))
+
+    def __getitem__(self, position):
+        column, child = self._table.__rows__[self._structure][position]
+        if child is not None:
+            row = object.__new__(child)
+            row.__instance__ = RowValues(
+                self._table, child, self._base + column, self._index
+            )
+            return row
+        value = self._table._columns[self._base + column][self._index]
+        if self._table.__columns__[self._base + column].typecode is None:
+            return bytes((value,))
+        return value
+
+    def __setitem__(self, position, value):
+        column, child = self._table.__rows__[self._structure][position]
+        if child is not None:
+            raise TypeError('nested rows are assigned field by field')
+        if self._table.__columns__[self._base + column].typecode is None:
+            value = value[0]
+        self._table._columns[self._base + column][self._index] = value
+
+
+class TableMeta(type):
+    def __getitem__(cls, structure):
+        table = vars(structure).get('__table__')
+        if table is None:
+            rows = {}
+            columns = tuple(columns_of(structure))
+            rows_of(structure, rows)
+            table = type(cls)(f'Table[{structure.__name__}]', (cls,), {
+                '__structure__': structure,
+                '__columns__': columns,
+                '__rows__': rows,
+            })
+            structure.__table__ = table
+        return table
+
+
+class Table(metaclass=TableMeta):
+    """Table holds many records of a structure class column by column
+
+    Table classes are created by subscripting Table with a structure class,
+    such as `Table[Point]`. Every primitive field of the structure (including
+    the fields of nested structures, named by their dotted path) is stored in
+    its own contiguous column, a bytearray for Char and an array.array in
+    native byte order otherwise, as with arrays.
+
+    Records are added as instances or decoded in bulk from packed bytes, and
+    the whole table packs back into the packed records. Rows are instances
+    of the structure class reading and writing the columns in place.
+    """
+    __structure__ = None
+    __columns__ = ()
+    __rows__ = None
+
+    def __init__(self, records=()):
+        if self.__structure__ is None:
+            raise TypeError('a structure class is required, use Table[cls]')
+        self._columns = [
+            bytearray() if column.typecode is None
+            else array.array(column.typecode)
+            for column in self.__columns__
+        ]
+        self._length = 0
+        self.extend(records)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('table index out of range')
+        row = object.__new__(self.__structure__)
+        row.__instance__ = RowValues(self, self.__structure__, 0, index)
+        return row
+
+    def __iter__(self):
+        return (self[i] for i in range(self._length))
+
+    def column(self, name):
+        """Return the column of a field by its (dotted) name
+
+        The column holds the plain values of the field, and changes made to
+        it are seen by the rows. Its length must not be changed.
+        """
+        for column, data in zip(self.__columns__, self._columns):
+            if column.name == name:
+                return data
+        raise KeyError(name)
+
+    def append(self, record):
+        """Append a record, an instance of the structure class"""
+        if not isinstance(record, self.__structure__):
+            raise TypeError(
+                f'a {self.__structure__.__name__} type is required (got type'
+                f' {type(record).__name__})'
+            )
+        for column, data in zip(self.__columns__, self._columns):
+            values = record.__instance__
+            for position in column.path[:-1]:
+                values = values[position].__instance__
+            value = values[column.path[-1]]
+            data.append(value[0] if column.typecode is None else value)
+        self._length += 1
+
+    def extend(self, records):
+        """Append records from an iterable of instances or packed bytes"""
+        if isinstance(records, (bytes, bytearray, memoryview)):
+            self.frombytes(records)
+        else:
+            for record in records:
+                self.append(record)
+
+    def frombytes(self, buffer):
+        """Append the records packed back to back in buffer"""
+        size = self.__structure__.__blueprint__.layout.size
+        if not isinstance(buffer, (bytes, bytearray)):
+            buffer = bytes(buffer)
+        if not size or len(buffer) % size:
+            raise ValueError(
+                f'the buffer size ({len(buffer)}) is not a multiple of the'
+                f' size of {self.__structure__.__name__} ({size})'
+            )
+        count = len(buffer) // size
+        for column, data in zip(self.__columns__, self._columns):
+            # Gather the bytes of the column with one strided copy per byte
+            raw = bytearray(count * column.size)
+            for i in range(column.size):
+                raw[i::column.size] = buffer[column.offset + i::size]
+            if column.typecode is None:
+                data.extend(raw)
+            else:
+                values = array.array(column.typecode, raw)
+                if column.swap:
+                    values.byteswap()
+                data.extend(values)
+        self._length += count
+
+    def pack(self):
+        """Pack all the records back to back"""
+        size = self.__structure__.__blueprint__.layout.size
+        buffer = bytearray(self._length * size)
+        for column, data in zip(self.__columns__, self._columns):
+            if column.swap:
+                data = data[:]
+                data.byteswap()
+            with memoryview(data) as view, view.cast('B') as raw:
+                for i in range(column.size):
+                    buffer[column.offset + i::size] = raw[i::column.size]
+        return bytes(buffer)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self._length} records)'
+
+
+def rows_of(structure, rows):
+    """Map every structure class within a table to the columns of its fields
+
+    The fields are given as (relative column, nested structure or None) so
+    that a row of a nested structure finds its columns from its base column.
+    Return the number of columns of the structure.
+    """
+    fields = []
+    column = 0
+    for struct_, _ in structure.__blueprint__.shape.values():
+        if value_fmt(struct_) is None:
+            fields.append((column, struct_))
+            column += rows_of(struct_, rows)
+        else:
+            fields.append((column, None))
+            column += 1
+    rows[structure] = fields
+    return column
@@ -0,0 +1,196 @@
+from functools import partial
+import struct
+
+from .codec import source_fmt, value_bits, value_fmt
+from .ref import This
+from .view import field_end
+
+
+class TrackedValues(list):
+    """TrackedValues is the list of values of an instance tracking changes
+
+    Assigning a value marks its position as changed. The values of an
+    instance nested in a tracked instance mark the position of the nested
+    instance in its parent instead, up to the bound instance.
+    """
+    __slots__ = ('_mark',)
+
+    def __setitem__(self, position, value):
+        super().__setitem__(position, value)
+        self._mark(position % len(self))
+
+
+class BoundValues(TrackedValues):
+    """BoundValues is the list of values of an instance bound to a buffer"""
+    __slots__ = ('binding',)
+
+
+class Binding:
+    """Binding holds the packed bytes of an instance and its changed fields
+
+    The backing buffer is kept in sync with the instance when it is packed,
+    by packing only the fields that changed into their byte ranges. Arrays
+    mark their field when they are assigned or changed in place, and are
+    packed again along with the field their length refers to. When the size
+    of a field changes, the whole instance is packed again instead.
+    A changed bit field packs the whole group of bytes it belongs to.
+    """
+    __slots__ = (
+        'buffer', 'spans', 'dirty', 'arrays', 'lengths', 'encoders', 'groups',
+    )
+
+    def __init__(self, owner, buffer):
+        self.buffer = buffer
+        self.dirty = set()
+        self.arrays = {}
+        self.lengths = {}
+        fields = list(owner.__blueprint__.shape)
+        self.encoders = []
+        self.groups = {}
+        bits = owner.__blueprint__.layout.bits
+        group = []
+        for position, (field, (struct_, _)) in enumerate(
+                owner.__blueprint__.shape.items()):
+            self.encoders.append(field_encoder(struct_))
+            if struct_.__codec__ is None and not isinstance(
+                    getattr(struct_, '__tag__', None), This):
+                self.arrays[position] = struct_
+                if isinstance(struct_.__length__, This):
+                    self.lengths.setdefault(
+                        fields.index(struct_.__length__._path[0]), []
+                    ).append(position)
+            if value_bits(struct_) is not None:
+                group.append((position, bits[field]))
+                if bits[field].last:
+                    encoder = group_encoder(group)
+                    self.groups.update((member, encoder) for member, _ in group)
+                    group = []
+        if source_fmt(owner) is not None:
+            self.encoders.append(struct.Struct(source_fmt(owner)).pack)
+        self.spans = self._spans(owner)
+
+    def _spans(self, owner):
+        """Return the (start, end) of every value of owner in the buffer"""
+        spans = []
+        offset = 0
+        bits = owner.__blueprint__.layout.bits
+        for field, (struct_, _) in owner.__blueprint__.shape.items():
+            end = field_end(
+                struct_, self.buffer, offset, owner, bits.get(field)
+            )
+            if field in bits:
+                spans.append((offset, offset + bits[field].size))
+            else:
+                spans.append((offset, end))
+            offset = end
+        if source_fmt(owner) is not None:
+            spans.append((offset, offset + struct.calcsize(source_fmt(owner))))
+        return spans
+
+    def patch(self, owner):
+        """Pack the changed fields of owner into the buffer"""
+        values = owner.__instance__
+        # The arrays whose length changed are packed to their new length
+        for position in self.dirty.intersection(self.lengths):
+            self.dirty.update(self.lengths[position])
+        for position in sorted(self.dirty):
+            start, end = self.spans[position]
+            if position in self.arrays:
+                # The length of an array follows the field it refers to
+                raw = values[position]._raw(
+                    self.arrays[position].length_of(owner)
+                )
+            elif position in self.groups:
+                raw = self.groups[position](values)
+            else:
+                raw = self.encoders[position](values[position])
+            if len(raw) != end - start:
+                self.relayout(owner)
+                return
+            self.buffer[start:end] = raw
+        self.dirty.clear()
+
+    def relayout(self, owner):
+        """Pack the whole instance into a new buffer"""
+        self.buffer = bytearray(owner.calcsize())
+        owner.__codec__.pack_into(owner, self.buffer, 0)
+        self.spans = self._spans(owner)
+        self.dirty.clear()
+
+
+def field_encoder(struct_):
+    """Return a function packing the stored value of a field into bytes
+
+    Arrays are packed by the binding itself since their length depends on
+    their owner.
+    """
+    if value_fmt(struct_) is not None:
+        return struct.Struct(value_fmt(struct_)).pack
+    if struct_.__codec__ is None and not isinstance(
+            getattr(struct_, '__tag__', None), This):
+        return None
+
+    def encode(value):
+        buffer = bytearray(value.calcsize())
+        value.__codec__.pack_into(value, buffer, 0)
+        return buffer
+    return encode
+
+
+def group_encoder(group):
+    """Return a function packing a group of bit fields from the values
+
+    The group is given as the (position, BitField) of its fields.
+    """
+    size = group[0][1].size
+
+    def encode(values):
+        word = 0
+        for position, field in group:
+            word |= values[position] << field.shift
+        return word.to_bytes(size, 'big')
+    return encode
+
+
+def bind(owner, buffer):
+    """Bind an instance to the buffer holding its packed bytes"""
+    values = BoundValues(owner.__instance__)
+    values.binding = Binding(owner, buffer)
+    values._mark = values.binding.dirty.add
+    owner.__instance__ = values
+    _track_nested(values)
+    return owner
+
+
+def track_field(values, position):
+    """Track the changes of the instance held by a field of tracked values
+
+    An instance assigned to the field of a tracked instance, such as the
+    variant of a union, marks the field when it changes. An instance is
+    tracked by the last instance it was assigned to.
+    """
+    # Imported here since arrays are defined on top of the tracking
+    from .array import Array
+
+    value = values[position]
+    if isinstance(value, Array):
+        value._mark = partial(values._mark, position)
+        return
+    nested = getattr(value, '__instance__', None)
+    if not isinstance(nested, list):
+        return
+    if type(nested) is not TrackedValues:
+        nested = value.__instance__ = TrackedValues(nested)
+    nested._mark = _marker(values._mark, position)
+    _track_nested(nested)
+
+
+def _track_nested(values):
+    for position in range(len(values)):
+        track_field(values, position)
+
+
+def _marker(mark, position):
+    def marker(_):
+        mark(position)
+    return marker
@@ -0,0 +1,680 @@
+from functools import partial
+import array
+import struct
+
+from .array import Array
+from .codec import truncated, value_bits, value_fmt
+from .ref import This
+from .view import structure_end
+
+
+# The struct format codes packed the same way in every byte order
+ORDERLESS_CODES = ('b', 'B', '?', 'c', 'x')
+
+# The struct format codes of the values packed as bytes, which can not be
+# transcoded to numbers and back
+BYTES_CODES = 'csp'
+
+
+def orderless(code):
+    """Return whether the bytes of a struct format code have no byte order"""
+    return code in ORDERLESS_CODES or code[-1] in 'sp'
+
+
+def run_order(order, code):
+    """Return the byte order of a run starting with a value"""
+    return None if orderless(code) else order
+
+
+def merge_order(run, order, code):
+    """Return the byte order of a run extended by a value, or False
+
+    The order of a run that holds only orderless values is None. Native
+    ('@') values never join a run since that would introduce alignment
+    padding.
+    """
+    if orderless(code):
+        return run
+    if order == '@' or run == '@':
+        return False
+    if run is None or run == order:
+        return order
+    return False
+
+
+class Transcoder:
+    """Transcoder rewrites packed structures of one class as another class
+
+    A transcoder is compiled from the blueprints of a source and a
+    destination class, such as two versions of a schema or the big and
+    little endian configurations of one schema, and rewrites the packed
+    bytes of the source directly into the packed bytes of the destination
+    without creating the instances of either.
+
+    Every field of the destination is taken from the field of the source at
+    the same path, or at the path given by mapping (destination path ->
+    source path, such as `{'header.size': 'length'}`, where a path maps
+    the fields below it as well). A field mapped to None or missing from
+    the source keeps its initial value. Fields of the source that are not
+    mapped are skipped.
+
+    Values that are packed the same way by both classes, and arrays and
+    structures of the same format, are copied as slices of the source. The
+    other values are unpacked and packed again by runs, which swaps the
+    bytes of the values whose byte order differs; values of a single byte
+    join the runs of either byte order. Arrays of different element formats
+    are converted as a whole, and structures of dynamic size, including the
+    variants of unions, are transcoded by transcoders of their own.
+
+    The length and tag fields of the destination are expected to be mapped
+    from the length and tag fields of the source, which the arrays and
+    unions of the destination are transcoded by.
+    """
+    # A run of fewer values copied from the source is packed along with the
+    # values around it instead
+    MIN_COPY = 2
+
+    def __init__(self, source, destination, mapping=None):
+        self.source = source
+        self.destination = destination
+        self.mapping = dict(mapping or {})
+        self._namespace = {
+            '_len': len, '_truncated': partial(truncated, 'transcoding'),
+        }
+        self._names = 0
+        self._needed = set()
+
+        self._read_source(source.finalize())
+        operations = self._write_destination(destination.finalize())
+        body = self._source_lines() + self._destination_lines(operations)
+        end = self._position(*self._end)
+        self.source_code = '\n'.join(
+            ['def append(buffer, offset, out):'] +
+            [f'    {line}' for line in body] +
+            [f'    return {end}', ''] +
+            ['def many(buffer, offset, stop, out):', '    while offset < stop:'] +
+            [f'        {line}' for line in body] +
+            [f'        offset = {end}', '    return offset']
+        )
+        exec(
+            compile(
+                self.source_code,
+                f'<transcoder {source.__qualname__} {destination.__qualname__}>',
+                'exec'
+            ),
+            self._namespace
+        )
+        self._append = self._namespace['append']
+        self._many = self._namespace['many']
+
+    def transcode(self, buffer, offset=0):
+        """Return the destination bytes of the source packed at offset"""
+        out = bytearray()
+        self.transcode_into(buffer, offset, out)
+        return bytes(out)
+
+    def transcode_into(self, buffer, offset, out):
+        """Append the destination bytes of the source packed at offset to out
+
+        Return the offset at which the source ends.
+        """
+        with memoryview(buffer) as view:
+            self._check(view, offset, 1)
+            return self._append(view, offset, out)
+
+    def transcode_many(self, buffer, offset=0, count=None):
+        """Return the destination bytes of the sources packed at offset
+
+        The sources are packed one after the other up to the end of buffer,
+        or count of them, and are transcoded by a single loop. A buffer that
+        does not end with a whole source raises ValueError when the source
+        has a fixed size, and struct.error otherwise.
+        """
+        out = bytearray()
+        layout = self.source.__blueprint__.layout
+        with memoryview(buffer) as view:
+            if layout.fixed:
+                if not layout.size:
+                    raise ValueError(f'{self.source.__name__} has no size')
+                if count is None:
+                    count, rest = divmod(len(view) - offset, layout.size)
+                    if rest:
+                        raise ValueError(
+                            f'the buffer does not end with a whole'
+                            f' {self.source.__name__} ({rest} bytes left)'
+                        )
+                self._check(view, offset, count)
+                self._many(view, offset, offset + count * layout.size, out)
+            elif count is None:
+                self._many(view, offset, len(view), out)
+            else:
+                for _ in range(count):
+                    offset = self._append(view, offset, out)
+        return bytes(out)
+
+    def _check(self, view, offset, count):
+        # The ends of the sources of dynamic size are checked as they go
+        layout = self.source.__blueprint__.layout
+        if layout.fixed and offset + count * layout.size > len(view):
+            truncated('transcoding', view, offset, offset + count * layout.size)
+
+    def _name(self, prefix, value):
+        """Add a value to the namespace of the compiled functions"""
+        name = f'_{prefix}{self._names}'
+        self._names += 1
+        self._namespace[name] = value
+        return name
+
+    @staticmethod
+    def _position(base, start):
+        return base if not start else f'{base} + {start}'
+
+    @staticmethod
+    def _leaves(codec):
+        """Return a function returning the path of a value of the codec
+
+        Paths are tuples of fields, ending with None for the own value of a
+        data source. A path relative to a node can be given instead of the
+        position of the value.
+        """
+        paths = []
+        for _, _, _, parent, position in codec._nodes:
+            if parent is None:
+                paths.append(())
+            else:
+                shape = codec._nodes[parent][1].__blueprint__.shape
+                paths.append(paths[parent] + (list(shape)[position],))
+
+        def leaf(index, position, path=None):
+            if path is not None:
+                return paths[index] + tuple(path)
+            fields = list(codec._nodes[index][1].__blueprint__.shape)
+            if position == len(fields):
+                return paths[index] + (None,)
+            return paths[index] + (fields[position],)
+        return leaf
+
+    def _read_source(self, codec):
+        """Locate the values and the fields of dynamic size of the source
+
+        The values are regrouped into runs of their own, since values that
+        have no byte order can join the runs on either side. Runs are kept
+        as [order, start, codes, count], values by path as (run, entry,
+        shift, mask) with the shift and mask of bit fields (None otherwise),
+        entries by (run, entry) as (start, stop, order, code, members), and
+        fields of dynamic size by path as (class, begin, end, length, tag),
+        where start, stop, begin and end are the sources of offsets.
+        """
+        leaf = self._leaves(codec)
+        self._runs = []
+        self._values = {}
+        self._entries = {}
+        self._fields = {}
+        self._steps = []
+        base, start = 'offset', 0
+        run = None
+        for i, step in enumerate(codec._steps):
+            if step[0] == 'run':
+                for index, position, code, members in step[2]:
+                    order = False if run is None else (
+                        merge_order(run[0], step[1], code)
+                    )
+                    if order is False:
+                        run = [
+                            run_order(step[1], code),
+                            self._position(base, start), '', 0,
+                        ]
+                        self._runs.append(run)
+                        self._steps.append(('run', len(self._runs) - 1))
+                    else:
+                        run[0] = order
+                    r, j = len(self._runs) - 1, run[3]
+                    size = struct.calcsize(step[1] + code)
+                    run[2] += code
+                    run[3] += 1
+                    if members is None:
+                        members = leaf(index, position)
+                        self._values[members] = (r, j, None, None)
+                    else:
+                        members = [
+                            (leaf(index, member), shift, mask)
+                            for member, shift, mask in members
+                        ]
+                        for path, shift, mask in members:
+                            self._values[path] = (r, j, shift, mask)
+                    self._entries[r, j] = (
+                        self._position(base, start),
+                        self._position(base, start + size),
+                        step[1], code, members,
+                    )
+                    start += size
+                continue
+
+            run = None
+            _, index, position, name, ref = step
+            struct_ = codec._namespace[name]
+            begin = self._position(base, start)
+            length = tag = None
+            if step[0] == 'union':
+                tag = self._value(leaf(index, None, ref._path))
+                select = self._name('v', struct_.variant)
+                end = f'_end({select}({tag}), buffer, {begin})'
+                self._namespace['_end'] = structure_end
+            elif ref is not None:
+                length = self._value(leaf(index, None, ref._path))
+                end = f'{begin} + {self._name("f", struct_)}.size_of({length})'
+            elif struct_.__blueprint__.layout.fixed:
+                length = getattr(struct_, '__length__', None)
+                end = f'{begin} + {struct_.__blueprint__.layout.size}'
+            else:
+                end = f'_end({self._name("f", struct_)}, buffer, {begin})'
+                self._namespace['_end'] = structure_end
+            base, start = f'e{i}', 0
+            self._fields[leaf(index, position)] = (
+                struct_, begin, base, length, tag
+            )
+            self._steps.append(('field', base, end))
+        self._end = base, start
+
+    def _value(self, path):
+        """Return the source of a value of the source and unpack its run"""
+        if path not in self._values:
+            raise TypeError(
+                f'{self.source.__name__} has no primitive field'
+                f' {".".join(map(str, path))!r}'
+            )
+        r, j, shift, mask = self._values[path]
+        self._needed.add(r)
+        if shift is None:
+            return f'v{r}[{j}]'
+        word = f'w{r}_{j}' if self._entries[r, j][3].endswith('s') else f'v{r}[{j}]'
+        return f'({word} >> {shift} & {mask})' if shift else f'({word} & {mask})'
+
+    def _source_lines(self):
+        lines = []
+        for step in self._steps:
+            if step[0] == 'field':
+                lines.append(f'{step[1]} = {step[2]}')
+                continue
+            r = step[1]
+            if r not in self._needed:
+                continue
+            order, start, codes, count = self._runs[r]
+            packer = self._name('s', struct.Struct((order or '>') + codes))
+            lines.append(f'v{r} = {packer}.unpack_from(buffer, {start})')
+            for j in range(count):
+                _, _, _, code, members = self._entries[r, j]
+                if code.endswith('s') and isinstance(members, list):
+                    lines.append(f"w{r}_{j} = _from_bytes(v{r}[{j}], 'big')")
+                    self._namespace['_from_bytes'] = int.from_bytes
+        if not self.source.__blueprint__.layout.fixed:
+            end = self._position(*self._end)
+            lines += [
+                f'if {end} > _len(buffer):',
+                f'    _truncated(buffer, offset, {end})',
+            ]
+        return lines
+
+    def _source_path(self, path):
+        """Return the source path of a destination path, or None"""
+        for i in range(len(path), 0, -1):
+            key = '.'.join(map(str, path[:i]))
+            if key in self.mapping:
+                if self.mapping[key] is None:
+                    return None
+                return tuple(self.mapping[key].split('.')) + path[i:]
+        return path
+
+    def _in_source(self, path):
+        """Return whether the source has a field at path or fields below it"""
+        return path is not None and any(
+            key[:len(path)] == path
+            for key in list(self._values) + list(self._fields)
+        )
+
+    def _write_destination(self, codec):
+        """Return the operations writing the destination
+
+        Operations are ('copy', start, stop) for the bytes of the source,
+        ('pack', order, [(code, value, initial)]) for values, where value is
+        the source of the value or None for the initial value, and
+        ('call', line) for any other line appending to out.
+        """
+        leaf = self._leaves(codec)
+        data = [self.destination().__instance__]
+        for _, _, _, parent, position in codec._nodes[1:]:
+            data.append(data[parent][position].__instance__)
+
+        operations = []
+        values = []
+        for step in codec._steps:
+            if step[0] == 'run':
+                for index, position, code, members in step[2]:
+                    values.append(self._write_value(
+                        step[1], code, leaf(index, position),
+                        data[index][position] if members is None else [
+                            (leaf(index, member), shift, mask, data[index][member])
+                            for member, shift, mask in members
+                        ],
+                    ))
+                continue
+            self._write_values(operations, values)
+            values = []
+            _, index, position, name, _ = step
+            self._write_field(
+                operations, leaf(index, position), codec._namespace[name],
+                data[index][position],
+            )
+        self._write_values(operations, values)
+        return operations
+
+    def _write_value(self, order, code, path, initial):
+        """Return a value of the destination as (order, code, copy, write)
+
+        copy is the (start, stop) of the same bytes in the source or None,
+        and write returns the (value, initial) packed otherwise. The initial
+        value of a word of bit fields is given as the (path, shift, mask,
+        initial) of its fields.
+        """
+        if not isinstance(initial, list):
+            source = self._source_path(path)
+            if not self._in_source(source):
+                return order, code, None, lambda: (None, initial)
+            self._check_kind(path, source, code)
+            copy = self._copy([(source, None, None)], order, code)
+            return order, code, copy, lambda: (self._value(source), None)
+
+        fields = [
+            (self._source_path(path), shift, mask, initial)
+            for path, shift, mask, initial in initial
+        ]
+        for (path, _, _, _), (source, _, _, _) in zip(initial, fields):
+            if self._in_source(source):
+                self._check_kind(path, source, 'B')
+        copy = self._copy([
+            (source, shift, mask) for source, shift, mask, _ in fields
+        ], order, code)
+
+        def write():
+            if copy is not None:
+                # The word is packed as it was unpacked from the source
+                r, j = self._values[fields[0][0]][:2]
+                self._needed.add(r)
+                return f'v{r}[{j}]', None
+            word = 0
+            values = []
+            for source, shift, _, initial in fields:
+                if not self._in_source(source):
+                    word |= initial << shift
+                    continue
+                value = self._value(source)
+                values.append(f'{value} << {shift}' if shift else value)
+            if not values:
+                if code.endswith('s'):
+                    word = word.to_bytes(int(code[:-1]), 'big')
+                return None, word
+            value = ' | '.join(values + ([str(word)] if word else []))
+            if code.endswith('s'):
+                value = f"({value}).to_bytes({code[:-1]}, 'big')"
+            return value, None
+        return order, code, copy, write
+
+    def _copy(self, fields, order, code):
+        """Return the (start, stop) of the bytes of the source packing the
+        fields of a value as order and code, or None
+
+        The fields are given as (path, shift, mask), with the shift and mask
+        of bit fields and None otherwise. Bit fields are copied as whole
+        words of the same fields.
+        """
+        if not all(path in self._values for path, _, _ in fields):
+            return None
+        entries = {self._values[path][:2] for path, _, _ in fields}
+        if len(entries) != 1:
+            return None
+        start, stop, source_order, source_code, members = (
+            self._entries[entries.pop()]
+        )
+        if source_code != code or (
+                source_order != order and not orderless(code)):
+            return None
+        if fields != (
+                members if isinstance(members, list)
+                else [(members, None, None)]):
+            return None
+        return start, stop
+
+    def _check_kind(self, path, source, code):
+        if source not in self._values:
+            raise TypeError(
+                f'{self.source.__name__}.{".".join(map(str, source))} can not'
+                f' be transcoded to the primitive field'
+                f' {self.destination.__name__}.{".".join(map(str, path))}'
+            )
+        r, j, shift, _ = self._values[source]
+        source_code = 'B' if shift is not None else self._entries[r, j][3]
+        if (source_code[-1] in BYTES_CODES) != (code[-1] in BYTES_CODES):
+            raise TypeError(
+                f'{self.source.__name__}.{".".join(map(str, source))} can not'
+                f' be transcoded to'
+                f' {self.destination.__name__}.{".".join(map(str, path))}'
+            )
+
+    def _write_values(self, operations, values):
+        """Add the operations writing adjacent values of the destination
+
+        The values are grouped into runs by their byte order. Values of a
+        run copied from adjacent bytes of the source are copied at once when
+        they are the whole run or at least MIN_COPY values, and the other
+        values are packed.
+        """
+        runs = []
+        for value in values:
+            order = False if not runs else merge_order(
+                runs[-1][0], value[0], value[1]
+            )
+            if order is False:
+                runs.append([run_order(value[0], value[1]), [value]])
+            else:
+                runs[-1][0] = order
+                runs[-1][1].append(value)
+
+        for order, run in runs:
+            copies = []
+            for value in run:
+                copy = value[2]
+                if copy is None:
+                    copies.append([])
+                elif copies and copies[-1] and copies[-1][-1][2][1] == copy[0]:
+                    copies[-1].append(value)
+                else:
+                    copies.append([value])
+            copied = {
+                id(value) for copy in copies for value in copy
+                if len(copy) == len(run) or len(copy) >= self.MIN_COPY
+            }
+            for value in run:
+                if id(value) in copied:
+                    self._add_copy(operations, *value[2])
+                elif operations and operations[-1][0] == 'pack' and (
+                        operations[-1][1] == (order or '>')):
+                    operations[-1][2].append((value[1],) + value[3]())
+                else:
+                    operations.append(
+                        ('pack', order or '>', [(value[1],) + value[3]()])
+                    )
+
+    @staticmethod
+    def _add_copy(operations, start, stop):
+        # Copies of adjacent bytes of the source are merged into one slice
+        if operations and operations[-1][0] == 'copy' and (
+                operations[-1][2] == start):
+            operations[-1] = ('copy', operations[-1][1], stop)
+        else:
+            operations.append(('copy', start, stop))
+
+    def _write_field(self, operations, path, struct_, initial):
+        """Add the operation writing a field of the destination"""
+        source = self._source_path(path)
+        if not self._in_source(source):
+            operations.append(
+                ('call', f'out += {self._name("k", initial.pack())}')
+            )
+            return
+        if source not in self._fields:
+            raise TypeError(
+                f'{self.source.__name__}.{".".join(source)} can not be'
+                f' transcoded to {self.destination.__name__}.{".".join(path)}'
+            )
+        origin, begin, end, length, tag = self._fields[source]
+        if origin is struct_ or _same_array(origin, struct_):
+            self._add_copy(operations, begin, end)
+            return
+
+        if isinstance(getattr(struct_, '__tag__', None), This):
+            if not isinstance(getattr(origin, '__tag__', None), This):
+                raise TypeError(
+                    f'{origin.__name__} can not be transcoded to the union'
+                    f' {struct_.__name__}'
+                )
+            table, fallback = self._union(origin, struct_, source, path)
+            line = f'{table}.get({tag}, {fallback})(buffer, {begin}, out)'
+        elif isinstance(struct_, type) and issubclass(struct_, Array):
+            if not (isinstance(origin, type) and issubclass(origin, Array)):
+                raise TypeError(
+                    f'{origin.__name__} can not be transcoded to the array'
+                    f' {struct_.__name__}'
+                )
+            if (isinstance(struct_.__length__, int)
+                    and struct_.__length__ != length):
+                raise TypeError(
+                    f'{origin.__name__} can not be transcoded to'
+                    f' {struct_.__name__} of a different length'
+                )
+            convert = self._name('a', _array_converter(origin, struct_))
+            line = f'out += {convert}(buffer, {begin}, {length})'
+        elif origin.__codec__ is None or struct_.__codec__ is None:
+            raise TypeError(
+                f'{origin.__name__} can not be transcoded to {struct_.__name__}'
+            )
+        else:
+            nested = Transcoder(
+                origin, struct_, self._nested_mapping(source, path)
+            )
+            line = f'{self._name("t", nested._append)}(buffer, {begin}, out)'
+        operations.append(('call', line))
+
+    def _union(self, origin, union, source, path):
+        """Return the tables transcoding the variants of a union by tag"""
+        mapping = self._nested_mapping(source, path)
+        table = {}
+        for value, variant in origin.__variants__.items():
+            target = union.select(value)
+            table[value] = (
+                _unknown(union, value) if target is None
+                else Transcoder(variant, target, mapping)._append
+            )
+        fallback = (
+            Transcoder(origin.__default__, union.__default__, mapping)._append
+            if origin.__default__ is not None and union.__default__ is not None
+            else _unknown(origin, None)
+        )
+        return self._name('u', table), self._name('x', fallback)
+
+    def _nested_mapping(self, source, path):
+        """Return the mapping of the fields within a field of dynamic size"""
+        mapping = {}
+        prefix = '.'.join(path) + '.'
+        origin = '.'.join(source) + '.'
+        for key, value in self.mapping.items():
+            if not key.startswith(prefix):
+                continue
+            if value is not None and not value.startswith(origin):
+                raise TypeError(
+                    f'{key!r} can not be mapped to {value!r} outside of the'
+                    f' field {".".join(source)!r}'
+                )
+            mapping[key[len(prefix):]] = (
+                None if value is None else value[len(origin):]
+            )
+        return mapping
+
+    def _destination_lines(self, operations):
+        lines = []
+        for operation in operations:
+            if operation[0] == 'copy':
+                lines.append(f'out += buffer[{operation[1]}:{operation[2]}]')
+                continue
+            if operation[0] == 'call':
+                lines.append(operation[1])
+                continue
+            _, order, values = operation
+            packer = struct.Struct(order + ''.join(code for code, _, _ in values))
+            if all(value is None for _, value, _ in values):
+                constant = packer.pack(*[initial for _, _, initial in values])
+                lines.append(f'out += {self._name("k", constant)}')
+                continue
+            values = [
+                self._name('k', initial) if value is None else value
+                for _, value, initial in values
+            ]
+            for r in self._needed:
+                count = self._runs[r][3]
+                if values == [f'v{r}[{j}]' for j in range(count)]:
+                    values = [f'*v{r}']
+            lines.append(
+                f'out += {self._name("p", packer.pack)}({", ".join(values)})'
+            )
+        return lines
+
+
+def _same_array(source, destination):
+    """Return whether two array classes pack their elements the same way"""
+    if not all(
+            isinstance(cls, type) and issubclass(cls, Array)
+            for cls in (source, destination)):
+        return False
+    if type(source) is not type(destination):
+        return False
+    elements = source.__element__, destination.__element__
+    return (
+        value_fmt(elements[0]) == value_fmt(elements[1])
+        and value_bits(elements[0]) == value_bits(elements[1])
+    )
+
+
+def _array_converter(source, destination):
+    """Return a function converting packed elements of source to destination
+
+    Arrays of numbers are converted through their array.array buffers, which
+    are swapped from and to the byte order of the arrays. Other arrays are
+    unpacked and assigned.
+    """
+    if source.__typecode__ is not None and destination.__typecode__ is not None:
+        def convert(buffer, offset, length):
+            # The values are unpacked in native byte order
+            values = source.unpack_from(buffer, offset, length)[0].__instance__
+            if values.typecode != destination.__typecode__:
+                values = array.array(destination.__typecode__, values)
+            if destination.__swap__:
+                values.byteswap()
+            return values
+        return convert
+
+    def convert(buffer, offset, length):
+        values, _ = source.unpack_from(buffer, offset, length)
+        result = object.__new__(destination)
+        result.__instance__ = destination._storage(len(values.__instance__))
+        result.setter(values)
+        return result._raw(len(values.__instance__))
+    return convert
+
+
+def _unknown(union, tag):
+    """Return a function raising ValueError for a tag without a variant"""
+    def unknown(buffer, offset, out):
+        raise ValueError(
+            f'{union.__name__} has no variant to transcode the tag'
+            f' {"at offset " + str(offset) if tag is None else repr(tag)}'
+        )
+    return unknown
@@ -0,0 +1,183 @@
+import copyreg
+from operator import attrgetter
+
+from .base import Base
+from .meta import Layout, Meta
+from .ref import This
+
+
+class UnionMeta(Meta):
+    """UnionMeta is the metaclass of the union classes
+
+    The dispatch tables of a union are computed once when the union class is
+    created: the unpack function of every tag, and the tag of every variant.
+    A union is fixed only when all of its variants are fixed and of the same
+    size, and it is never compiled into a codec of its own.
+    """
+    def __new__(mcs, name, bases, constructor):
+        variants = constructor.fields.get('__variants__')
+        if variants is not None:
+            default = constructor.fields['__default__']
+            tags = {}
+            for tag, variant in variants.items():
+                tags.setdefault(variant, tag)
+            constructor.fields['__tags__'] = tags
+            constructor.fields['__dispatch__'] = {
+                tag: variant.unpack_from for tag, variant in variants.items()
+            }
+            constructor.fields['__fallback__'] = (
+                default.unpack_from if default is not None
+                else _unknown(name)
+            )
+            constructor.fields['__tag_of__'] = attrgetter(
+                '.'.join(constructor.fields['__tag__']._path)
+            )
+            parameters = set()
+            for variant in constructor.fields['__choices__']:
+                parameters.update(variant.__parameters__)
+            constructor.fields['__parameters__'] = frozenset(parameters)
+        return super().__new__(mcs, name, bases, constructor)
+
+    def _layout(cls):
+        if cls.__variants__ is None:
+            return Layout(fixed=False, size=None, offsets={}, bits={})
+        layouts = [variant.__blueprint__.layout for variant in cls.__choices__]
+        sizes = {layout.size for layout in layouts}
+        fixed = all(layout.fixed for layout in layouts) and len(sizes) == 1
+        return Layout(
+            fixed=fixed, size=sizes.pop() if fixed else None, offsets={},
+            bits={},
+        )
+
+    def _compile(cls):
+        return None
+
+    def _configure(cls, configuration):
+        # Unions are configured through their variants
+        def configure(variant):
+            return variant.configure(**{
+                key: value for key, value in configuration.items()
+                if key in variant.__parameters__
+            })
+        default = cls.__default__
+        return Union.of(
+            cls.__tag__,
+            {tag: configure(variant) for tag, variant in cls.__variants__.items()},
+            default=None if default is None else configure(default),
+        )
+
+
+def _unknown(name):
+    def unknown(buffer, offset):
+        raise ValueError(f'{name} has no variant for the tag at offset {offset}')
+    return unknown
+
+
+def _reduce_union(cls):
+    # Union classes are pickled as their tag and variants
+    if cls.__variants__ is None:
+        return cls.__qualname__
+    return _union_of, (cls.__tag__, cls.__variants__, cls.__default__)
+
+
+def _union_of(tag, variants, default):
+    return Union.of(tag, variants, default=default)
+
+
+copyreg.pickle(UnionMeta, _reduce_union)
+
+
+class Union(Base, metaclass=UnionMeta):
+    """Union is a field holding one of several structures chosen by a tag
+
+    Union classes are created with `Union.of`, from a reference to the tag,
+    a preceding primitive field of the containing structure, and the
+    variant of every tag value, such as
+    `body: Union.of(this.kind, {1: Login, 2: Chat}, default=Unknown)`.
+    Tags are compared with the stored value of the tag field, so they are
+    ints for integer fields.
+
+    The field holds an instance of its variant, packed and unpacked by the
+    codec of that variant. The tag value is looked up in a table computed
+    when the union is created, and the compiled codec of the containing
+    structure calls the unpack function found in it directly. Assigning an
+    instance of a variant to the field sets the tag to match, and packing a
+    field whose instance does not match its tag raises ValueError. A tag
+    that has no variant unpacks the default variant, or raises ValueError.
+    """
+    __tag__ = None
+    __variants__ = None
+    __default__ = None
+    __choices__ = ()
+    __tags__ = None
+    __dispatch__ = None
+    __fallback__ = None
+    __tag_of__ = None
+
+    def __init__(self):
+        raise TypeError(
+            f'{self.__class__.__name__} can not be instantiated, create an'
+            f' instance of one of its variants'
+        )
+
+    @classmethod
+    def of(cls, tag, variants, default=None):
+        if not isinstance(tag, This) or not tag._path:
+            raise TypeError(
+                f'the tag of a union must be a reference to a field (got'
+                f' {tag!r})'
+            )
+        if not variants:
+            raise TypeError('a union requires at least one variant')
+        choices = list(dict.fromkeys(
+            list(variants.values()) + ([] if default is None else [default])
+        ))
+        for variant in choices:
+            if not isinstance(variant, Meta) or variant.__codec__ is None:
+                raise TypeError(
+                    f'the variants of a union must be structures (got'
+                    f' {variant!r})'
+                )
+        name = f'Union[this.{".".join(tag._path)}]'
+        return UnionMeta.dynamic(name, (cls,), {
+            '__tag__': tag,
+            '__variants__': dict(variants),
+            '__default__': default,
+            '__choices__': tuple(choices),
+        }, {})
+
+    @classmethod
+    def array(cls, size):
+        raise NotImplementedError(
+            f'arrays of unions are not supported (got {cls.__name__}[{size!r}])'
+        )
+
+    @classmethod
+    def select(cls, tag):
+        """Return the variant of a tag value, or None"""
+        return cls.__variants__.get(tag, cls.__default__)
+
+    @classmethod
+    def variant(cls, tag):
+        """Return the variant of a tag value, or raise ValueError"""
+        variant = cls.select(tag)
+        if variant is None:
+            raise ValueError(f'{cls.__name__} has no variant for the tag {tag!r}')
+        return variant
+
+    @classmethod
+    def tag_of(cls, owner):
+        """Return the tag value of the union within owner"""
+        return cls.__tag_of__(owner)
+
+    @classmethod
+    def mismatch(cls, tag, value):
+        raise ValueError(
+            f'the tag {tag!r} of {cls.__name__} selects'
+            f' {getattr(cls.select(tag), "__name__", None)} (got type'
+            f' {type(value).__name__})'
+        )
+
+    @classmethod
+    def unpack_from(cls, buffer, offset, tag):
+        return cls.__dispatch__.get(tag, cls.__fallback__)(buffer, offset)
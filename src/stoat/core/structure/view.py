@@ -0,0 +1,233 @@
+import struct
+
+from .codec import source_fmt, value_bits, value_fmt
+from .ref import This
+
+
+class View:
+    """View is a lazy window over a packed structure inside a buffer
+
+    Views are created by `Structure.view`. A view keeps a reference to the
+    buffer and decodes fields only when they are accessed. When the buffer is
+    writable, assigning a field packs the value directly into the buffer.
+
+    Fields of fixed size are accessed through views of their own, while
+    arrays and fields of dynamic size are unpacked into regular instances.
+    Since a view cannot move the bytes that follow a field, fields of dynamic
+    size can not be assigned through a view, with the exception of arrays
+    whose length refers to another field and is therefore already known.
+    Union fields are viewed as the variant selected by their tag, and can
+    not be assigned through a view either.
+    """
+    __slots__ = ('_buffer', '_offset')
+    __structure__ = None
+
+    def __init__(self, buffer, offset=0):
+        self._buffer = buffer
+        self._offset = offset
+
+    @classmethod
+    def of(cls, structure):
+        """Return the view class of a structure class"""
+        view = vars(structure).get('__view__')
+        if view is None:
+            namespace = {'__slots__': (), '__structure__': structure}
+            for key, (struct_, _) in structure.__blueprint__.shape.items():
+                namespace[key] = field_property(structure, key, struct_)
+            view = type(f'{structure.__name__}View', (cls,), namespace)
+            structure.__view__ = view
+        return view
+
+    def _field_offset(self, key):
+        layout = self.__structure__.__blueprint__.layout
+        offset = self._offset
+        for field, (struct_, _) in self.__structure__.__blueprint__.shape.items():
+            if layout.offsets[field] is not None:
+                offset = self._offset + layout.offsets[field]
+            if field == key:
+                return offset
+            offset = field_end(
+                struct_, self._buffer, offset, self, layout.bits.get(field)
+            )
+        raise KeyError(key)
+
+    def calcsize(self):
+        layout = self.__structure__.__blueprint__.layout
+        if layout.fixed:
+            return layout.size
+        return self.__structure__.unpack_from(
+            self._buffer, self._offset
+        )[1] - self._offset
+
+    def pack(self):
+        return bytes(self._buffer[self._offset:self._offset + self.calcsize()])
+
+    def pack_into(self, buffer, offset):
+        size = self.calcsize()
+        buffer[offset:offset + size] = (
+            self._buffer[self._offset:self._offset + size]
+        )
+        return offset + size
+
+    def unpack(self):
+        """Unpack the viewed structure into a regular instance"""
+        return self.__structure__.unpack_from(self._buffer, self._offset)[0]
+
+
+def field_end(struct_, buffer, offset, owner, bits=None):
+    """Return the offset at which a field of owner packed at offset ends
+
+    The bit fields of a group all start at the offset of the group, which
+    ends with its last field. bits is the BitField of a bit field.
+    """
+    if bits is not None:
+        return offset + bits.size if bits.last else offset
+    layout = struct_.__blueprint__.layout
+    if layout.fixed:
+        return offset + layout.size
+    if isinstance(getattr(struct_, '__length__', None), This):
+        return offset + struct_.size_of(struct_.length_of(owner))
+    if isinstance(getattr(struct_, '__tag__', None), This):
+        return structure_end(variant_of(struct_, owner), buffer, offset)
+    if struct_.__codec__ is not None:
+        return structure_end(struct_, buffer, offset)
+    return struct_.unpack_from(buffer, offset)[1]
+
+
+def structure_end(cls, buffer, offset):
+    """Return the offset at which a structure of cls packed at offset ends
+
+    Only the fields that the sizes of other fields refer to are decoded.
+    The end may lie past the end of the buffer.
+    """
+    layout = cls.__blueprint__.layout
+    if layout.fixed:
+        return offset + layout.size
+    view = View.of(cls)(buffer, offset)
+    for field, (struct_, _) in cls.__blueprint__.shape.items():
+        offset = field_end(
+            struct_, buffer, offset, view, layout.bits.get(field)
+        )
+    if source_fmt(cls) is not None:
+        offset += struct.calcsize(source_fmt(cls))
+    return offset
+
+
+def record_ends(cls, buffer, offset=0, size=None):
+    """Yield the ends of the structures of cls packed from offset on
+
+    The structures are packed one after the other up to size (the size of
+    the buffer by default), and the iteration stops before a structure that
+    does not end by then. A structure of no size raises ValueError.
+    """
+    if size is None:
+        size = len(buffer)
+    while offset < size:
+        try:
+            end = structure_end(cls, buffer, offset)
+        except struct.error:
+            return
+        if end > size:
+            return
+        if end == offset:
+            raise ValueError(f'{cls.__name__} has no size')
+        yield end
+        offset = end
+
+
+def variant_of(union, owner):
+    """Return the variant of a union field selected by its tag in owner"""
+    tag = union.tag_of(owner)
+    variant = union.select(tag)
+    if variant is None:
+        raise ValueError(f'{union.__name__} has no variant for the tag {tag!r}')
+    return variant
+
+
+def field_property(structure, key, struct_):
+    static = structure.__blueprint__.layout.offsets[key]
+
+    def locate(self):
+        if static is not None:
+            return self._offset + static
+        return self._field_offset(key)
+
+    layout = struct_.__blueprint__.layout
+    if isinstance(getattr(struct_, '__length__', None), This):
+        def getter(self):
+            return struct_.unpack_from(
+                self._buffer, locate(self), struct_.length_of(self)
+            )[0]
+
+        def setter(self, value):
+            array = struct_()
+            array.resize(struct_.length_of(self))
+            array.setter(value)
+            array.pack_into(self._buffer, locate(self))
+
+    elif isinstance(getattr(struct_, '__tag__', None), This):
+        def getter(self):
+            return View.of(variant_of(struct_, self))(self._buffer, locate(self))
+
+        def setter(self, value):
+            raise TypeError(
+                f'the union field {key!r} can not be assigned through a view'
+            )
+
+    elif not layout.fixed:
+        def getter(self):
+            return struct_.unpack_from(self._buffer, locate(self))[0]
+
+        def setter(self, value):
+            raise TypeError(
+                f'the field {key!r} has a dynamic size and can not be assigned'
+                f' through a view'
+            )
+
+    elif struct_.__codec__ is None:
+        def getter(self):
+            return struct_.unpack_from(self._buffer, locate(self))[0]
+
+        def setter(self, value):
+            instance = struct_()
+            instance.setter(value)
+            instance.pack_into(self._buffer, locate(self))
+
+    elif value_fmt(struct_) is not None:
+        packer = struct.Struct(value_fmt(struct_))
+
+        def getter(self):
+            return struct_.decode(
+                packer.unpack_from(self._buffer, locate(self))[0]
+            )
+
+        def setter(self, value):
+            packer.pack_into(self._buffer, locate(self), struct_.encode(value))
+
+    elif value_bits(struct_) is not None:
+        size, shift, mask = structure.__blueprint__.layout.bits[key][2:]
+
+        def getter(self):
+            offset = locate(self)
+            word = int.from_bytes(self._buffer[offset:offset + size], 'big')
+            return struct_.decode(word >> shift & mask)
+
+        def setter(self, value):
+            offset = locate(self)
+            word = int.from_bytes(self._buffer[offset:offset + size], 'big')
+            word = word & ~(mask << shift) | struct_.encode(value) << shift
+            self._buffer[offset:offset + size] = word.to_bytes(size, 'big')
+
+    else:
+        def getter(self):
+            return View.of(struct_)(self._buffer, locate(self))
+
+        def setter(self, value):
+            if not isinstance(value, (struct_, View.of(struct_))):
+                raise TypeError(
+                    f'a {struct_.__name__} type is required (got type'
+                    f' {type(value).__name__})'
+                )
+            value.pack_into(self._buffer, locate(self))
+
+    return property(getter, setter)
@@ -0,0 +1,58 @@
+class Params(dict):
+    """Params holds the configuration of a field given with `params`"""
+    def __repr__(self):
+        return f'params({", ".join(f"{k}={v!r}" for k, v in self.items())})'
+
+
+class Default:
+    """Default holds the initial value of a field given with `default`"""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return f'default({self.value!r})'
+
+
+def params(**configuration):
+    """Configure the class of a field
+
+    The configuration is applied to the class of the field when the
+    containing structure is defined, such as
+    `s: Int16 = params(endianness=Endianness.Little)`. A value may refer to
+    a parameter of the containing structure with `param.name`.
+    """
+    return Params(configuration)
+
+
+def default(value):
+    """Set the initial value of a field"""
+    return Default(value)
+
+
+def field_options(value):
+    """Return the configuration and the default of a field value
+
+    The value is a `params`, a `default`, or a tuple of them. Repeating a
+    parameter or the default raises ValueError.
+    """
+    configuration = Params()
+    initial = None
+    for option in value if isinstance(value, tuple) else (value,):
+        if isinstance(option, Params):
+            repeated = set(configuration).intersection(option)
+            if repeated:
+                raise ValueError(
+                    f'the parameters {sorted(repeated)} are given more than once'
+                )
+            configuration.update(option)
+        elif isinstance(option, Default):
+            if initial is not None:
+                raise ValueError('the default is given more than once')
+            initial = option
+        elif option is not None:
+            raise TypeError(
+                f'a field value must be params or default (got {option!r})'
+            )
+    return configuration, None if initial is None else initial.value
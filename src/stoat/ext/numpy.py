@@ -0,0 +1,82 @@
+from weakref import WeakKeyDictionary
+
+import numpy
+
+from ..core.structure.codec import source_fmt, split_fmt
+
+
+# Struct format codes and their matching dtype kinds
+CODES = {
+    'b': 'i1', 'B': 'u1', 'h': 'i2', 'H': 'u2', 'i': 'i4', 'I': 'u4',
+    'q': 'i8', 'Q': 'u8', 'e': 'f2', 'f': 'f4', 'd': 'f8', 'c': 'S1',
+    '?': 'b1',
+}
+
+ORDERS = {'@': '=', '=': '=', '<': '<', '>': '>', '!': '>'}
+
+_dtypes = WeakKeyDictionary()
+
+
+def dtype(cls):
+    """Return the structured dtype of a fixed size structure class
+
+    The dtype is derived from the blueprint of the class. Data sources are
+    mapped by their struct format, including the byte order, nested
+    structures are mapped to nested dtypes and static arrays to subarrays
+    (or to a bytes dtype for arrays of Char).
+    """
+    result = _dtypes.get(cls)
+    if result is None:
+        result = _dtypes[cls] = _make_dtype(cls)
+    return result
+
+
+def _make_dtype(cls):
+    blueprint = cls.__blueprint__
+    if not blueprint.layout.fixed:
+        raise TypeError(f'{cls.__name__} does not have a fixed size')
+
+    if getattr(cls, '__tag__', None) is not None:
+        raise TypeError(f'{cls.__name__} is a union, which has no dtype')
+    if blueprint.layout.bits:
+        raise TypeError(f'{cls.__name__} has bit fields, which have no dtype')
+
+    element = getattr(cls, '__element__', None)
+    if element is not None:
+        if source_fmt(element) is None:
+            raise TypeError(
+                f'unsupported element {element.__name__} of {cls.__name__}'
+            )
+        if split_fmt(source_fmt(element))[1] == 'c':
+            return numpy.dtype(f'S{cls.__length__}')
+        return numpy.dtype((dtype(element), (cls.__length__,)))
+
+    fmt = source_fmt(cls)
+    if fmt is not None:
+        if blueprint.shape:
+            raise TypeError(
+                f'{cls.__name__} is both a data source and a compound'
+                f' structure'
+            )
+        order, code = split_fmt(fmt)
+        if code not in CODES:
+            raise TypeError(f'unsupported format {fmt!r} of {cls.__name__}')
+        return numpy.dtype(ORDERS[order] + CODES[code])
+
+    return numpy.dtype([
+        (field, dtype(struct_))
+        for field, (struct_, _) in blueprint.shape.items()
+    ])
+
+
+def unpack_array(cls, buffer, count=-1, offset=0):
+    """Unpack count records (all by default) from buffer into an array
+
+    The array shares the memory of the buffer, no bytes are copied.
+    """
+    return numpy.frombuffer(buffer, dtype(cls), count=count, offset=offset)
+
+
+def pack_array(cls, array):
+    """Pack the records of a structured array into bytes"""
+    return numpy.asarray(array, dtype(cls)).tobytes()
@@ -0,0 +1 @@
+from .bits import Bits
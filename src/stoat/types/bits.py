@@ -0,0 +1,131 @@
+from ..core.structure import Structure
+from ..core.structure.array import Array
+
+
+class Bits(Structure):
+    """Bits is a field of a number of bits within a group of bytes
+
+    The width of the field is configured with the `bits` parameter, and the
+    number of bits skipped before it with the `skip` parameter, such as
+    `flag: Bits = params(bits=1, skip=3)`. Bits are numbered from the most
+    significant bit of the first byte.
+
+    Adjacent bit fields of a structure are packed together into the bytes of
+    a single word, padded with zero bits to a whole byte. The word is read
+    and written at once, and every field is extracted with the shift and mask
+    precomputed when the class is defined. The value is stored as a plain
+    integer, and values that do not fit in the field raise OverflowError.
+
+    `Bits[n]` is an array of n bit fields, each preceded by its skipped bits.
+    """
+    __parameters__ = frozenset({'bits', 'skip'})
+    __bits__ = 1
+    __skip__ = 0
+
+    @classmethod
+    def array(cls, size):
+        return BitArray.of(cls, size)
+
+    @classmethod
+    def _configuration(cls, configuration):
+        bits = configuration.get('bits', cls.__bits__)
+        skip = configuration.get('skip', cls.__skip__)
+        if not isinstance(bits, int) or bits < 1:
+            raise TypeError(f'bits must be a positive int (got {bits!r})')
+        if not isinstance(skip, int) or skip < 0:
+            raise TypeError(f'skip must be a non negative int (got {skip!r})')
+        return {'__bits__': bits, '__skip__': skip}
+
+    @classmethod
+    def encode(cls, value):
+        """Convert an assigned value to the integer packed in the field"""
+        if isinstance(value, Bits):
+            value = value.__instance__[-1]
+        if not isinstance(value, int):
+            raise TypeError(
+                f'an int is required for {cls.__name__} (got type'
+                f' {type(value).__name__})'
+            )
+        if value < 0 or value >> cls.__bits__:
+            raise OverflowError(
+                f'{value!r} is out of range for {cls.__bits__} bits'
+            )
+        return value
+
+    @classmethod
+    def decode(cls, value):
+        return value
+
+    def getter(self):
+        return self.__instance__[-1]
+
+    def setter(self, value):
+        self.__instance__[-1] = self.encode(value)
+
+    def __eq__(self, other):
+        if isinstance(other, Bits):
+            return self.__instance__[-1] == other.__instance__[-1]
+        return self.__instance__[-1] == other
+
+
+class BitArray(Array):
+    """BitArray is a sequence of bit fields of the same width
+
+    The elements are packed one after the other, every element preceded by
+    its skipped bits, and the whole array is padded with zero bits to a
+    whole byte. Packing and unpacking convert the whole array to and from a
+    single integer, from which the elements are extracted by shifting.
+    """
+    @classmethod
+    def _supports(cls, element):
+        return isinstance(getattr(element, '__bits__', None), int)
+
+    @classmethod
+    def size_of(cls, length):
+        element = cls.__element__
+        return (length * (element.__skip__ + element.__bits__) + 7) // 8
+
+    @classmethod
+    def _storage(cls, length):
+        return [0] * length
+
+    def _raw(self, length):
+        data = self.__instance__
+        if length != len(data):
+            data = data[:length] + self._storage(length - len(data))
+        width = self.__element__.__skip__ + self.__element__.__bits__
+        word = 0
+        for value in data:
+            word = word << width | value
+        size = self.size_of(length)
+        return (word << size * 8 - length * width).to_bytes(size, 'big')
+
+    @classmethod
+    def unpack_from(cls, buffer, offset, length=None):
+        if length is None:
+            length = cls.__length__
+            if not isinstance(length, int):
+                raise TypeError(
+                    f'the length of {cls.__name__} is required to unpack it'
+                )
+        # The bytes are unpacked as for an array of Char, then split at once
+        result, end = super().unpack_from(buffer, offset, length)
+        word = int.from_bytes(result.__instance__, 'big')
+        width = cls.__element__.__skip__ + cls.__element__.__bits__
+        mask = (1 << cls.__element__.__bits__) - 1
+        top = (end - offset) * 8
+        result.__instance__ = [
+            word >> shift & mask
+            for shift in range(top - width, top - (length + 1) * width, -width)
+        ]
+        return result, end
+
+    def _encode(self, values):
+        return [self.__element__.encode(v) for v in values]
+
+    def __getitem__(self, index):
+        return self.__instance__[index]
+
+    def __setitem__(self, index, value):
+        self.__instance__[index] = self.__element__.encode(value)
+        self._changed()
@@ -1,13 +1,26 @@
 from abc import abstractmethod
-import struct
 
 from ...core.structure import Structure
+from ...core.structure.array import Array
+from ...core.structure.codec import split_fmt
+from .params import Endianness
 
 
 class BaseCStructure(Structure):
-    def __init__(self):
-        super().__init__()
-        self.data = self.type()
+    """BaseCStructure is the base class for structures backed by a ctype
+
+    Subclasses define `type`, the ctype of the value, and `fmt`, the struct
+    format string of the value, as class attributes. The value is stored as
+    the plain value packed by `fmt`; assigned values are converted through
+    the ctype and integers that do not fit in it raise OverflowError. The
+    range of an integer ctype is computed when it is defined (`__range__`),
+    so assigning an int in range skips the ctype.
+
+    The byte order of the value is configured with the `endianness`
+    parameter, such as `Int16.configure(endianness=Endianness.Little)`.
+    """
+    __parameters__ = frozenset({'endianness'})
+    __range__ = range(0)
 
     @property
     @abstractmethod
@@ -19,46 +32,52 @@ class BaseCStructure(Structure):
     def fmt(self):
         pass
 
-    def calcsize(self):
-        size = super().calcsize()
-        return size + struct.calcsize(self.fmt)
+    @classmethod
+    def array(cls, size):
+        return Array.of(cls, size)
+
+    @classmethod
+    def _configuration(cls, configuration):
+        endianness = configuration.get('endianness')
+        if endianness is None:
+            return {}
+        if not isinstance(endianness, Endianness):
+            raise TypeError(
+                f'endianness must be an Endianness (got {endianness!r})'
+            )
+        return {'fmt': endianness.value + split_fmt(cls.fmt)[1]}
 
-    def pack_into(self, buffer, offset):
-        offset = super().pack_into(buffer, offset)
-        struct.pack_into(self.fmt, buffer, offset, self.data.value)
-        return offset + struct.calcsize(self.fmt)
+    @classmethod
+    def encode(cls, value):
+        """Convert an assigned value to the value packed by `fmt`"""
+        if value.__class__ is int and value in cls.__range__:
+            return value
+        if isinstance(value, cls):
+            return value.__instance__[-1]
+        if isinstance(value, cls.type):
+            return value.value
+        result = cls.type(value).value
+        if isinstance(result, int) and result != value:
+            raise OverflowError(
+                f'{value!r} is out of range for {cls.__name__}'
+            )
+        return result
 
     @classmethod
-    def unpack_from(cls, buffer, offset):
-        result, offset = super().unpack_from(buffer, offset)
-        value = struct.unpack_from(result.fmt, buffer, offset)[0]
-        result.setter(value)
-        return result, offset + struct.calcsize(result.fmt)
+    def decode(cls, value):
+        """Convert a value unpacked by `fmt` to the value of the getter"""
+        return value
 
     def getter(self):
-        return self.data.value
+        return self.decode(self.__instance__[-1])
 
     def setter(self, value):
-        if isinstance(value, self.__class__):
-            self.data = value.data
-        elif isinstance(value, self.type.__class__):
-            self.data = value
-        else:
-            try:
-                self.data.value = value
-            except TypeError as e:
-                try:
-                    super().setter(value)
-                except TypeError:
-                    raise e
+        self.__instance__[-1] = self.encode(value)
 
     def __eq__(self, other):
         if isinstance(other, BaseCStructure):
-            return self.data.value == other.data.value
+            return self.__instance__[-1] == other.__instance__[-1]
         elif isinstance(other, self.type):
-            return self.data == other
+            return self.__instance__[-1] == other.value
         else:
-            return self.data.value == other
-
-
-
+            return self.__instance__[-1] == other
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class Endianness(Enum):
+    """The byte order of a primitive data source, given by its format prefix"""
+    Little = '<'
+    Big = '>'
+    Native = '='
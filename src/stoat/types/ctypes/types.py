@@ -5,30 +5,30 @@ from .base_ctype import BaseCStructure
 
 
 def make_ctype(name, ctype, fmt):
+    bits = 8 * ctypes.sizeof(ctype)
+    low = -(1 << bits - 1) if ctype(-1).value < 0 else 0
     return Meta.dynamic(name, (BaseCStructure,), {
-        'type': property(lambda self: ctype),
-        'fmt': property(lambda self: fmt),
+        'type': ctype,
+        'fmt': fmt,
+        '__range__': range(low, low + (1 << bits)),
     }, {})
 
 
-Int8 = make_ctype('Int8', ctypes.c_int8, '>c')
+Int8 = make_ctype('Int8', ctypes.c_int8, '>b')
 Int16 = make_ctype('Int16', ctypes.c_int16, '>h')
 Int32 = make_ctype('Int32', ctypes.c_int32, '>i')
 Int64 = make_ctype('Int64', ctypes.c_int64, '>q')
 
 
 class Char(BaseCStructure):
-    @property
-    def type(self):
-        return ctypes.c_char
+    type = ctypes.c_char
+    fmt = '>c'
 
-    @property
-    def fmt(self):
-        return '>c'
+    @classmethod
+    def encode(cls, value):
+        return super().encode(ord(value) if isinstance(value, str) else value)
 
-    def getter(self):
-        return super().getter().decode("utf-8")
-
-    def setter(self, value):
-        super().setter(ord(value) if isinstance(value, str) else value)
+    @classmethod
+    def decode(cls, value):
+        return value.decode("utf-8")
 
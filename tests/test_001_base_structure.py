@@ -40,8 +40,8 @@ def test_short_structure():
     s.setter(-32768)
     assert b'\x80\x00' == s.pack()
 
-    # with raises(OverflowError):
-    #     s.setter(32768)
+    with raises(OverflowError):
+        s.setter(32768)
 
 
 if __name__ == '__main__':
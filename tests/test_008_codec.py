@@ -0,0 +1,98 @@
+import ctypes
+from struct import error
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.types.ctypes import Char, Int8, Int16, Int32
+from stoat.types.ctypes.base_ctype import BaseCStructure
+
+
+class LittleInt16(BaseCStructure):
+    type = ctypes.c_int16
+    fmt = '<h'
+
+
+class NativeInt16(BaseCStructure):
+    type = ctypes.c_int16
+    fmt = 'h'
+
+
+def test_codec_flat_structure():
+    class Test(Structure):
+        a: Int8
+        b: Int16
+        c: Int32
+        d: Char
+
+    test1 = Test()
+    test1.a = -1
+    test1.b = 258
+    test1.c = 16909060
+    test1.d = b'!'
+    assert b'\xff\x01\x02\x01\x02\x03\x04!' == test1.pack()
+
+    test2, offset = Test.unpack_from(b'??\x80\x00\x01\x00\x00\x00\x02x', 2)
+    assert 10 == offset
+    assert -128 == test2.a
+    assert 1 == test2.b
+    assert 2 == test2.c
+    assert 'x' == test2.d
+
+    assert Test.__blueprint__.layout.fixed
+    assert 1 == Test.__codec__.source.count('.pack_into(')
+
+
+def test_codec_nested_structure():
+    class Inner(Structure):
+        s: Int16
+        c: Char
+
+    class Test(Structure):
+        c: Char
+        i1: Inner
+        i2: Inner
+
+    test1 = Test.unpack(b'a\x00\x01b\x00\x02c')
+    assert 'a' == test1.c
+    assert 1 == test1.i1.s
+    assert 'b' == test1.i1.c
+    assert 2 == test1.i2.s
+    assert 'c' == test1.i2.c
+    assert b'a\x00\x01b\x00\x02c' == test1.pack()
+
+    test1.i2.s = 3
+    assert b'a\x00\x01b\x00\x03c' == test1.pack()
+    assert 1 == Test.__codec__.source.count('.pack_into(')
+
+
+def test_codec_byte_order_runs():
+    class Test(Structure):
+        a: Int16
+        b: LittleInt16
+        c: LittleInt16
+        d: NativeInt16
+        e: NativeInt16
+
+    test1 = Test.unpack(b'\x00\x01\x02\x00\x03\x00' + bytes(NativeInt16.type(4)) * 2)
+    assert 1 == test1.a
+    assert 2 == test1.b
+    assert 3 == test1.c
+    assert 4 == test1.d
+    assert 4 == test1.e
+    assert 10 == len(test1.pack())
+
+    # Big endian, little endian and one run for each native field
+    assert 4 == Test.__codec__.source.count('.pack_into(')
+
+
+def test_codec_short_buffer():
+    class Test(Structure):
+        a: Int16
+        b: Int16
+
+    with raises(error):
+        Test.unpack(b'\x00\x01\x00')
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,53 @@
+from .utils import run_all
+from stoat.core.structure import Structure
+from stoat.types.ctypes import Char, Int8, Int16, Int32, Int64
+
+
+def test_primitive_layout():
+    assert 1 == Int8.__blueprint__.layout.size
+    assert 2 == Int16.__blueprint__.layout.size
+    assert 4 == Int32.__blueprint__.layout.size
+    assert 8 == Int64.__blueprint__.layout.size
+    assert 1 == Char.__blueprint__.layout.size
+    assert Char.__blueprint__.layout.fixed
+
+    assert 2 == Int16().calcsize()
+
+
+def test_structure_layout():
+    class Inner(Structure):
+        c: Char
+        i: Int32
+
+    class Test(Structure):
+        s: Int16
+        inner: Inner
+        l: Int64
+        c: Char
+
+    layout = Test.__blueprint__.layout
+    assert layout.fixed
+    assert 16 == layout.size
+    assert {'s': 0, 'inner': 2, 'l': 7, 'c': 15} == dict(layout.offsets)
+    assert {'c': 0, 'i': 1} == dict(Inner.__blueprint__.layout.offsets)
+
+    test = Test()
+    assert 16 == test.calcsize()
+    assert 16 == len(test.pack())
+
+
+def test_empty_structure_layout():
+    class Empty(Structure):
+        pass
+
+    class Test(Structure):
+        e: Empty
+        s: Int16
+
+    assert 0 == Empty.__blueprint__.layout.size
+    assert {'e': 0, 's': 0} == dict(Test.__blueprint__.layout.offsets)
+    assert b'\x00\x00' == Test().pack()
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
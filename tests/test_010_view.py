@@ -0,0 +1,73 @@
+import mmap
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.types.ctypes import Char, Int16, Int32
+
+
+class Header(Structure):
+    kind: Char
+    length: Int16
+
+
+class Message(Structure):
+    header: Header
+    sequence: Int32
+    tail: Char
+
+
+def test_view_read():
+    data = b'??m\x00\x05\x00\x00\x01\x00!'
+    view = Message.view(data, 2)
+    assert 'm' == view.header.kind
+    assert 5 == view.header.length
+    assert 256 == view.sequence
+    assert '!' == view.tail
+    assert 8 == view.calcsize()
+    assert data[2:] == view.pack()
+
+    message = view.unpack()
+    assert isinstance(message, Message)
+    assert 256 == message.sequence
+    assert data[2:] == message.pack()
+
+
+def test_view_write_through():
+    data = bytearray(b'm\x00\x05\x00\x00\x01\x00!')
+    view = Message.view(data)
+    view.sequence = 7
+    view.header.length = 0x102
+    view.tail = 'x'
+    assert b'm\x01\x02\x00\x00\x00\x07x' == data
+
+    header = Header()
+    header.kind = b'h'
+    header.length = 3
+    view.header = header
+    assert b'h\x00\x03\x00\x00\x00\x07x' == data
+
+    other = bytearray(8)
+    view.pack_into(other, 0)
+    Message.view(other).header = Header.view(b'a\x00\x01')
+    assert b'a\x00\x01\x00\x00\x00\x07x' == other
+
+    with raises(TypeError):
+        view.header = 5
+
+    with raises(TypeError):
+        Message.view(bytes(data)).sequence = 1
+
+
+def test_view_buffer_types():
+    packed = b'm\x00\x05\x00\x00\x01\x00!'
+    assert 5 == Message.view(memoryview(packed)).header.length
+
+    with mmap.mmap(-1, len(packed)) as mapped:
+        mapped[:] = packed
+        view = Message.view(mapped)
+        view.sequence = 9
+        assert 9 == Message.unpack(mapped[:]).sequence
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,86 @@
+from pytest import importorskip
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.types.ctypes import Char, Int8, Int16, Int32, Int64
+
+numpy = importorskip('numpy')
+from stoat.ext.numpy import dtype, pack_array, unpack_array  # noqa: E402
+
+
+class Point(Structure):
+    x: Int16
+    y: Int16
+
+
+class Record(Structure):
+    kind: Char
+    flags: Int8
+    position: Point
+    count: Int32
+    total: Int64
+
+
+def test_dtype():
+    assert numpy.dtype('>i2') == dtype(Int16)
+    assert numpy.dtype('S1') == dtype(Char)
+    assert numpy.dtype([('x', '>i2'), ('y', '>i2')]) == dtype(Point)
+    assert Record.__blueprint__.layout.size == dtype(Record).itemsize
+
+
+def test_unpack_array():
+    records = []
+    for i in range(4):
+        record = Record()
+        record.kind = 'r'
+        record.flags = -i
+        record.position.x = i
+        record.position.y = 2 * i
+        record.count = 1000 * i
+        record.total = 2 ** 40 + i
+        records.append(record.pack())
+    buffer = b'##' + b''.join(records)
+
+    array = unpack_array(Record, buffer, offset=2)
+    assert 4 == len(array)
+    assert [0, 1, 2, 3] == list(array['position']['x'])
+    assert [0, -1, -2, -3] == list(array['flags'])
+    assert 3000 == array[3]['count']
+    assert 2 ** 40 + 2 == array[2]['total']
+    assert b'r' == array[1]['kind']
+
+    assert 2 == len(unpack_array(Record, buffer, count=2, offset=2))
+
+    array = array.copy()
+    array['count'] += 1
+    packed = pack_array(Record, array)
+    assert 1 == Record.unpack(packed).count
+    assert 3001 == Record.unpack_from(packed, 3 * len(records[0]))[0].count
+
+
+def test_array_dtype():
+    class Test(Structure):
+        name: Char[4]
+        samples: Int16[3]
+
+    assert numpy.dtype([('name', 'S4'), ('samples', '>i2', (3,))]) == dtype(Test)
+
+    test = Test()
+    test.name = b'abcd'
+    test.samples = [1, 2, 3]
+    array = unpack_array(Test, test.pack() * 2)
+    assert b'abcd' == array[1]['name']
+    assert [1, 2, 3] == list(array[1]['samples'])
+    assert test.pack() * 2 == pack_array(Test, array)
+
+
+def test_dtype_hybrid_structure():
+    class Hybrid(Int16):
+        extra: Int16
+
+    with raises(TypeError):
+        dtype(Hybrid)
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
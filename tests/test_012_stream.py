@@ -0,0 +1,59 @@
+from io import BytesIO
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.types.ctypes import Char, Int16, Int32
+
+
+class Record(Structure):
+    kind: Char
+    id: Int32
+    value: Int16
+
+
+class TrickleStream:
+    """A stream that returns at most two bytes per read, like a socket"""
+    def __init__(self, data):
+        self.stream = BytesIO(data)
+
+    def read(self, size):
+        return self.stream.read(min(size, 2))
+
+
+def make_records(count):
+    records = []
+    for i in range(count):
+        record = Record()
+        record.kind = 'r'
+        record.id = i
+        record.value = -i
+        records.append(record)
+    return records
+
+
+def test_iter_unpack():
+    data = b''.join(record.pack() for record in make_records(10))
+
+    for chunk_size in (1, 3, 7, 70, 1024):
+        records = list(Record.iter_unpack(BytesIO(data), chunk_size=chunk_size))
+        assert list(range(10)) == [record.id for record in records]
+        assert list(range(0, -10, -1)) == [record.value for record in records]
+
+    records = list(Record.iter_unpack(TrickleStream(data)))
+    assert 10 == len(records)
+    assert 9 == records[-1].id
+
+    assert [] == list(Record.iter_unpack(BytesIO(b'')))
+
+
+def test_iter_unpack_truncated():
+    data = b''.join(record.pack() for record in make_records(2))
+
+    records = Record.iter_unpack(BytesIO(data[:-1]), chunk_size=4)
+    assert 0 == next(records).id
+    with raises(EOFError):
+        next(records)
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
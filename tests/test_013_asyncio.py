@@ -0,0 +1,78 @@
+import asyncio
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.types.ctypes import Char, Int16, Int32
+
+
+class Header(Structure):
+    kind: Char
+    length: Int16
+
+
+class Message(Structure):
+    header: Header
+    sequence: Int32
+
+
+class Writer:
+    def __init__(self):
+        self.data = bytearray()
+        self.drained = 0
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        self.drained += 1
+
+
+def make_reader(data, eof=True):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    if eof:
+        reader.feed_eof()
+    return reader
+
+
+def make_message(sequence):
+    message = Message()
+    message.header.kind = 'm'
+    message.header.length = 4
+    message.sequence = sequence
+    return message
+
+
+def test_read_write():
+    async def run():
+        writer = Writer()
+        await make_message(1).write(writer)
+        await make_message(2).write(writer)
+        assert 2 == writer.drained
+
+        reader = make_reader(bytes(writer.data) + b'rest', eof=False)
+        message = await Message.read(reader)
+        assert 'm' == message.header.kind
+        assert 1 == message.sequence
+        assert 2 == (await Message.read(reader)).sequence
+        assert b'rest' == await reader.readexactly(4)
+
+    asyncio.run(run())
+
+
+def test_iter_read():
+    async def run():
+        data = b''.join(make_message(i).pack() for i in range(5))
+
+        messages = [m async for m in Message.iter_read(make_reader(data))]
+        assert list(range(5)) == [message.sequence for message in messages]
+
+        with raises(asyncio.IncompleteReadError):
+            async for _ in Message.iter_read(make_reader(data[:-2])):
+                pass
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
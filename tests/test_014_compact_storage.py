@@ -0,0 +1,86 @@
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.types.ctypes import Char, Int8, Int16, Int32
+
+
+class Inner(Structure):
+    c: Char
+    s: Int16
+
+
+class Record(Structure):
+    a: Int8
+    inner: Inner
+    b: Int32
+
+
+def test_plain_values():
+    record = Record.unpack(b'\x01x\x00\x02\x00\x00\x00\x03')
+    assert [1, record.inner, 3] == record.__instance__
+    assert [b'x', 2] == record.inner.__instance__
+
+    record = Record()
+    assert [0, record.inner, 0] == record.__instance__
+    assert [b'\x00', 0] == record.inner.__instance__
+
+    record.inner.c = 'y'
+    record.b = Int32.unpack(b'\x00\x00\x00\x07')
+    assert [b'y', 0] == record.inner.__instance__
+    assert 7 == record.b
+
+
+def test_slots():
+    record = Record()
+    assert not hasattr(record, '__dict__')
+    assert not hasattr(Int16(), '__dict__')
+
+    with raises(AttributeError):
+        record.missing = 1
+
+    # A class that needs arbitrary attributes asks for a __dict__
+    class Annotated(Structure):
+        __slots__ = ('__dict__',)
+        a: Int8
+
+    annotated = Annotated()
+    annotated.note = 'kept'
+    assert 'kept' == annotated.note
+    assert b'\x00' == annotated.pack()
+
+
+def test_inherited_fields():
+    class Sized(Structure):
+        size: Int16
+        data: Char[this.size]
+
+    class Tagged(Sized):
+        kind: Int8
+
+    assert ['size', 'data', 'kind'] == list(Tagged.__blueprint__.shape)
+    tagged = Tagged()
+    tagged.kind = 5
+    tagged.size = 2
+    tagged.data = b'ab'
+    assert (2, 5) == (tagged.size, tagged.kind)
+    assert b'\x00\x02ab\x05' == tagged.pack()
+    assert b'ab' == Tagged.unpack(tagged.pack()).data
+
+
+def test_range_checks():
+    record = Record()
+    record.a = -128
+    record.a = 127
+    with raises(OverflowError):
+        record.a = 128
+    with raises(OverflowError):
+        record.b = 2 ** 31
+    with raises(TypeError):
+        record.b = 'a'
+    with raises(TypeError):
+        record.inner.c = 256
+    assert 127 == record.a
+    assert 0 == record.b
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,132 @@
+import asyncio
+import ctypes
+from io import BytesIO
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.types.ctypes import Char, Int16, Int32
+from stoat.types.ctypes.base_ctype import BaseCStructure
+
+
+class LittleInt32(BaseCStructure):
+    type = ctypes.c_int32
+    fmt = '<i'
+
+
+class Blob(Structure):
+    size: Int16
+    data: Char[this.size]
+
+
+def test_static_primitive_array():
+    class Test(Structure):
+        name: Char[4]
+        samples: Int32[3]
+        little: LittleInt32[2]
+
+    assert Test.__blueprint__.layout.fixed
+    assert 24 == Test.__blueprint__.layout.size
+
+    test1 = Test()
+    assert b'\x00' * 24 == test1.pack()
+    test1.name = b'abcd'
+    test1.samples = [1, -1, 2 ** 31 - 1]
+    test1.little = (3, 4)
+    test1.name[3] = 'e'
+    assert (
+        b'abce' b'\x00\x00\x00\x01\xff\xff\xff\xff\x7f\xff\xff\xff'
+        b'\x03\x00\x00\x00\x04\x00\x00\x00'
+    ) == test1.pack()
+
+    test2 = Test.unpack(test1.pack())
+    assert b'abce' == test2.name
+    assert b'e' == test2.name[-1]
+    assert [1, -1, 2 ** 31 - 1] == test2.samples
+    assert (3, 4) == test2.little
+    assert 3 == len(test2.samples)
+
+    with raises(TypeError):
+        test2.name = b'abc'
+    with raises(TypeError):
+        test2.name = 'abcd'
+    with raises(OverflowError):
+        test2.samples = [0, 0, 2 ** 31]
+    with raises(OverflowError):
+        test2.samples[0] = 2 ** 31
+    with raises(IndexError):
+        test2.samples[3]
+
+
+def test_dynamic_primitive_array():
+    blob = Blob()
+    blob.size = 3
+    blob.data = b'abc'
+    assert b'\x00\x03abc' == blob.pack()
+
+    blob.size = 5
+    assert b'\x00\x05abc\x00\x00' == blob.pack()
+    assert 7 == blob.calcsize()
+    blob.data[4] = b'!'
+    assert b'\x00\x05abc\x00!' == blob.pack()
+
+    blob.size = 1
+    assert b'\x00\x01a' == blob.pack()
+    assert 1 == len(blob.data)
+
+    blob = Blob.unpack(b'\x00\x04data')
+    assert b'data' == blob.data
+    assert not Blob.__blueprint__.layout.fixed
+
+    with raises(TypeError):
+        blob.data = b'too long'
+
+    with raises(TypeError):
+        class Forward(Structure):
+            data: Char[this.size]
+            size: Int16
+
+
+def test_nested_reference_array():
+    class Number(Structure):
+        value: Int16
+
+    class Group(Structure):
+        size: Number
+        data: Int32[this.size.value]
+        tail: Int16
+
+    group = Group.unpack(b'\x00\x02\x00\x00\x00\x09\x00\x00\x00\x51\x00\x07')
+    assert [9, 81] == group.data
+    assert 7 == group.tail
+    assert b'\x00\x02\x00\x00\x00\x09\x00\x00\x00\x51\x00\x07' == group.pack()
+
+    view = Group.view(b'\x00\x01\x00\x00\x00\x09\x00\x03')
+    assert [9] == view.data
+    assert 3 == view.tail
+
+
+def test_dynamic_array_streams():
+    blobs = []
+    for i in range(5):
+        blob = Blob()
+        blob.size = i
+        blob.data = bytes(range(i))
+        blobs.append(blob.pack())
+    data = b''.join(blobs)
+
+    records = list(Blob.iter_unpack(BytesIO(data), chunk_size=3))
+    assert [bytes(range(i)) for i in range(5)] == [r.data for r in records]
+
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data + b'rest')
+        reader.feed_eof()
+        for i in range(5):
+            assert bytes(range(i)) == (await Blob.read(reader)).data
+        assert b'rest' == await reader.read()
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,116 @@
+import ctypes
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.core.structure.table import Table
+from stoat.types.ctypes import Char, Int8, Int16, Int32
+from stoat.types.ctypes.base_ctype import BaseCStructure
+
+
+class LittleInt16(BaseCStructure):
+    type = ctypes.c_int16
+    fmt = '<h'
+
+
+class Point(Structure):
+    x: Int16
+    y: LittleInt16
+
+
+class Record(Structure):
+    id: Int32
+    tag: Char
+    point: Point
+
+
+def records(count):
+    result = []
+    for i in range(count):
+        record = Record()
+        record.id = i
+        record.tag = chr(ord('a') + i)
+        record.point.x = -i
+        record.point.y = 2 * i
+        result.append(record)
+    return result
+
+
+def test_table_columns():
+    assert Table[Record] is Table[Record]
+    assert ['id', 'tag', 'point.x', 'point.y'] == [
+        column.name for column in Table[Record].__columns__
+    ]
+
+    table = Table[Record](records(3))
+    assert 3 == len(table)
+    assert [0, 1, 2] == list(table.column('id'))
+    assert b'abc' == table.column('tag')
+    assert [0, -1, -2] == list(table.column('point.x'))
+    assert [0, 2, 4] == list(table.column('point.y'))
+
+    with raises(KeyError):
+        table.column('point')
+
+
+def test_table_bytes():
+    packed = b''.join(record.pack() for record in records(4))
+    size = Record.__blueprint__.layout.size
+
+    table = Table[Record]()
+    table.extend(packed)
+    table.frombytes(packed[:size])
+    assert 5 == len(table)
+    assert [0, 1, 2, 3, 0] == list(table.column('id'))
+    assert [0, 2, 4, 6, 0] == list(table.column('point.y'))
+    assert packed + packed[:size] == table.pack()
+
+    with raises(ValueError):
+        table.frombytes(packed[:-1])
+
+
+def test_table_rows():
+    table = Table[Record](records(3))
+    row = table[1]
+    assert isinstance(row, Record)
+    assert 1 == row.id
+    assert 'b' == row.tag
+    assert -1 == row.point.x
+    assert records(3)[1].pack() == row.pack()
+    assert 'c' == table[-1].tag
+
+    row.id = 10
+    row.tag = 'z'
+    row.point.y = 20
+    assert [0, 10, 2] == list(table.column('id'))
+    assert b'azc' == table.column('tag')
+    assert [0, 20, 4] == list(table.column('point.y'))
+
+    point = Point()
+    point.x = 7
+    table[0].point = point
+    assert 7 == table.column('point.x')[0]
+
+    with raises(OverflowError):
+        row.point.x = 1 << 16
+    with raises(IndexError):
+        table[3]
+    assert [0, 10, 2] == [row.id for row in table]
+
+
+def test_table_unsupported():
+    class Blob(Structure):
+        size: Int8
+        data: Int8[this.size]
+
+    with raises(TypeError):
+        Table[Blob]
+    with raises(TypeError):
+        Table[Int32]
+    with raises(TypeError):
+        Table()
+    with raises(TypeError):
+        Table[Record]().append(Point())
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,92 @@
+import ctypes
+import gc
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.core.structure.registry import Registry
+from stoat.core.utils import params
+from stoat.types.ctypes import Char, Int16
+from stoat.types.ctypes.base_ctype import BaseCStructure
+from stoat.types.ctypes.params import Endianness
+
+
+def test_registry_same_configuration():
+    little = Int16.configure(endianness=Endianness.Little)
+    assert little is Int16.configure(endianness=Endianness.Little)
+    assert little is not Int16.configure(endianness=Endianness.Big)
+    assert little.__id__ == Int16.__id__
+    assert Int16 is little.__origin__
+    assert '<h' == little.fmt
+    assert little is Registry().get(Int16.__id__, {'endianness': Endianness.Little})
+    assert Int16 is Int16.configure()
+
+    class Test(Structure):
+        a: Int16 = params(endianness=Endianness.Little)
+        b: Int16[2] = params(endianness=Endianness.Little)
+
+    assert little is Test.__blueprint__.shape['a'][0]
+    assert little is Test.__blueprint__.shape['b'][0].__element__
+    assert b'\x01\x00\x02\x00\x03\x00' == Test.unpack(b'\x01\x00\x02\x00\x03\x00').pack()
+    assert 1 == Test.unpack(b'\x01\x00\x02\x00\x03\x00').a
+
+    with raises(TypeError):
+        Int16.configure(endianness='<')
+
+
+def test_registry_structure_parameters():
+    class Inner(Structure):
+        c: Char
+        s: Int16 = params(endianness=param.order)
+
+    class Test(Structure):
+        i: Inner = params(order=param.order)
+        n: Int16 = params(endianness=param.order)
+
+    assert {'order'} == Test.__parameters__
+    little = Test.configure(order=Endianness.Little)
+    assert little is Test.configure(order=Endianness.Little)
+    assert isinstance(Test(order=Endianness.Little), little)
+
+    test = Test(order=Endianness.Little)
+    test.i.c = 'a'
+    test.i.s = 1
+    test.n = 2
+    assert b'a\x01\x00\x02\x00' == test.pack()
+
+    # Parameters that are not configured leave the fields as they are
+    test = Test()
+    test.i.s = 1
+    assert b'\x00\x00\x01\x00\x00' == test.pack()
+
+    with raises(TypeError):
+        Test(endian=Endianness.Little)
+    with raises(TypeError):
+        Test.configure(endian=Endianness.Little)
+    with raises(TypeError):
+        Int16[2].configure(order=Endianness.Little)
+
+    # Field params may hold metadata the field class does not use
+    class Tagged(Structure):
+        c: Char[2] = params(label='name')
+
+    tagged = Tagged.__blueprint__.shape['c'][0]
+    assert {'label': 'name'} == tagged.__element__.__configuration__
+
+
+def test_registry_release():
+    class Temporary(BaseCStructure):
+        type = ctypes.c_int16
+        fmt = '>h'
+
+    configuration = {'endianness': Endianness.Little}
+    variant = Temporary.configure(**configuration)
+    assert variant is Registry().get(Temporary.__id__, configuration)
+
+    del variant
+    gc.collect()
+    assert Registry().get(Temporary.__id__, configuration) is None
+    assert Temporary is Registry().get(Temporary.__id__)
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
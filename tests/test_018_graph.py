@@ -0,0 +1,67 @@
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.types.ctypes import Char, Int8, Int16
+
+
+def test_graph_type_reference():
+    class Header(Structure):
+        size: Int16
+
+    class Test(Structure):
+        copy: this.header
+        header: Header
+        size: this.header.size
+
+    shape = Test.__blueprint__.shape
+    assert Header is shape['copy'][0]
+    assert Int16 is shape['size'][0]
+    assert ['header', 'copy', 'size'] == Test.__blueprint__.graph.order
+
+    test = Test.unpack(b'\x00\x01\x00\x02\x00\x03')
+    assert 1 == test.copy.size
+    assert 2 == test.header.size
+    assert 3 == test.size
+
+
+def test_graph_length_getter():
+    class Header(Structure):
+        size: Int8
+
+    class Test(Structure):
+        header: Header
+        data: Char[this.header.size]
+
+    graph = Test.__blueprint__.graph
+    assert ['header', 'data'] == graph.order
+    assert {'data': ('header',), 'header': ()} == dict(graph.edges)
+
+    test = Test.unpack(b'\x03abc')
+    assert 3 == graph.getters['data'](test)
+    assert b'abc' == test.data
+    test.header.size = 1
+    assert b'a' == test.data
+
+
+def test_graph_errors():
+    with raises(TypeError):
+        class Loop(Structure):
+            a: this.b
+            b: this.c
+            c: this.a
+
+    with raises(TypeError):
+        class Itself(Structure):
+            data: Char[this.data]
+
+    with raises(TypeError):
+        class Missing(Structure):
+            data: Char[this.size]
+
+    with raises(TypeError):
+        class MissingNested(Structure):
+            size: Int8
+            other: this.size.value
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,94 @@
+from .utils import run_all
+from stoat.core.structure import Structure
+from stoat.types.ctypes import Char, Int8, Int16, Int32
+
+
+class Header(Structure):
+    ttl: Int8
+    sequence: Int32
+
+
+class Message(Structure):
+    header: Header
+    size: Int16
+    data: Char[this.size]
+    tail: Char
+
+
+def test_tracking_patch():
+    packed = b'\x10\x00\x00\x00\x01\x00\x03abc!'
+    message = Message.unpack_tracked(b'??' + packed, 2)
+    binding = message.__instance__.binding
+    assert packed == message.pack()
+
+    message.header.ttl = 15
+    message.tail = '?'
+    assert {0, 3} == binding.dirty
+    buffer = binding.buffer
+    assert b'\x0f\x00\x00\x00\x01\x00\x03abc?' == message.pack()
+    assert buffer is binding.buffer
+    assert not binding.dirty
+
+    # Arrays changed in place are packed as well
+    message.data[0] = 'x'
+    assert b'\x0f\x00\x00\x00\x01\x00\x03xbc?' == message.pack()
+
+    target = bytearray(12)
+    assert 12 == message.pack_into(target, 1)
+    assert b'\x0f\x00\x00\x00\x01\x00\x03xbc?' == target[1:]
+
+
+def test_tracking_relayout():
+    message = Message.unpack_tracked(b'\x10\x00\x00\x00\x01\x00\x03abc!')
+    message.size = 5
+    message.data = b'hello'
+    assert b'\x10\x00\x00\x00\x01\x00\x05hello!' == message.pack()
+    assert [(0, 5), (5, 7), (7, 12), (12, 13)] == message.__instance__.binding.spans
+
+    message.size = 1
+    message.tail = '.'
+    assert b'\x10\x00\x00\x00\x01\x00\x01h.' == message.pack()
+    assert b'\x10\x00\x00\x00\x01\x00\x01h.' == Message.unpack(message.pack()).pack()
+
+
+def test_tracking_unchanged_arrays():
+    message = Message.unpack_tracked(b'\x10\x00\x00\x00\x01\x00\x03abc!')
+    array = Message.__blueprint__.shape['data'][0]
+    packed = []
+    raw = array._raw
+
+    def counted(self, length):
+        packed.append(length)
+        return raw(self, length)
+
+    array._raw = counted
+    try:
+        message.header.ttl = 1
+        assert b'\x01\x00\x00\x00\x01\x00\x03abc!' == message.pack()
+        assert [] == packed
+
+        message.data[1] = 'x'
+        assert b'\x01\x00\x00\x00\x01\x00\x03axc!' == message.pack()
+        assert [3] == packed
+    finally:
+        array._raw = raw
+
+    view = message.packed()
+    assert b'\x01\x00\x00\x00\x01\x00\x03axc!' == view
+    message.tail = '?'
+    assert b'?' == message.packed()[-1:]
+    assert view.readonly or not hasattr(view, 'toreadonly')
+
+
+def test_tracking_existing_instance():
+    message = Message()
+    message.size = 2
+    message.data = b'hi'
+    assert message is message.track()
+    assert message is message.track()
+    message.header.sequence = 9
+    assert b'\x00\x00\x00\x00\x09\x00\x02hi\x00' == message.pack()
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,83 @@
+import os
+import pickle
+from tempfile import TemporaryDirectory
+
+from .utils import Blob, packed_blobs, raises, run_all
+from stoat.core.structure import Structure
+from stoat.core.utils import params
+from stoat.types.ctypes import Int16, Int32
+from stoat.types.ctypes.params import Endianness
+
+
+class Point(Structure):
+    x: Int32
+    y: Int16
+
+
+class Sample(Structure):
+    little: Int16 = params(endianness=Endianness.Little)
+    values: Int16[2] = params(endianness=Endianness.Little)
+
+
+def write(directory, data):
+    path = os.path.join(directory, 'records.bin')
+    with open(path, 'wb') as file:
+        file.write(data)
+    return path
+
+
+def test_unpack_file_fixed():
+    data = b''.join(
+        i.to_bytes(4, 'big') + (-i).to_bytes(2, 'big', signed=True)
+        for i in range(1000)
+    )
+    with TemporaryDirectory() as directory:
+        path = write(directory, data)
+        points = list(Point.unpack_file(path, workers=2, chunk_size=600))
+        assert list(range(1000)) == [point.x for point in points]
+        assert [-i for i in range(1000)] == [point.y for point in points]
+
+        points = Point.unpack_file(path, workers=2, ordered=False, chunk_size=600)
+        assert list(range(1000)) == sorted(point.x for point in points)
+
+        assert 1000 == len(list(Point.unpack_file(path, workers=1)))
+
+        path = write(directory, data[:-1])
+        with raises(EOFError):
+            list(Point.unpack_file(path, workers=2))
+
+        path = write(directory, b'')
+        assert [] == list(Point.unpack_file(path, workers=2))
+
+
+def test_unpack_file_dynamic():
+    data = packed_blobs(0, 500)
+    with TemporaryDirectory() as directory:
+        path = write(directory, data)
+        results = list(Blob.unpack_file(path, workers=3, chunk_size=256))
+        assert list(range(500)) == [blob.id for blob in results]
+        assert data == b''.join(blob.pack() for blob in results)
+
+        path = write(directory, data[:-1])
+        with raises(EOFError):
+            list(Blob.unpack_file(path, workers=2, chunk_size=256))
+
+
+def test_pickle_structures():
+    blob = Blob.unpack(b'\x00\x01\x00\x03abc')
+    copy = pickle.loads(pickle.dumps(blob))
+    assert type(blob.data) is type(copy.data)
+    assert b'\x00\x01\x00\x03abc' == copy.pack()
+
+    sample = Sample.unpack(b'\x01\x00\x02\x00\x03\x00')
+    assert Sample.__module__ == __name__
+    copy = pickle.loads(pickle.dumps(sample))
+    assert 1 == copy.little
+    assert [2, 3] == list(copy.values)
+    little = Int16.configure(endianness=Endianness.Little)
+    assert little is pickle.loads(pickle.dumps(little))
+    assert Int16[3] is pickle.loads(pickle.dumps(Int16[3]))
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,86 @@
+import os
+from tempfile import TemporaryDirectory
+
+from .utils import Blob, packed_blobs, raises, run_all
+from stoat.core.structure import Structure
+from stoat.core.structure.records import RecordFile
+from stoat.types.ctypes import Int16
+
+
+class Point(Structure):
+    x: Int16
+    y: Int16
+
+
+def test_record_file_dynamic():
+    with TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'blobs.bin')
+        with open(path, 'wb') as file:
+            file.write(packed_blobs(0, 100))
+
+        with RecordFile[Blob](path) as records:
+            assert 100 == len(records)
+            assert 42 == records[42].id
+            assert b'xxxxxx' == records[41].data
+            assert 99 == records[-1].id
+            assert [10, 12, 14] == [blob.id for blob in records[10:16:2]]
+            assert list(range(100)) == [blob.id for blob in records]
+            with raises(IndexError):
+                records[100]
+
+            # Records appended to the file, the last one partially
+            appended = packed_blobs(100, 110)
+            with open(path, 'ab') as file:
+                file.write(appended[:-1])
+            records.refresh()
+            assert 109 == len(records)
+            with open(path, 'ab') as file:
+                file.write(appended[-1:])
+            records.refresh()
+            assert 110 == len(records)
+            assert 109 == records[109].id
+
+        assert os.path.exists(path + '.idx')
+        assert 16 + 111 * 8 == os.path.getsize(path + '.idx')
+
+        # The saved index is mapped without scanning the file again
+        with RecordFile[Blob](path) as records:
+            assert 110 == len(records)
+            assert 77 == records[77].id
+
+        # An index that does not fit the file is built anew
+        with open(path, 'wb') as file:
+            file.write(packed_blobs(0, 3))
+        with RecordFile[Blob](path) as records:
+            assert [0, 1, 2] == [blob.id for blob in records]
+
+        # As is an index of a file rewritten with other records of the
+        # same or a larger size
+        with open(path, 'wb') as file:
+            file.write(packed_blobs(3, 6) + packed_blobs(0, 3))
+        with RecordFile[Blob](path) as records:
+            assert [3, 4, 5, 0, 1, 2] == [blob.id for blob in records]
+        with open(path, 'wb') as file:
+            file.write(packed_blobs(10, 13))
+        with RecordFile[Blob](path) as records:
+            assert [10, 11, 12] == [blob.id for blob in records]
+
+
+def test_record_file_fixed():
+    with TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'points.bin')
+        with open(path, 'wb') as file:
+            file.write(b'\x00\x01\x00\x02\x00\x03\x00\x04\x00')
+
+        with RecordFile[Point](path) as records:
+            assert 2 == len(records)
+            assert 3 == records[1].x
+            assert 4 == records[-1].y
+        assert not os.path.exists(path + '.idx')
+
+        with raises(TypeError):
+            RecordFile(path)
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
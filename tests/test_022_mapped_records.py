@@ -0,0 +1,66 @@
+import os
+from tempfile import TemporaryDirectory
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.core.structure.records import MappedRecords
+from stoat.types.ctypes import Char, Int16, Int32
+
+
+class Entry(Structure):
+    key: Char
+    counter: Int32
+
+
+class Blob(Structure):
+    size: Int16
+    data: Char[this.size]
+
+
+def test_mapped_records_update():
+    with TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'entries.bin')
+        with open(path, 'wb') as file:
+            file.write(b'a\x00\x00\x00\x01b\x00\x00\x00\x02c\x00\x00\x00\x03')
+
+        with MappedRecords(path, Entry) as records:
+            assert 3 == len(records)
+            assert 'b' == records[1].key
+            records[1].counter += 1
+            records[-1].key = 'z'
+            assert [1, 3, 3] == [entry.counter for entry in records]
+
+            entry = Entry()
+            entry.key = 'q'
+            entry.counter = 9
+            records[0] = entry
+            with raises(IndexError):
+                records[3]
+            with raises(TypeError):
+                records[0] = Blob()
+
+        with open(path, 'rb') as file:
+            assert b'q\x00\x00\x00\x09b\x00\x00\x00\x03z\x00\x00\x00\x03' == file.read()
+
+        with MappedRecords(path, Entry, mode='r') as records:
+            assert [9, 3, 3] == [entry.counter for entry in records[:]]
+            with raises(TypeError):
+                records[0].counter = 1
+
+
+def test_mapped_records_invalid():
+    with TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'entries.bin')
+        with open(path, 'wb') as file:
+            file.write(b'a\x00\x00\x00')
+
+        with raises(ValueError):
+            MappedRecords(path, Entry)
+        with raises(ValueError):
+            MappedRecords(path, Entry, mode='w')
+        with raises(TypeError):
+            MappedRecords(path, Blob)
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
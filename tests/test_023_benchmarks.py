@@ -0,0 +1,40 @@
+from .utils import run_all
+from benchmarks import CASES, compare, run
+
+
+def test_benchmarks_run():
+    results = run(['flat', 'class_creation'], number=1, repeat=1)
+    names = set(results['results'])
+    assert 'flat.pack' in names
+    assert 'flat.memory' in names
+    assert 'class_creation' in names
+    assert 'nested.pack' not in names
+    assert 'us' == results['results']['flat.unpack']['unit']
+    assert 'bytes' == results['results']['flat.memory']['unit']
+    assert 'nested.unpack' in CASES
+
+    results = run(['class_creation.schema'], number=1, repeat=1)
+    result = results['results']['class_creation.schema']
+    assert 0 < result['per_second']
+    rate = result['per_second']
+    assert abs(1e6 / result['value'] - rate) < 1e-6 * rate
+
+
+def test_benchmarks_compare():
+    baseline = {'results': {
+        'a': {'value': 1.0, 'unit': 'us'},
+        'b': {'value': 2.0, 'unit': 'us'},
+    }}
+    results = {'results': {
+        'a': {'value': 1.05, 'unit': 'us'},
+        'b': {'value': 3.0, 'unit': 'us'},
+        'c': {'value': 1.0, 'unit': 'us'},
+    }}
+    comparison = compare(results, baseline, threshold=0.1)
+    assert ['a', 'b'] == [name for name, *_ in comparison]
+    assert [False, True] == [regressed for *_, regressed in comparison]
+    assert 1.5 == comparison[1][3]
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
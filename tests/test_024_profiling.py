@@ -0,0 +1,73 @@
+from .utils import run_all
+from stoat.core.structure import Structure, profiling
+from stoat.types.ctypes import Char, Int16, Int32
+
+
+class Header(Structure):
+    kind: Char
+    size: Int16
+
+
+class Message(Structure):
+    header: Header
+    sequence: Int32
+    data: Char[this.header.size]
+
+
+DATA = b'm\x00\x03\x00\x00\x00\x07abc'
+
+
+def test_profiling_fields():
+    codec = Message.__codec__
+    with profiling.profiled(Message) as profile:
+        message = Message.unpack(DATA)
+        assert DATA == message.pack()
+        assert DATA == Message.unpack(DATA).pack()
+    assert codec is Message.__codec__
+
+    stats = profile.stats
+    assert 2 == stats['unpack', 'Message'].calls
+    assert 2 * len(DATA) == stats['unpack', 'Message'].bytes
+    assert 2 == stats['unpack', 'Message.header.size'].calls
+    assert 4 == stats['unpack', 'Message.header.size'].bytes
+    assert 6 == stats['pack', 'Message.data'].bytes
+    assert 2 == stats['calcsize', 'Message'].calls
+    assert 2 == stats['calcsize', 'Message.data'].calls
+    assert 6 == stats['calcsize', 'Message.data'].bytes
+    assert ('calcsize', 'Message.sequence') not in stats
+    assert stats['pack', 'Message'].seconds > 0
+
+    report = profile.report()
+    assert 'Message.header.kind' in report
+    assert 1 + len(stats) == len(report.splitlines())
+    assert 3 == len(profile.report(limit=2).splitlines())
+
+    # Profiling is off again
+    Message.unpack(DATA)
+    assert 2 == stats['unpack', 'Message'].calls
+
+
+def test_profiling_globally():
+    events = []
+    profile = profiling.enable(profile=profiling.Profile(
+        callback=lambda *event: events.append(event)
+    ))
+    try:
+        class Later(Structure):
+            a: Int16
+            b: Int16
+
+        Later.unpack(b'\x00\x01\x00\x02')
+        Header.unpack(b'x\x00\x01')
+    finally:
+        profiling.disable()
+
+    assert ('unpack', 'Later.b', 2) == (events[1][0], events[1][1], events[1][3])
+    assert 1 == profile.stats['unpack', 'Header'].calls
+    events.clear()
+    Later.unpack(b'\x00\x01\x00\x02')
+    assert [] == events
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,130 @@
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.core.utils import default, params
+from stoat.types import Bits
+from stoat.types.ctypes import Char, Int8, Int16
+
+
+class Header(Structure):
+    version: Int8
+    a: Bits = params(bits=5)
+    b: Bits = params(bits=14)
+    c: Bits = params(bits=9, skip=1)
+    tag: Char
+
+
+def test_bits_group_layout():
+    layout = Header.__blueprint__.layout
+    assert 6 == layout.size
+    assert {'a': 1, 'b': 1, 'c': 1, 'tag': 5} == {
+        field: layout.offsets[field] for field in ('a', 'b', 'c', 'tag')
+    }
+    assert (27, 31) == (layout.bits['a'].shift, layout.bits['a'].mask)
+    assert (13, 0x3fff) == (layout.bits['b'].shift, layout.bits['b'].mask)
+    assert (3, 0x1ff) == (layout.bits['c'].shift, layout.bits['c'].mask)
+    assert layout.bits['a'].first and layout.bits['c'].last
+
+    # The group is packed as a single word of the run of the structure
+    assert 1 == len(Header.__codec__._steps)
+
+
+def test_bits_round_trip():
+    header = Header()
+    header.version = 1
+    header.a = 0x1f
+    header.b = 0x2001
+    header.c = 0x101
+    header.tag = 'x'
+    data = header.pack()
+    assert b'\x01\xfc\x00\x28\x08x' == data
+
+    result = Header.unpack(data)
+    assert (1, 0x1f, 0x2001, 0x101, 'x') == (
+        result.version, result.a, result.b, result.c, result.tag
+    )
+
+    with raises(OverflowError):
+        header.a = 32
+    with raises(OverflowError):
+        header.c = -1
+    with raises(TypeError):
+        header.b = 'a'
+
+
+def test_bits_odd_group_size():
+    class Test(Structure):
+        a: Bits = params(bits=20)
+        b: Bits = params(bits=3)
+        n: Int16
+
+    assert 5 == Test.__blueprint__.layout.size
+    test = Test.unpack(b'\xab\xcd\xee\x00\x02')
+    assert (0xabcde, 0x7, 2) == (test.a, test.b, test.n)
+    assert b'\xab\xcd\xee\x00\x02' == test.pack()
+
+
+def test_bits_defaults():
+    class Test(Structure):
+        a: Bits = params(bits=4), default(9)
+        b: Bits = params(bits=4)
+
+    assert b'\x90' == Test().pack()
+
+    with raises(TypeError):
+        Bits.configure(bits=0)
+
+
+def test_bits_array_hex():
+    class Test(Structure):
+        a: Bits[4] = params(skip=1, bits=2)
+
+    test = Test.unpack(bytes.fromhex('e2a5'))
+    assert [3, 0, 1, 2] == list(test.a)
+    assert bytes.fromhex('60a0') == test.pack()
+
+    test.a = [1, 1, 1, 1]
+    assert b'\x24\x90' == test.pack()
+
+    with raises(OverflowError):
+        test.a[0] = 4
+
+
+def test_bits_dynamic_array():
+    class Test(Structure):
+        size: Int8
+        flags: Bits[this.size] = params(bits=3)
+        tail: Char
+
+    test = Test.unpack(b'\x03\xfa\x00z')
+    assert [7, 6, 4] == list(test.flags)
+    assert 'z' == test.tail
+    assert b'\x03\xfa\x00z' == test.pack()
+
+    test.size = 5
+    test.flags[4] = 7
+    assert b'\x05\xfa\x0ez' == test.pack()
+
+
+def test_bits_view():
+    buffer = bytearray(b'\x01\xfc\x00\x28\x08x')
+    view = Header.view(buffer)
+    assert (0x1f, 0x2001, 0x101) == (view.a, view.b, view.c)
+
+    view.b = 0x1234
+    assert (0x1f, 0x1234, 0x101) == (view.a, view.b, view.c)
+    assert 0x1234 == Header.unpack(buffer).b
+
+    with raises(OverflowError):
+        view.a = 32
+
+
+def test_bits_tracking():
+    header = Header.unpack_tracked(b'\x01\xfc\x00\x28\x08x')
+    header.b = 0x1234
+    header.tag = 'y'
+    assert b'\x01\xfa\x46\x88\x08y' == header.pack()
+    assert header.pack() == Header.unpack(header.pack()).pack()
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
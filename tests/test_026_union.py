@@ -0,0 +1,188 @@
+import asyncio
+import pickle
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.core.structure.meta import Meta
+from stoat.core.structure.ref import This
+from stoat.core.structure.union import Union
+from stoat.types.ctypes import Char, Int8, Int16
+
+
+class Login(Structure):
+    user: Int16
+
+
+class Chat(Structure):
+    size: Int8
+    text: Char[this.size]
+
+
+class Unknown(Structure):
+    pass
+
+
+class Message(Structure):
+    kind: Int8
+    body: Union.of(this.kind, {1: Login, 2: Chat})
+    crc: Int16
+
+
+def _chat(text):
+    chat = Chat()
+    chat.size = len(text)
+    chat.text = text
+    return chat
+
+
+def test_union_pack_unpack():
+    message = Message()
+    assert 1 == message.kind
+    assert isinstance(message.body, Login)
+
+    message.body = _chat(b'hi')
+    assert 2 == message.kind
+    message.crc = 7
+    assert b'\x02\x02hi\x00\x07' == message.pack()
+    assert 6 == message.calcsize()
+
+    result = Message.unpack(b'\x01\x00\x05\x00\x07')
+    assert isinstance(result.body, Login)
+    assert 5 == result.body.user
+    assert 7 == result.crc
+
+    result = Message.unpack(b'\x02\x02hi\x00\x07')
+    assert b'hi' == result.body.text
+    assert b'\x02\x02hi\x00\x07' == result.pack()
+
+
+def test_union_errors():
+    message = Message()
+    with raises(TypeError):
+        message.body = Unknown()
+
+    message.body = _chat(b'hi')
+    message.kind = 1
+    with raises(ValueError):
+        message.pack()
+
+    with raises(ValueError):
+        Message.unpack(b'\x05\x00\x00')
+
+    with raises(TypeError):
+        Union.of('kind', {1: Login})
+    with raises(TypeError):
+        Union.of(This().kind, {1: Int16[2]})
+
+
+def test_union_default():
+    class Frame(Structure):
+        kind: Int8
+        body: Union.of(this.kind, {1: Login}, default=Unknown)
+
+    frame = Frame.unpack(b'\x09')
+    assert isinstance(frame.body, Unknown)
+    assert b'\x09' == frame.pack()
+
+    frame.body = Login()
+    assert 1 == frame.kind
+    # Assigning the default variant keeps the tag
+    frame.kind = 9
+    frame.body = Unknown()
+    assert 9 == frame.kind
+
+
+def test_union_dispatch_table():
+    variants = {
+        tag: Meta.dynamic(f'Message{tag}', (Structure,), {}, {
+            'value': Int16 if tag % 2 else Int8,
+        })
+        for tag in range(120)
+    }
+
+    class Frame(Structure):
+        kind: Int8
+        body: Union.of(this.kind, variants)
+
+    union = Frame.__blueprint__.shape['body'][0]
+    assert 120 == len(union.__dispatch__)
+    assert 119 == union.__tags__[variants[119]]
+
+    frame = Frame.unpack(b'\x77\x01\x02')
+    assert isinstance(frame.body, variants[119])
+    assert 0x102 == frame.body.value
+    frame = Frame.unpack(b'\x76\x03')
+    assert 3 == frame.body.value
+
+
+def test_union_fixed_size():
+    class Small(Structure):
+        a: Int16
+
+    class Other(Structure):
+        b: Int8
+        c: Char
+
+    class Frame(Structure):
+        kind: Int8
+        body: Union.of(this.kind, {1: Small, 2: Other})
+        end: Char
+
+    assert Frame.__blueprint__.layout.fixed
+    assert 4 == Frame.__blueprint__.layout.size
+    assert 'z' == Frame.unpack(b'\x02\x01az').end
+
+
+def test_union_view():
+    buffer = bytearray(b'\x02\x02hi\x00\x07')
+    view = Message.view(buffer)
+    assert b'hi' == view.body.text
+    assert 7 == view.crc
+
+    with raises(TypeError):
+        view.body = _chat(b'ho')
+
+
+def test_union_tracking():
+    message = Message.unpack_tracked(b'\x02\x02hi\x00\x07')
+    login = Login()
+    login.user = 3
+    message.body = login
+    assert b'\x01\x00\x03\x00\x07' == message.pack()
+
+    # A variant assigned to a tracked instance is tracked as well
+    login = Login()
+    message.body = login
+    assert b'\x01\x00\x00\x00\x07' == message.pack()
+    message.body.user = 5
+    assert b'\x01\x00\x05\x00\x07' == message.pack()
+    message.body = _chat(b'q')
+    login.user = 6
+    assert b'\x02\x01q\x00\x07' == message.pack()
+    message.body.text = b'r'
+    assert b'\x02\x01r\x00\x07' == message.pack()
+
+
+def test_union_stream_read():
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'\x02\x02hi\x00\x07rest')
+        reader.feed_eof()
+        message = await Message.read(reader)
+        return message, await reader.read()
+
+    message, rest = asyncio.run(read())
+    assert b'hi' == message.body.text
+    assert b'rest' == rest
+
+
+def test_union_pickle():
+    union = Message.__blueprint__.shape['body'][0]
+    copy = pickle.loads(pickle.dumps(union))
+    assert {1: Login, 2: Chat} == copy.__variants__
+    message = pickle.loads(pickle.dumps(Message.unpack(b'\x02\x02hi\x00\x07')))
+    assert b'hi' == message.body.text
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,70 @@
+import subprocess
+import sys
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.core.structure.codec import Codec, PendingCodec
+from stoat.core.structure.meta import Meta
+from stoat.types.ctypes import Char, Int8, Int16
+
+
+def test_lazy_codec():
+    class Inner(Structure):
+        a: Int16
+
+    class Outer(Structure):
+        inner: Inner
+        size: Int8
+        data: Char[this.size]
+
+    assert isinstance(vars(Outer)['__codec__'], PendingCodec)
+    assert isinstance(vars(Inner)['__codec__'], PendingCodec)
+    assert 'layout' not in vars(Outer.__blueprint__)
+
+    outer = Outer.unpack(b'\x00\x01\x02hi')
+    assert b'hi' == outer.data
+    assert isinstance(vars(Outer)['__codec__'], Codec)
+    assert Outer.__blueprint__.layout.offsets['size'] == 2
+
+    # Nested classes are only compiled when they are used on their own
+    assert isinstance(vars(Inner)['__codec__'], PendingCodec)
+    assert b'\x00\x01' == outer.inner.pack()
+    assert Inner.finalize() is vars(Inner)['__codec__']
+
+
+def test_lazy_errors_at_definition():
+    with raises(TypeError):
+        class Following(Structure):
+            data: Char[this.size]
+            size: Int8
+
+    with raises(TypeError):
+        class Compound(Structure):
+            inner: Int16[2]
+            data: Char[this.inner]
+
+
+def test_lazy_dynamic_classes():
+    classes = [
+        Meta.dynamic(f'Generated{i}', (Structure,), {}, {'a': Int8, 'b': Int16})
+        for i in range(50)
+    ]
+    assert all(
+        isinstance(vars(cls)['__codec__'], PendingCodec) for cls in classes
+    )
+    assert b'\x01\x00\x02' == classes[7].unpack(b'\x01\x00\x02').pack()
+    assert isinstance(vars(classes[8])['__codec__'], PendingCodec)
+
+
+def test_import_is_light():
+    modules = subprocess.run(
+        [sys.executable, '-c',
+         'import sys, stoat.types.ctypes; print(" ".join(sys.modules))'],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    assert 'concurrent.futures' not in modules
+    assert 'multiprocessing' not in modules
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,183 @@
+import struct
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.core.structure.transcoder import Transcoder
+from stoat.core.structure.union import Union
+from stoat.core.utils import default, params
+from stoat.types import Bits
+from stoat.types.ctypes import Char, Int8, Int16, Int32
+from stoat.types.ctypes.params import Endianness
+
+
+class Wire(Structure):
+    id: Int32 = params(endianness=param.order)
+    kind: Int8
+    size: Int16 = params(endianness=param.order)
+    name: Char[this.size]
+    values: Int16[this.size] = params(endianness=param.order)
+    crc: Int16
+
+
+Storage = Wire.configure(order=Endianness.Little)
+
+
+def _wire(id_, name, values):
+    wire = Wire()
+    wire.id = id_
+    wire.kind = 5
+    wire.size = len(name)
+    wire.name = name
+    wire.values = values
+    wire.crc = 9
+    return wire.pack()
+
+
+def test_transcode_byte_order():
+    data = _wire(0x01020304, b'hi', [1, -2])
+    transcoder = Transcoder(Wire, Storage)
+    result = transcoder.transcode(data)
+    assert b'\x04\x03\x02\x01\x05\x02\x00hi\x01\x00\xfe\xff\x00\x09' == result
+
+    storage = Storage.unpack(result)
+    assert (0x01020304, b'hi', [1, -2], 9) == (
+        storage.id, storage.name, list(storage.values), storage.crc
+    )
+    assert data == Transcoder(Storage, Wire).transcode(result)
+
+
+def test_transcode_same_format_copies():
+    data = _wire(7, b'abc', [1, 2, 3])
+    transcoder = Transcoder(Wire, Wire)
+    assert data == transcoder.transcode(data)
+    # The whole structure is copied as a single slice
+    assert 'out += buffer[offset:e' in transcoder.source_code
+    assert '_p' not in transcoder.source_code
+
+
+def test_transcode_many():
+    records = [_wire(i, b'x' * (i % 3), [i] * (i % 3)) for i in range(10)]
+    transcoder = Transcoder(Wire, Storage)
+    result = transcoder.transcode_many(b''.join(records))
+    assert b''.join(transcoder.transcode(record) for record in records) == result
+    assert result[:len(records[0])] == transcoder.transcode_many(
+        b''.join(records), count=1
+    )
+
+    out = bytearray()
+    assert len(records[0]) == transcoder.transcode_into(records[0], 0, out)
+    assert transcoder.transcode(records[0]) == out
+
+    with raises(struct.error):
+        transcoder.transcode_many(b''.join(records)[:-1])
+
+
+def test_transcode_fixed_many():
+    class Point(Structure):
+        x: Int32 = params(endianness=param.order)
+        y: Int16 = params(endianness=param.order)
+        flags: Bits = params(bits=3)
+        mode: Bits = params(bits=5)
+
+    Little = Point.configure(order=Endianness.Little)
+    transcoder = Transcoder(Point, Little)
+    # The whole record is unpacked and packed by a single run
+    assert 'out += _p' in transcoder.source_code
+    assert '(*v0)' in transcoder.source_code
+
+    data = bytes.fromhex('00000102 0003 e5') * 3
+    assert bytes.fromhex('02010000 0300 e5') * 3 == (
+        transcoder.transcode_many(data)
+    )
+    with raises(ValueError):
+        transcoder.transcode_many(data[:-1])
+    with raises(struct.error):
+        transcoder.transcode_many(data, count=4)
+
+
+def test_transcode_schema_version():
+    class Old(Structure):
+        id: Int32
+        length: Int16
+        name: Char[this.length]
+        legacy: Int8
+
+    class New(Structure):
+        id: Int32
+        flags: Bits = params(bits=3)
+        mode: Bits = params(bits=5), default(7)
+        size: Int16
+        name: Char[this.size]
+        version: Int8 = default(2)
+
+    old = Old()
+    old.id = 1
+    old.length = 2
+    old.name = b'ok'
+    old.legacy = 4
+    transcoder = Transcoder(Old, New, {'size': 'length'})
+    new = New.unpack(transcoder.transcode(old.pack()))
+    assert (1, 0, 7, 2, b'ok', 2) == (
+        new.id, new.flags, new.mode, new.size, new.name, new.version
+    )
+
+    # A field mapped to None keeps its initial value
+    transcoder = Transcoder(Old, New, {'size': 'length', 'id': None})
+    assert 0 == New.unpack(transcoder.transcode(old.pack())).id
+
+    with raises(TypeError):
+        Transcoder(Old, New, {'size': 'name'})
+    with raises(TypeError):
+        Transcoder(Old, New, {'size': 'length', 'version': 'name'})
+
+
+class Login(Structure):
+    user: Int16 = params(endianness=param.order)
+
+
+class Chat(Structure):
+    size: Int8
+    text: Char[this.size]
+
+
+class Inner(Structure):
+    count: Int8
+    items: Int16[this.count] = params(endianness=param.order)
+
+
+class Message(Structure):
+    kind: Int8
+    body: Union.of(this.kind, {1: Login, 2: Chat})
+    inner: Inner
+    crc: Int16
+
+
+class LittleMessage(Structure):
+    kind: Int8
+    body: Union.of(this.kind, {
+        1: Login.configure(order=Endianness.Little), 2: Chat,
+    })
+    inner: Inner.configure(order=Endianness.Little)
+    crc: Int16
+
+
+def test_transcode_union_and_nested():
+    transcoder = Transcoder(Message, LittleMessage)
+
+    data = b'\x01\x01\x02\x02\x00\x01\x00\x02\x00\x03'
+    result = transcoder.transcode(data)
+    assert b'\x01\x02\x01\x02\x01\x00\x02\x00\x00\x03' == result
+    message = LittleMessage.unpack(result)
+    assert 0x102 == message.body.user
+    assert [1, 2] == list(message.inner.items)
+
+    data = b'\x02\x02hi\x00\x00\x07'
+    assert data == transcoder.transcode(data)
+    assert data == Transcoder(LittleMessage, Message).transcode(data)
+
+    with raises(ValueError):
+        transcoder.transcode(b'\x03\x00\x00\x07')
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,99 @@
+import struct
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure
+from stoat.core.structure.union import Union
+from stoat.core.utils import params
+from stoat.types import Bits
+from stoat.types.ctypes import Char, Int8, Int16, Int32
+
+
+class Header(Structure):
+    id: Int32
+    flags: Bits = params(bits=3)
+    mode: Bits = params(bits=5)
+
+
+class Login(Structure):
+    user: Int16
+
+
+class Chat(Structure):
+    size: Int8
+    text: Char[this.size]
+
+
+class Inner(Structure):
+    count: Int8
+    items: Int16[this.count]
+
+
+class Message(Structure):
+    header: Header
+    size: Int16
+    name: Char[this.size]
+    kind: Int8
+    body: Union.of(this.kind, {1: Login, 2: Chat})
+    inner: Inner
+    crc: Int16
+
+
+DATA = bytes.fromhex('0000004d a9 0003') + b'abc' + (
+    bytes.fromhex('02 02') + b'hi' + bytes.fromhex('02 0004 0005 0063')
+)
+
+
+def test_projection_values():
+    assert {'header.id': 77} == Message.unpack(DATA, fields=['header.id'])
+    assert {'size': 3, 'header.mode': 9, 'header.flags': 5} == (
+        Message.unpack(DATA, fields=['size', 'header.mode', 'header.flags'])
+    )
+    # Fields after arrays and unions are located through their lengths
+    assert {'crc': 99, 'inner.count': 2} == Message.unpack(
+        DATA, fields=['crc', 'inner.count']
+    )
+
+    result = Message.unpack(DATA, fields=['name', 'body', 'inner.items'])
+    assert b'abc' == result['name']
+    assert b'hi' == result['body'].text
+    assert [4, 5] == list(result['inner.items'])
+    assert 77 == Message.unpack(DATA, fields=['header'])['header'].id
+
+
+def test_projection_stops_early():
+    # unpack stops after the last requested field
+    assert {'size': 3} == Message.unpack(DATA[:7], fields=['size'])
+    with raises(struct.error):
+        Message.unpack_from(DATA[:7], 0, fields=['size'])
+
+    result, end = Message.unpack_from(b'--' + DATA + b'--', 2, fields=['kind'])
+    assert {'kind': 2} == result
+    assert 2 + len(DATA) == end
+
+
+def test_projection_cache():
+    Message.unpack(DATA, fields=['header.id'])
+    projection = Message.__projections__[('header.id',)]
+    Message.unpack(DATA, fields=('header.id',))
+    assert projection is Message.__projections__[('header.id',)]
+    # unpack reads the first run only, unpack_from skips to the end
+    unpack, unpack_from = projection.source.split('def unpack_from')
+    assert '_s0' in unpack
+    assert 'size_of' not in unpack and 'size_of' in unpack_from
+
+
+def test_projection_errors():
+    with raises(TypeError):
+        Message.unpack(DATA, fields=['missing'])
+    with raises(TypeError):
+        Message.unpack(DATA, fields=['body.text'])
+    with raises(TypeError):
+        Message.unpack(DATA, fields=['name.size'])
+    with raises(TypeError):
+        Message.unpack(DATA, fields='crc')
+    with raises(ValueError):
+        Message.unpack(DATA[:10] + b'\x07' + DATA[11:], fields=['crc'])
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
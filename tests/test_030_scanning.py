@@ -0,0 +1,90 @@
+import os
+from tempfile import TemporaryDirectory
+
+from .utils import Blob, blobs, raises, run_all
+from stoat.core.structure import Structure
+from stoat.core.utils import params
+from stoat.types import Bits
+from stoat.types.ctypes import Int8, Int16, Int32
+
+
+class Header(Structure):
+    kind: Int8
+    urgent: Bits = params(bits=1)
+    level: Bits = params(bits=7)
+
+
+class Point(Structure):
+    header: Header
+    x: Int32
+    y: Int16
+
+
+class Tagged(Blob):
+    kind: Int8
+
+
+def points(count):
+    return b''.join(
+        bytes([i % 5, i % 128]) + i.to_bytes(4, 'big') + b'\x00\x07'
+        for i in range(count)
+    )
+
+
+def tagged(count):
+    data = b''
+    for blob in blobs(0, count, Tagged):
+        blob.kind = blob.id % 3
+        data += blob.pack()
+    return data
+
+
+def test_scan_fixed():
+    data = points(100)
+    result = list(Point.scan(data, {'header.kind': 3}))
+    assert list(range(3, 100, 5)) == [point.x for point in result]
+    assert all(isinstance(point, Point) for point in result)
+
+    result = Point.scan(data, {'header.kind': 1, 'header.level': lambda v: v > 50})
+    assert [51, 56, 61] == [point.x for point in result][:3]
+
+    result = Point.scan(data, lambda view: view.x % 10 == 0, offset=8 * 50)
+    assert [50, 60, 70, 80, 90] == [point.x for point in result]
+
+    with raises(EOFError):
+        list(Point.scan(data[:-1], {'x': 1}))
+
+
+def test_scan_dynamic():
+    data = tagged(50)
+    result = list(Tagged.scan(data, {'kind': 2, 'size': lambda size: size > 3}))
+    assert [5, 11, 20, 26, 32] == [blob.id for blob in result][:5]
+    assert all(blob.data == b'x' * blob.size for blob in result)
+
+    result = Tagged.scan(data, lambda view: view.id in (3, 40))
+    assert [3, 40] == [blob.id for blob in result]
+
+    with raises(EOFError):
+        list(Tagged.scan(data[:-1], {'id': 0}))
+    with raises(TypeError):
+        list(Tagged.scan(data, {'missing': 0}))
+    with raises(TypeError):
+        list(Tagged.scan(data, 'id'))
+
+
+def test_scan_file():
+    with TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'records.bin')
+        with open(path, 'wb') as file:
+            file.write(tagged(50))
+        assert [4, 31] == [
+            blob.id for blob in Tagged.scan(path, {'id': lambda id_: id_ % 27 == 4})
+        ]
+
+        with open(path, 'wb'):
+            pass
+        assert [] == list(Tagged.scan(path, {'id': 0}))
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
@@ -0,0 +1,67 @@
+import struct
+
+from .utils import raises, run_all
+from stoat.core.structure import Structure, accessor
+from stoat.types import Bits
+from stoat.core.utils import params
+from stoat.types.ctypes import Char, Int8, Int16
+
+
+class Point(Structure):
+    x: Int8
+    y: Int16
+    name: Char
+    flag: Bits = params(bits=8)
+
+
+Trusted = Point.configure(trusted=True)
+
+
+def test_trusted_setters():
+    assert Trusted.__trusted__ and not Point.__trusted__
+    assert Point is Trusted.configure(trusted=False).__origin__
+
+    point = Trusted()
+    point.x = 1
+    point.y = -2
+    point.name = b'a'
+    point.flag = 3
+    assert b'\x01\xff\xfea\x03' == point.pack()
+    assert isinstance(Trusted.unpack(point.pack()), Trusted)
+
+    # Assigned values are stored unchecked
+    point.x = 1000
+    assert 1000 == point.x
+    with raises(struct.error):
+        point.pack()
+    with raises(OverflowError):
+        Point().x = 1000
+
+
+def test_trusted_class_body():
+    class Record(Structure):
+        __trusted__ = True
+        size: Int16
+
+    class Extended(Record):
+        kind: Int8
+
+    record = Extended()
+    record.kind = 1000
+    assert 1000 == record.kind
+
+
+def test_trusted_debug():
+    debug, accessor.debug = accessor.debug, True
+    try:
+        class Record(Structure):
+            __trusted__ = True
+            size: Int16
+    finally:
+        accessor.debug = debug
+    with raises(OverflowError):
+        Record().size = 1 << 16
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
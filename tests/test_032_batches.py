@@ -0,0 +1,90 @@
+import os
+import socket
+from tempfile import TemporaryDirectory
+
+from .utils import Blob, blobs, raises, run_all
+from stoat.core.structure import Structure, batches
+from stoat.core.structure.batches import BufferPool
+from stoat.types.ctypes import Int16, Int32
+
+
+class Point(Structure):
+    x: Int32
+    y: Int16
+
+
+def test_pack_many():
+    points = [Point() for _ in range(3)]
+    for i, point in enumerate(points):
+        point.x = i
+    assert b''.join(point.pack() for point in points) == Point.pack_many(points)
+
+    records = blobs(0, 10)
+    out = bytearray(b'?' * 1000)
+    assert out is Blob.pack_many(records, out=out)
+    assert b''.join(record.pack() for record in records) == out
+    assert b'' == Blob.pack_many(iter(()), out=out)
+
+    class Point3D(Point):
+        z: Int16
+
+    point = Point3D()
+    point.z = 7
+    packed = Point.pack_many([Point(), point])
+    assert Point().pack() + point.pack() == packed
+    with raises(TypeError):
+        Point.pack_many([Point(), records[0]])
+
+
+def test_buffer_pool():
+    pool = BufferPool(count=1)
+    first = pool.acquire()
+    Point.pack_many([Point()], out=first)
+    pool.release(first)
+    pool.release(bytearray())
+    assert first is pool.acquire()
+    assert first is not pool.acquire()
+
+
+def test_write_many():
+    records = blobs(0, 10)
+    records[3].track()
+    records[3].id = 99
+    records[7].track()
+    expected = b''.join(record.pack() for record in records)
+
+    left, right = socket.socketpair()
+    with left, right:
+        assert len(expected) == Blob.write_many(records, left)
+        received = b''
+        while len(received) < len(expected):
+            received += right.recv(4096)
+        assert expected == received
+
+    with TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'records.bin')
+        with open(path, 'wb') as file:
+            file.write(b'head')
+            Blob.write_many(records, file)
+        with open(path, 'rb') as file:
+            assert b'head' + expected == file.read()
+
+
+def test_write_partial():
+    written = []
+
+    class Target:
+        def sendmsg(self, buffers):
+            # Writes at most 3 bytes at once
+            data = b''.join(bytes(buffer) for buffer in buffers)[:3]
+            written.append(data)
+            return len(data)
+
+    records = blobs(0, 4)
+    records[1].track()
+    assert 4 * 4 + 6 == batches.write_many(Blob, records, Target())
+    assert b''.join(record.pack() for record in records) == b''.join(written)
+
+
+if __name__ == '__main__':
+    run_all(dir(), globals())
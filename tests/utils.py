@@ -1,6 +1,30 @@
 from pytest import raises
 from colorama import Fore, Style
 
+from stoat.core.structure import Structure
+from stoat.types.ctypes import Char, Int16
+
+
+class Blob(Structure):
+    id: Int16
+    size: Int16
+    data: Char[this.size]
+
+
+def blobs(start, stop, cls=Blob):
+    records = []
+    for i in range(start, stop):
+        blob = cls()
+        blob.id = i
+        blob.size = i % 7
+        blob.data = b'x' * (i % 7)
+        records.append(blob)
+    return records
+
+
+def packed_blobs(start, stop):
+    return b''.join(blob.pack() for blob in blobs(start, stop))
+
 
 def run_all(dir, globals):
     keys = [key for key in dir if 'test' in key]